@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search Server - Long-running JSON-lines search service
+
+Keeps every domain and stack index warm in one process and answers
+newline-delimited JSON requests over stdin/stdout or a local Unix socket.
+
+Request:   {"id": 1, "method": "search", "params": {"query": "SaaS dashboard", "domain": "style"}}
+Response:  {"id": 1, "result": {...}}   or   {"id": 1, "error": "..."}
+
+Methods:
+    search                  params: query, domain, max_results, fuzzy, ranking
+    search_stack            params: query, stack ("all" or "a,b" for several), max_results, fuzzy, ranking, per_stack
+    generate_design_system  params: query, project_name, output_format, persist, page, pages
+    stats                   uptime, per-method request counts/latency, index and result cache info
+
+Requests are handled concurrently; responses carry the request id and may
+arrive out of order.
+
+persist writes under the directory the server was started with --output-dir
+and is refused without one; clients cannot choose the directory, and project
+and page names must not contain path separators. The Unix socket is created
+readable and writable by its owner only.
+
+Usage:
+    python search.py --serve                          # stdin/stdout
+    python search.py --serve --socket /tmp/uipro.sock # Unix socket
+    python search.py --serve --output-dir ./site      # allow persist requests
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core import MAX_RESULTS, cache_info, result_cache_info, search, search_stack, warm_indexes
+from design_system import generate_design_system
+
+# ============ CONFIGURATION ============
+DEFAULT_WORKERS = 8
+_LATENCY_WINDOW = 1024  # Recent latencies kept per method for percentiles
+
+
+# ============ REQUEST HANDLING ============
+class SearchServer:
+    """Dispatches JSON-lines requests and records per-method statistics."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, output_dir=None):
+        self.workers = workers
+        self.output_dir = output_dir  # Where persist requests write; None refuses them
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.methods = {
+            "search": self._search,
+            "search_stack": self._search_stack,
+            "generate_design_system": self._generate_design_system,
+            "stats": self._get_stats,
+        }
+
+    def _search(self, params):
+        return search(params["query"], params.get("domain"), params.get("max_results", MAX_RESULTS),
+                      params.get("fuzzy", True), params.get("ranking"))
+
+    def _search_stack(self, params):
+        return search_stack(params["query"], params["stack"], params.get("max_results", MAX_RESULTS),
+                            params.get("fuzzy", True), params.get("ranking"), params.get("per_stack"))
+
+    def _generate_design_system(self, params):
+        if "output_dir" in params:
+            raise ValueError("output_dir is set when the server starts (--output-dir), not per request")
+        persist = params.get("persist", False)
+        if persist:
+            if self.output_dir is None:
+                raise ValueError("persist is disabled; start the server with --output-dir to allow it")
+            pages = [page if isinstance(page, str) else page[0] for page in params.get("pages") or []]
+            for name in [params.get("project_name") or params["query"].upper(), params.get("page")] + pages:
+                _check_path_name(name)
+        return generate_design_system(
+            params["query"],
+            params.get("project_name"),
+            params.get("output_format", "ascii"),
+            persist=persist,
+            page=params.get("page"),
+            output_dir=self.output_dir,
+            pages=params.get("pages")
+        )
+
+    def _get_stats(self, params):
+        with self._lock:
+            methods = {}
+            for method, stat in self._stats.items():
+                recent = sorted(stat["recent"])
+                methods[method] = {
+                    "requests": stat["requests"],
+                    "errors": stat["errors"],
+                    "avg_ms": round(stat["total_ms"] / stat["requests"], 3) if stat["requests"] else 0,
+                    "p50_ms": round(recent[len(recent) // 2], 3) if recent else 0,
+                    "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 3) if recent else 0,
+                }
+        return {
+            "uptime_s": round(time.time() - self.started, 3),
+            "pid": os.getpid(),
+            "workers": self.workers,
+            "methods": methods,
+            "cache": cache_info(),
+            "result_cache": result_cache_info(),
+        }
+
+    def _record(self, method, elapsed_ms, ok):
+        with self._lock:
+            stat = self._stats.setdefault(method, {"requests": 0, "errors": 0, "total_ms": 0.0, "recent": []})
+            stat["requests"] += 1
+            stat["total_ms"] += elapsed_ms
+            if not ok:
+                stat["errors"] += 1
+            stat["recent"].append(elapsed_ms)
+            if len(stat["recent"]) > _LATENCY_WINDOW:
+                del stat["recent"][0]
+
+    def handle_line(self, line):
+        """Handle one JSON request line and return the JSON response line."""
+        start = time.perf_counter()
+        request_id, method = None, None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            request_id = request.get("id")
+            method = request.get("method")
+            if method not in self.methods:
+                raise ValueError(f"Unknown method: {method}. Available: {', '.join(self.methods)}")
+            params = request.get("params") or {}
+            response = {"id": request_id, "result": self.methods[method](params)}
+            ok = True
+        except KeyError as e:
+            response = {"id": request_id, "error": f"Missing required param {e}"}
+            ok = False
+        except Exception as e:
+            response = {"id": request_id, "error": str(e)}
+            ok = False
+        if method in self.methods:
+            self._record(method, (time.perf_counter() - start) * 1000, ok)
+        return json.dumps(response, ensure_ascii=False)
+
+
+def _check_path_name(name):
+    """Raise ValueError if a project or page name would leave the output directory."""
+    if name is None:
+        return
+    if not isinstance(name, str):
+        raise ValueError(f"Project and page names must be strings: {name!r}")
+    slug = name.strip().lower().replace(' ', '-')  # As persist_design_system names folders and files
+    if "/" in slug or "\\" in slug or slug in (".", ".."):
+        raise ValueError(f"Project and page names must not contain path separators: {name!r}")
+
+
+# ============ TRANSPORTS ============
+def serve_stdio(server, stdin=None, stdout=None):
+    """Answer requests from stdin on a worker pool until EOF."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+
+    def respond(line):
+        response = server.handle_line(line)
+        with write_lock:
+            stdout.write(response + "\n")
+            stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=server.workers) as pool:
+        for line in stdin:
+            if line.strip():
+                pool.submit(respond, line)
+
+
+class _SocketHandler(socketserver.StreamRequestHandler):
+    """One connection: requests are answered in order on this thread."""
+
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode("utf-8").strip()
+            if line:
+                self.wfile.write((self.server.search_server.handle_line(line) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+
+def _remove_stale_socket(path):
+    """
+    Remove a socket file left behind by a server that is no longer running.
+
+    Raises RuntimeError if path exists but is not a socket, or if a server
+    still accepts connections on it.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise RuntimeError(f"{path} exists and is not a socket; refusing to replace it")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        pass  # Nobody listening: stale
+    else:
+        raise RuntimeError(f"A server is already listening on {path}")
+    finally:
+        probe.close()
+    os.unlink(path)
+
+
+def serve_socket(server, path):
+    """Answer requests on a Unix socket (mode 0600); each connection gets its own thread."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("Unix sockets are not supported on this platform; use stdio mode")
+    _remove_stale_socket(path)
+
+    class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    # Exit through the finally block on SIGTERM so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    umask = os.umask(0o177)  # Only the owner may connect, from the moment the socket exists
+    try:
+        unix_server = _Server(path, _SocketHandler)
+    finally:
+        os.umask(umask)
+    with unix_server:
+        unix_server.search_server = server
+        try:
+            unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def serve(socket_path=None, workers=DEFAULT_WORKERS, output_dir=None):
+    """Start a warm search server on stdio or, if given, a Unix socket; output_dir enables persist."""
+    server = SearchServer(workers, output_dir)
+    warm_indexes()
+    if socket_path:
+        print(f"UI Pro Max search server listening on {socket_path}", file=sys.stderr)
+        serve_socket(server, socket_path)
+    else:
+        serve_stdio(server)
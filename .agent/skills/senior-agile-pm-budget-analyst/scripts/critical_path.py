@@ -10,13 +10,32 @@ of dependent activities, calculate slack times, and optimize project schedules.
 
 from typing import Dict, List, Optional, Tuple, Set
 from dataclasses import dataclass, field
+import heapq
+import itertools
 import json
 import logging
+from array import array
 from collections import defaultdict, deque
 
+from graph_validation import describe_cycles, find_cycles
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# CPMEngine runs one vectorized reduction per topological level (NumPy only)
+# when levels hold at least this many activities on average; deeper, narrower
+# networks are cheaper with per-activity passes
+LEVEL_MIN_WIDTH = 16
+ENGINES = ("analyzer", "array")
+NEAR_CRITICAL_MAX_PATHS = 1000  # Paths listed by near_critical_paths() before truncating
+
 
 class ValidationError(Exception):
     """Raised when input validation fails."""
@@ -87,6 +106,8 @@ class CriticalPathAnalyzer:
         self.activities: Dict[str, Activity] = {}
         self.graph: Dict[str, List[str]] = defaultdict(list)  # Adjacency list
         self.reverse_graph: Dict[str, List[str]] = defaultdict(list)
+        self._topo_order: Optional[List[str]] = None
+        self._rank: Optional[Dict[str, int]] = None  # What-if state, built on first use
 
         # Parse and validate activities
         for act_data in activities_data:
@@ -110,45 +131,44 @@ class CriticalPathAnalyzer:
                 self.reverse_graph[act_id].append(pred_id)
 
         # Validate no cycles
-        if self._has_cycle():
-            raise ValidationError("Project network contains circular dependencies")
+        cycles = self._find_cycles()
+        if cycles:
+            raise ValidationError(f"Project network contains circular dependencies: {describe_cycles(cycles)}")
 
-    def _has_cycle(self) -> bool:
+    def _find_cycles(self) -> List[List[str]]:
         """
-        Detect cycles in the activity network using DFS.
+        Find every cycle in the activity network (iterative, no recursion limit).
 
         Returns:
-            True if cycle exists, False otherwise
+            Member activity IDs of each cycle (empty if the network is a DAG)
         """
-        visited = set()
-        rec_stack = set()
-
-        def dfs(node: str) -> bool:
-            visited.add(node)
-            rec_stack.add(node)
+        return find_cycles({act_id: activity.predecessors for act_id, activity in self.activities.items()})
 
-            for neighbor in self.graph[node]:
-                if neighbor not in visited:
-                    if dfs(neighbor):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
-
-            rec_stack.remove(node)
-            return False
+    def _has_cycle(self) -> bool:
+        """
+        Detect cycles in the activity network.
 
-        return any(dfs(node) for node in self.activities if node not in visited)
+        Returns:
+            True if cycle exists, False otherwise
+        """
+        return bool(self._find_cycles())
 
     def _topological_sort(self) -> List[str]:
         """
         Perform topological sort using Kahn's algorithm.
 
+        The order is computed once and reused by every pass (the network is
+        fixed after __init__).
+
         Returns:
             List of activity IDs in topological order
 
         Raises:
             CalculationError: If cycle detected (shouldn't happen after validation)
         """
+        if self._topo_order is not None:
+            return self._topo_order
+
         in_degree = {act_id: 0 for act_id in self.activities}
 
         for act_id in self.activities:
@@ -170,6 +190,7 @@ class CriticalPathAnalyzer:
         if len(result) != len(self.activities):
             raise CalculationError("Topological sort failed - cycle detected")
 
+        self._topo_order = result
         return result
 
     def _forward_pass(self) -> float:
@@ -253,10 +274,10 @@ class CriticalPathAnalyzer:
         Returns:
             List of activity IDs on the critical path in order
         """
-        critical_activities = [
+        critical_activities = {
             act_id for act_id, act in self.activities.items()
             if act.critical
-        ]
+        }
 
         # Sort critical activities in dependency order
         return [act_id for act_id in self._topological_sort()
@@ -390,14 +411,860 @@ class CriticalPathAnalyzer:
             logger.error(f"CPM analysis failed: {e}")
             raise CalculationError(f"Analysis failed: {e}")
 
+    # What-if analysis: after each change only the affected cone is repropagated.
+    # Each activity keeps ES/EF plus its tail (longest work after it finishes,
+    # independent of the project duration), so LF = duration - tail and
+    # ES + duration + tail is the longest path through the activity.
+
+    def _ensure_incremental(self) -> None:
+        """Build the what-if state (forward pass, tails, ranks, path lengths) once."""
+        if self._rank is not None:
+            return
+        order = self._topological_sort()
+        self._forward_pass()
+        self._rank = {act_id: rank for rank, act_id in enumerate(order)}
+        self._tail = {}
+        for act_id in reversed(order):
+            self._tail[act_id] = max(
+                (self._tail[succ_id] + self.activities[succ_id].duration for succ_id in self.graph[act_id]),
+                default=0.0
+            )
+        self._lengths, self._length_nodes, self._length_heap = {}, {}, []
+        for act_id, activity in self.activities.items():
+            self._set_length(act_id, activity.EF + self._tail[act_id])
+        self._project_duration, self._critical = self._longest_paths()
+
+    def _set_length(self, act_id: str, length: float) -> None:
+        """Move an activity to the bucket of its longest-path length."""
+        old = self._lengths.get(act_id)
+        if old == length:
+            return
+        if old is not None:
+            bucket = self._length_nodes[old]
+            bucket.discard(act_id)
+            if not bucket:
+                del self._length_nodes[old]
+        bucket = self._length_nodes.get(length)
+        if bucket is None:
+            bucket = self._length_nodes[length] = set()
+            heapq.heappush(self._length_heap, -length)
+        bucket.add(act_id)
+        self._lengths[act_id] = length
+
+    def _longest_paths(self) -> Tuple[float, Set[str]]:
+        """
+        Project duration and critical activities from the path-length buckets.
+
+        Only lengths within the critical tolerance of the longest are visited;
+        stale heap entries are dropped on the way.
+        """
+        heap, buckets = self._length_heap, self._length_nodes
+        longest, kept = None, []
+        while heap:
+            length = -heap[0]
+            if length not in buckets or (kept and -kept[-1] == length):
+                heapq.heappop(heap)
+                continue
+            if longest is not None and longest - length >= 1e-9:
+                break
+            longest = length if longest is None else longest
+            kept.append(heapq.heappop(heap))
+        for entry in kept:
+            heapq.heappush(heap, entry)
+        critical = set()
+        for entry in kept:
+            critical |= buckets[-entry]
+        return longest, critical
+
+    def _propagate(self, forward_seeds: List[str], backward_seeds: List[str]) -> Set[str]:
+        """
+        Repropagate ES/EF forward from forward_seeds and tails backward from
+        backward_seeds, in rank order so each activity is settled once.
+
+        Returns:
+            IDs of activities whose ES, EF or tail changed
+        """
+        changed = set()
+        rank = self._rank
+
+        queued = set(forward_seeds)
+        heap = [(rank[act_id], act_id) for act_id in queued]
+        heapq.heapify(heap)
+        while heap:
+            _, act_id = heapq.heappop(heap)
+            activity = self.activities[act_id]
+            predecessors = self.reverse_graph[act_id]
+            es = max(self.activities[pred_id].EF for pred_id in predecessors) if predecessors else 0
+            ef = es + activity.duration
+            if es == activity.ES and ef == activity.EF:
+                continue
+            ef_changed = ef != activity.EF
+            activity.ES, activity.EF = es, ef
+            changed.add(act_id)
+            if ef_changed:
+                for succ_id in self.graph[act_id]:
+                    if succ_id not in queued:
+                        queued.add(succ_id)
+                        heapq.heappush(heap, (rank[succ_id], succ_id))
+
+        queued = set(backward_seeds)
+        heap = [(-rank[act_id], act_id) for act_id in queued]
+        heapq.heapify(heap)
+        while heap:
+            _, act_id = heapq.heappop(heap)
+            tail = max(
+                (self._tail[succ_id] + self.activities[succ_id].duration for succ_id in self.graph[act_id]),
+                default=0.0
+            )
+            if tail == self._tail[act_id]:
+                continue
+            self._tail[act_id] = tail
+            changed.add(act_id)
+            for pred_id in self.reverse_graph[act_id]:
+                if pred_id not in queued:
+                    queued.add(pred_id)
+                    heapq.heappush(heap, (-rank[pred_id], pred_id))
+
+        for act_id in changed:
+            self._set_length(act_id, self.activities[act_id].EF + self._tail[act_id])
+        return changed
+
+    def _what_if_result(self, forward_seeds: List[str], backward_seeds: List[str]) -> Dict:
+        """Repropagate a change and summarize its effect on duration and critical path."""
+        previous_duration, previous_critical = self._project_duration, self._critical
+        changed = self._propagate(forward_seeds, backward_seeds)
+        self._project_duration, self._critical = self._longest_paths()
+
+        return {
+            'project_duration': round(self._project_duration, 2),
+            'previous_duration': round(previous_duration, 2),
+            'duration_change': round(self._project_duration - previous_duration, 2),
+            'unit': self.unit,
+            'critical_path': sorted(self._critical, key=self._rank.__getitem__),
+            'newly_critical': sorted(self._critical - previous_critical, key=self._rank.__getitem__),
+            'no_longer_critical': sorted(previous_critical - self._critical, key=self._rank.__getitem__),
+            'recomputed_activities': len(changed)
+        }
+
+    def _require_activity(self, act_id: str) -> Activity:
+        if act_id not in self.activities:
+            raise ValidationError(f"Unknown activity '{act_id}'")
+        return self.activities[act_id]
+
+    def update_duration(self, act_id: str, new_duration: float) -> Dict:
+        """
+        What-if: change an activity's duration and update the schedule.
+
+        ES/EF are repropagated through the activity's successors and tails
+        through its predecessors, stopping wherever values do not change.
+
+        Args:
+            act_id: Activity to change
+            new_duration: New duration in the analyzer's unit
+
+        Returns:
+            Dict with project_duration, previous_duration, duration_change,
+            critical_path, newly_critical, no_longer_critical and
+            recomputed_activities
+
+        Raises:
+            ValidationError: If the activity is unknown or the duration negative
+
+        Example:
+            >>> analyzer.update_duration("B", 8)['duration_change']
+            3.0
+        """
+        activity = self._require_activity(act_id)
+        duration = float(new_duration)
+        if duration < 0:
+            raise ValidationError(f"Activity {act_id} has negative duration")
+        self._ensure_incremental()
+        activity.duration = duration
+        return self._what_if_result([act_id], self.reverse_graph[act_id])
+
+    def add_dependency(self, predecessor_id: str, successor_id: str) -> Dict:
+        """
+        What-if: make successor_id depend on predecessor_id.
+
+        Returns:
+            Same summary as update_duration()
+
+        Raises:
+            ValidationError: If an activity is unknown, the dependency exists,
+                or it would create a circular dependency
+        """
+        self._require_activity(predecessor_id)
+        successor = self._require_activity(successor_id)
+        self._ensure_incremental()
+        if predecessor_id in self.reverse_graph[successor_id]:
+            raise ValidationError(f"Activity '{successor_id}' already depends on '{predecessor_id}'")
+        self._reorder_for_dependency(predecessor_id, successor_id)
+
+        self.graph[predecessor_id].append(successor_id)
+        self.reverse_graph[successor_id].append(predecessor_id)
+        successor.predecessors = successor.predecessors + [predecessor_id]
+        self._topo_order = None
+        return self._what_if_result([successor_id], [predecessor_id])
+
+    def remove_dependency(self, predecessor_id: str, successor_id: str) -> Dict:
+        """
+        What-if: drop the dependency of successor_id on predecessor_id.
+
+        Returns:
+            Same summary as update_duration()
+
+        Raises:
+            ValidationError: If the dependency does not exist
+        """
+        successor = self._require_activity(successor_id)
+        self._ensure_incremental()
+        if predecessor_id not in self.reverse_graph[successor_id]:
+            raise ValidationError(f"Activity '{successor_id}' does not depend on '{predecessor_id}'")
+
+        self.graph[predecessor_id].remove(successor_id)
+        self.reverse_graph[successor_id].remove(predecessor_id)
+        predecessors = list(successor.predecessors)
+        predecessors.remove(predecessor_id)
+        successor.predecessors = predecessors
+        self._topo_order = None
+        return self._what_if_result([successor_id], [predecessor_id])
+
+    def _reorder_for_dependency(self, predecessor_id: str, successor_id: str) -> None:
+        """
+        Keep ranks topological for a new edge predecessor -> successor
+        (Pearce-Kelly): only activities ranked between the two ends move.
+
+        Raises:
+            ValidationError: If successor already leads to predecessor
+        """
+        rank = self._rank
+        lower, upper = rank[successor_id], rank[predecessor_id]
+        cycle_error = ValidationError(
+            f"Dependency '{predecessor_id}' -> '{successor_id}' would create a circular dependency"
+        )
+        if predecessor_id == successor_id:
+            raise cycle_error
+        if upper < lower:
+            return
+
+        forward, stack = {successor_id}, [successor_id]
+        while stack:
+            for succ_id in self.graph[stack.pop()]:
+                if succ_id == predecessor_id:
+                    raise cycle_error
+                if succ_id not in forward and rank[succ_id] < upper:
+                    forward.add(succ_id)
+                    stack.append(succ_id)
+        backward, stack = {predecessor_id}, [predecessor_id]
+        while stack:
+            for pred_id in self.reverse_graph[stack.pop()]:
+                if pred_id not in backward and rank[pred_id] > lower:
+                    backward.add(pred_id)
+                    stack.append(pred_id)
+
+        slots = sorted(rank[act_id] for act_id in forward | backward)
+        moved = sorted(backward, key=rank.__getitem__) + sorted(forward, key=rank.__getitem__)
+        for slot, act_id in zip(slots, moved):
+            rank[act_id] = slot
+
+    def activity_times(self, act_id: str) -> Dict:
+        """
+        Current ES/EF/LS/LF/slack of one activity, kept up to date by the
+        what-if methods (analyze() refreshes the fields of every Activity).
 
-def analyze_critical_path(activities: List[Dict], unit: str = "days") -> Dict:
+        Raises:
+            ValidationError: If the activity is unknown
+        """
+        activity = self._require_activity(act_id)
+        self._ensure_incremental()
+        lf = self._project_duration - self._tail[act_id]
+        slack = lf - activity.EF
+        return {
+            'id': act_id,
+            'duration': activity.duration,
+            'ES': round(activity.ES, 2),
+            'EF': round(activity.EF, 2),
+            'LS': round(lf - activity.duration, 2),
+            'LF': round(lf, 2),
+            'slack': round(slack, 2),
+            'critical': act_id in self._critical
+        }
+
+    # Path enumeration reuses the what-if state: ES + duration + tail is the
+    # longest path through an activity, so enumeration reflects any what-if
+    # changes made so far.
+
+    def _path_search(self, max_slack: Optional[float] = None):
+        """Longest-first path generator over the current schedule (see _enumerate_paths)."""
+        if not self.activities:
+            raise CalculationError("No activities to analyze")
+        self._ensure_incremental()
+        activities, tail = self.activities, self._tail
+        min_length = None if max_slack is None else self._project_duration - max_slack
+        starts = [act_id for act_id in activities if not self.reverse_graph[act_id]]
+        return _enumerate_paths(
+            starts,
+            lambda act_id: self.graph.get(act_id, ()),
+            lambda act_id: activities[act_id].duration,
+            lambda act_id: activities[act_id].duration + tail[act_id],
+            min_length
+        )
+
+    def k_longest_paths(self, k: int = 5) -> List[Dict]:
+        """
+        The k longest start-to-finish paths through the network, longest first.
+
+        Parallel critical chains come out as separate paths (the flat
+        critical_path list merges them), followed by the near-critical ones.
+
+        Args:
+            k: Number of paths to return
+
+        Returns:
+            List of dicts with activities (IDs in order), duration, slack
+            (project duration minus path duration) and critical
+
+        Raises:
+            ValidationError: If k is less than 1
+            CalculationError: If the network has no activities
+
+        Example:
+            >>> [p['activities'] for p in analyzer.k_longest_paths(2)]
+            [['A', 'C', 'D'], ['A', 'B', 'D']]
+        """
+        if k < 1:
+            raise ValidationError("k must be at least 1")
+        search = self._path_search()
+        project_duration = self._project_duration
+        return [_path_summary(path, length, project_duration) for length, path in itertools.islice(search, k)]
+
+    def near_critical_paths(self, tolerance: float, max_paths: int = NEAR_CRITICAL_MAX_PATHS) -> Dict:
+        """
+        All paths within `tolerance` of the project duration, longest first.
+
+        Candidates whose best completion already falls below the threshold
+        are never queued, so the search only touches near-critical paths.
+        With tolerance 0 the result lists every critical chain separately.
+
+        Args:
+            tolerance: Maximum path slack, in the analyzer's unit
+            max_paths: Paths listed before the result is truncated
+
+        Returns:
+            Dict with project_duration, tolerance, unit, paths (as in
+            k_longest_paths), truncated, and near_critical_activities (every
+            activity with total slack <= tolerance, least slack first)
+
+        Raises:
+            ValidationError: If tolerance is negative or max_paths less than 1
+            CalculationError: If the network has no activities
+        """
+        if tolerance < 0:
+            raise ValidationError("Tolerance cannot be negative")
+        if max_paths < 1:
+            raise ValidationError("max_paths must be at least 1")
+        search = self._path_search(tolerance)
+        project_duration, lengths, rank = self._project_duration, self._lengths, self._rank
+        paths = list(itertools.islice(search, max_paths + 1))
+
+        slack = {act_id: project_duration - length for act_id, length in lengths.items()}
+        near_critical = sorted(
+            (act_id for act_id, value in slack.items() if value <= tolerance + 1e-9),
+            key=lambda act_id: (round(slack[act_id], 9), rank[act_id])
+        )
+        return {
+            'project_duration': round(project_duration, 2),
+            'tolerance': tolerance,
+            'unit': self.unit,
+            'paths': [_path_summary(path, length, project_duration) for length, path in paths[:max_paths]],
+            'truncated': len(paths) > max_paths,
+            'near_critical_activities': [
+                {
+                    'id': act_id,
+                    'name': self.activities[act_id].name,
+                    'slack': round(slack[act_id], 2),
+                    'critical': act_id in self._critical
+                }
+                for act_id in near_critical
+            ]
+        }
+
+
+def _enumerate_paths(starts, successors, duration, remaining, min_length=None):
+    """
+    Yield (length, path) for every start-to-finish path, longest first.
+
+    remaining(node) is the longest path from the node's start to the project
+    finish (its duration plus its successors' best), so the bound of a
+    partial path is exactly its best completion. Each heap entry means "the
+    i-th best continuation of this prefix": popping one walks greedily to a
+    finish, queueing only the next-best sibling at each step. Yielding k paths
+    of up to L activities therefore costs O(k L log(k L)) however many paths
+    the network has, and bounds below min_length are never queued.
+
+    Args:
+        starts: Activities without predecessors
+        successors: node -> successor nodes
+        duration: node -> duration
+        remaining: node -> longest path length from the node's start
+        min_length: Stop once no remaining path is at least this long
+    """
+    ranked_cache = {}
+
+    def ranked(node):
+        choices = ranked_cache.get(node)
+        if choices is None:
+            choices = ranked_cache[node] = sorted(successors(node), key=remaining, reverse=True)
+        return choices
+
+    heap = []
+    tie_break = itertools.count()  # Equal bounds pop in insertion order
+
+    def push(length, prefix, choices, i):
+        bound = length + remaining(choices[i])
+        if min_length is None or bound >= min_length - 1e-9:
+            heapq.heappush(heap, (-bound, next(tie_break), length, prefix, choices, i))
+
+    roots = sorted(starts, key=remaining, reverse=True)
+    if roots:
+        push(0.0, None, roots, 0)
+    while heap:
+        _, _, length, prefix, choices, i = heapq.heappop(heap)
+        while True:
+            if i + 1 < len(choices):
+                push(length, prefix, choices, i + 1)
+            node = choices[i]
+            length += duration(node)
+            prefix = (node, prefix)  # Linked list: sibling paths share their prefix
+            choices, i = ranked(node), 0
+            if not choices:
+                break
+        path = []
+        while prefix is not None:
+            node, prefix = prefix
+            path.append(node)
+        path.reverse()
+        yield length, path
+
+
+def _path_summary(path: List[str], length: float, project_duration: float) -> Dict:
+    slack = project_duration - length
+    return {
+        'activities': path,
+        'duration': round(length, 2),
+        'slack': round(slack, 2),
+        'critical': abs(slack) < 1e-9
+    }
+
+
+def _int_array(values):
+    """Integer array: NumPy when available, else array('q')."""
+    return np.asarray(values, dtype=np.int64) if NUMPY_AVAILABLE else array('q', values)
+
+
+def _float_array(values):
+    """Float array: NumPy when available, else array('d')."""
+    return np.asarray(values, dtype=np.float64) if NUMPY_AVAILABLE else array('d', values)
+
+
+def _as_list(values) -> list:
+    """Plain Python list of an array's values (fast element access)."""
+    return values.tolist()
+
+
+class CPMEngine:
+    """
+    Array-backed Critical Path Method engine for very large activity networks.
+
+    Activities are numbered 0..n-1 in input order. Predecessor and successor
+    lists are stored as CSR arrays (ptr, idx): the neighbours of activity i are
+    idx[ptr[i]:ptr[i + 1]]. The topological order is computed once at
+    construction, and ES/EF/LS/LF/slack are float arrays indexed like the
+    activities (NumPy arrays when NumPy is installed, else array('d')).
+
+    With NumPy, each pass runs one max/min reduction per topological level
+    (all predecessors of a level lie in earlier levels), so a 200k-activity
+    network costs a few hundred vectorized steps instead of 200k dict lookups.
+    analyze() returns the same result as CriticalPathAnalyzer.analyze().
+
+    Example:
+        >>> engine = CPMEngine(activities, unit="days")
+        >>> result = engine.analyze()
+        >>> engine.EF[engine.index['C']]
+        10.0
+    """
+
+    def __init__(self, activities_data: List[Dict], unit: str = "days"):
+        """
+        Initialize the engine and build its arrays.
+
+        Args:
+            activities_data: List of activity dictionaries (as for CriticalPathAnalyzer)
+            unit: Time unit (days, weeks, sprints)
+
+        Raises:
+            ValidationError: If activities data is invalid
+        """
+        self.unit = unit
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.predecessors: List[List[str]] = []
+        self.index: Dict[str, int] = {}
+        durations: List[float] = []
+
+        for act_data in activities_data:
+            try:
+                act_id, name = act_data['id'], act_data['name']
+                duration = float(act_data['duration'])
+            except KeyError as e:
+                raise ValidationError(f"Missing required field {e} in activity {act_data.get('id', '<unknown>')}")
+            if not act_id:
+                raise ValidationError("Activity ID cannot be empty")
+            if duration < 0:
+                raise ValidationError(f"Activity {act_id} has negative duration")
+            predecessors = act_data.get('predecessors', [])
+
+            i = self.index.get(act_id)
+            if i is None:
+                self.index[act_id] = len(self.ids)
+                self.ids.append(act_id)
+                self.names.append(name)
+                self.predecessors.append(predecessors)
+                durations.append(duration)
+            else:
+                # A repeated ID replaces the earlier activity, as in CriticalPathAnalyzer
+                self.names[i], self.predecessors[i], durations[i] = name, predecessors, duration
+
+        n = len(self.ids)
+        pred_ptr, pred_idx = [0], []
+        for act_id, predecessors in zip(self.ids, self.predecessors):
+            for pred_id in predecessors:
+                j = self.index.get(pred_id)
+                if j is None:
+                    raise ValidationError(f"Unknown predecessor '{pred_id}' for activity '{act_id}'")
+                pred_idx.append(j)
+            pred_ptr.append(len(pred_idx))
+
+        # Successor CSR by counting sort, keeping edges in input order per activity
+        succ_ptr = [0] * (n + 1)
+        for j in pred_idx:
+            succ_ptr[j + 1] += 1
+        for i in range(n):
+            succ_ptr[i + 1] += succ_ptr[i]
+        fill = succ_ptr[:-1]
+        succ_idx = [0] * len(pred_idx)
+        for i in range(n):
+            for j in pred_idx[pred_ptr[i]:pred_ptr[i + 1]]:
+                succ_idx[fill[j]] = i
+                fill[j] += 1
+
+        order, levels = self._topological_levels(n, pred_ptr, succ_ptr, succ_idx)
+        if order is None:
+            cycles = find_cycles(dict(zip(self.ids, self.predecessors)))
+            raise ValidationError(f"Project network contains circular dependencies: {describe_cycles(cycles)}")
+
+        self.n = n
+        self.duration = _float_array(durations)
+        self.pred_ptr, self.pred_idx = _int_array(pred_ptr), _int_array(pred_idx)
+        self.succ_ptr, self.succ_idx = _int_array(succ_ptr), _int_array(succ_idx)
+        self.order = _int_array(order)
+        self.level = _int_array(levels)
+        self.n_levels = max(levels) + 1 if levels else 0
+        self._level_plan = None
+        self.ES = self.EF = self.LS = self.LF = self.slack = None
+        self.critical = None
+
+    @staticmethod
+    def _topological_levels(n: int, pred_ptr: List[int], succ_ptr: List[int],
+                            succ_idx: List[int]) -> Tuple[Optional[List[int]], List[int]]:
+        """
+        Kahn's algorithm over the CSR arrays, visiting activities in the same
+        order as CriticalPathAnalyzer._topological_sort().
+
+        Returns:
+            (order, levels): level[i] is the longest edge count from a start
+            activity to i; order is None if the network has a cycle
+        """
+        in_degree = [pred_ptr[i + 1] - pred_ptr[i] for i in range(n)]
+        levels = [0] * n
+        queue = deque(i for i in range(n) if in_degree[i] == 0)
+        order = []
+
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            next_level = levels[node] + 1
+            for succ in succ_idx[succ_ptr[node]:succ_ptr[node + 1]]:
+                if levels[succ] < next_level:
+                    levels[succ] = next_level
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    queue.append(succ)
+
+        return (order if len(order) == n else None), levels
+
+    def _vectorized(self) -> bool:
+        return NUMPY_AVAILABLE and self.n >= LEVEL_MIN_WIDTH * self.n_levels
+
+    def _gather(self, ptr, idx, nodes):
+        """Concatenated neighbour lists of `nodes` with their start offsets (CSR of the subset)."""
+        degrees = ptr[nodes + 1] - ptr[nodes]
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=offsets[1:])
+        positions = np.repeat(ptr[nodes] - offsets[:-1], degrees) + np.arange(offsets[-1])
+        return idx[positions], offsets
+
+    def level_plan(self) -> Tuple:
+        """
+        Activities grouped by topological level, for vectorized passes (NumPy only).
+
+        Returns:
+            (nodes, bounds, preds, pred_offsets, succs, succ_offsets): level L
+            holds nodes[bounds[L]:bounds[L + 1]]; the predecessors of nodes[k]
+            are preds[pred_offsets[k]:pred_offsets[k + 1]], likewise successors
+        """
+        if self._level_plan is None:
+            nodes = self.order[np.argsort(self.level[self.order], kind='stable')]
+            bounds = np.zeros(self.n_levels + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.level, minlength=self.n_levels), out=bounds[1:])
+            preds, pred_offsets = self._gather(self.pred_ptr, self.pred_idx, nodes)
+            succs, succ_offsets = self._gather(self.succ_ptr, self.succ_idx, nodes)
+            self._level_plan = (nodes, bounds.tolist(), preds, pred_offsets, succs, succ_offsets)
+        return self._level_plan
+
+    def _passes_vectorized(self) -> Tuple:
+        nodes, bounds, preds, pred_offsets, succs, succ_offsets = self.level_plan()
+        duration = self.duration
+        ES = np.zeros(self.n)
+        EF = duration.copy()  # Level 0 activities start at 0
+
+        for level in range(1, self.n_levels):
+            start, end = bounds[level], bounds[level + 1]
+            members = nodes[start:end]
+            first, last = pred_offsets[start], pred_offsets[end]
+            ES[members] = np.maximum.reduceat(EF[preds[first:last]], pred_offsets[start:end] - first)
+            EF[members] = ES[members] + duration[members]
+
+        project_duration = float(EF.max())
+        LF = np.full(self.n, project_duration)
+        LS = np.empty(self.n)
+        for level in range(self.n_levels - 1, -1, -1):
+            start, end = bounds[level], bounds[level + 1]
+            members = nodes[start:end]
+            first, last = succ_offsets[start], succ_offsets[end]
+            if last > first:
+                has_successors = succ_offsets[start + 1:end + 1] > succ_offsets[start:end]
+                LF[members[has_successors]] = np.minimum.reduceat(
+                    LS[succs[first:last]], succ_offsets[start:end][has_successors] - first)
+            LS[members] = LF[members] - duration[members]
+
+        return project_duration, ES, EF, LS, LF
+
+    def _passes_scalar(self) -> Tuple:
+        n = self.n
+        duration = _as_list(self.duration)
+        pred_ptr, pred_idx = _as_list(self.pred_ptr), _as_list(self.pred_idx)
+        succ_ptr, succ_idx = _as_list(self.succ_ptr), _as_list(self.succ_idx)
+        order = _as_list(self.order)
+        ES, EF, LS, LF = [0.0] * n, [0.0] * n, [0.0] * n, [0.0] * n
+
+        for node in order:
+            start, end = pred_ptr[node], pred_ptr[node + 1]
+            es = max([EF[pred] for pred in pred_idx[start:end]]) if end > start else 0.0
+            ES[node] = es
+            EF[node] = es + duration[node]
+
+        project_duration = max(EF)
+        for node in reversed(order):
+            start, end = succ_ptr[node], succ_ptr[node + 1]
+            lf = min([LS[succ] for succ in succ_idx[start:end]]) if end > start else project_duration
+            LF[node] = lf
+            LS[node] = lf - duration[node]
+
+        return project_duration, _float_array(ES), _float_array(EF), _float_array(LS), _float_array(LF)
+
+    def compute(self) -> float:
+        """
+        Run the forward and backward passes, filling ES/EF/LS/LF/slack/critical.
+
+        Returns:
+            Project duration (max EF of all activities)
+
+        Raises:
+            CalculationError: If the network has no activities
+        """
+        if self.n == 0:
+            raise CalculationError("No activities to analyze")
+        passes = self._passes_vectorized if self._vectorized() else self._passes_scalar
+        project_duration, self.ES, self.EF, self.LS, self.LF = passes()
+        if NUMPY_AVAILABLE:
+            self.slack = self.LF - self.EF
+            self.critical = np.abs(self.slack) < 1e-9  # Handle floating point
+        else:
+            self.slack = array('d', (lf - ef for lf, ef in zip(self.LF, self.EF)))
+            self.critical = [abs(slack) < 1e-9 for slack in self.slack]
+        return project_duration
+
+    def _path_search(self, max_slack: Optional[float] = None) -> Tuple:
+        """Longest-first path generator (see _enumerate_paths) and the project duration."""
+        if self.LS is None:
+            self.compute()
+        LS, EF, duration = _as_list(self.LS), _as_list(self.EF), _as_list(self.duration)
+        pred_ptr, succ_ptr, succ_idx = _as_list(self.pred_ptr), _as_list(self.succ_ptr), _as_list(self.succ_idx)
+        project_duration = max(EF)
+        min_length = None if max_slack is None else project_duration - max_slack
+        search = _enumerate_paths(
+            [node for node in range(self.n) if pred_ptr[node] == pred_ptr[node + 1]],
+            lambda node: succ_idx[succ_ptr[node]:succ_ptr[node + 1]],
+            duration.__getitem__,
+            lambda node: project_duration - LS[node],
+            min_length
+        )
+        return search, project_duration
+
+    def k_longest_paths(self, k: int = 5) -> List[Dict]:
+        """
+        The k longest start-to-finish paths, as CriticalPathAnalyzer.k_longest_paths().
+
+        Runs compute() first if it has not been run.
+        """
+        if k < 1:
+            raise ValidationError("k must be at least 1")
+        search, project_duration = self._path_search()
+        ids = self.ids
+        return [_path_summary([ids[node] for node in path], length, project_duration)
+                for length, path in itertools.islice(search, k)]
+
+    def near_critical_paths(self, tolerance: float, max_paths: int = NEAR_CRITICAL_MAX_PATHS) -> Dict:
+        """
+        Paths within `tolerance` of the project duration, as
+        CriticalPathAnalyzer.near_critical_paths().
+
+        Runs compute() first if it has not been run.
+        """
+        if tolerance < 0:
+            raise ValidationError("Tolerance cannot be negative")
+        if max_paths < 1:
+            raise ValidationError("max_paths must be at least 1")
+        search, project_duration = self._path_search(tolerance)
+        ids = self.ids
+        paths = list(itertools.islice(search, max_paths + 1))
+
+        slack, critical = _as_list(self.slack), list(self.critical)
+        rank = {node: position for position, node in enumerate(_as_list(self.order))}
+        near_critical = sorted(
+            (node for node in range(self.n) if slack[node] <= tolerance + 1e-9),
+            key=lambda node: (round(slack[node], 9), rank[node])
+        )
+        return {
+            'project_duration': round(project_duration, 2),
+            'tolerance': tolerance,
+            'unit': self.unit,
+            'paths': [_path_summary([ids[node] for node in path], length, project_duration)
+                      for length, path in paths[:max_paths]],
+            'truncated': len(paths) > max_paths,
+            'near_critical_activities': [
+                {
+                    'id': ids[node],
+                    'name': self.names[node],
+                    'slack': round(slack[node], 2),
+                    'critical': bool(critical[node])
+                }
+                for node in near_critical
+            ]
+        }
+
+    def analyze(self) -> Dict:
+        """
+        Perform complete CPM analysis.
+
+        Returns:
+            Dict with the same keys and values as CriticalPathAnalyzer.analyze()
+        """
+        try:
+            project_duration = self.compute()
+            ES, EF, LS, LF, slack = (_as_list(values) for values in (self.ES, self.EF, self.LS, self.LF, self.slack))
+            critical = list(self.critical)
+            duration = _as_list(self.duration)
+
+            critical_path = [self.ids[node] for node in _as_list(self.order) if critical[node]]
+
+            bottlenecks = []
+            for node in range(self.n):
+                if critical[node] and len(self.predecessors[node]) > 1:
+                    critical_preds = [pred_id for pred_id in self.predecessors[node] if critical[self.index[pred_id]]]
+                    if len(critical_preds) > 1:
+                        bottlenecks.append({
+                            'id': self.ids[node],
+                            'name': self.names[node],
+                            'critical_predecessors': critical_preds,
+                            'risk': 'high'
+                        })
+
+            # Top 10 by rounded slack; ties keep input order like a stable reverse sort
+            candidates = [node for node in range(self.n) if not critical[node] and slack[node] > 0]
+            opportunities = [
+                {
+                    'activity': self.ids[node],
+                    'name': self.names[node],
+                    'slack': round(slack[node], 2),
+                    'slack_unit': self.unit,
+                    'recommendation': f"Can delay up to {slack[node]:.1f} {self.unit} without impacting project"
+                }
+                for node in heapq.nlargest(10, candidates, key=lambda node: round(slack[node], 2))
+            ]
+
+            non_critical = self.n - len(critical_path)
+            result = {
+                'project_duration': round(project_duration, 2),
+                'unit': self.unit,
+                'activities': [
+                    {
+                        'id': self.ids[node],
+                        'name': self.names[node],
+                        'duration': duration[node],
+                        'predecessors': self.predecessors[node],
+                        'ES': round(ES[node], 2),
+                        'EF': round(EF[node], 2),
+                        'LS': round(LS[node], 2),
+                        'LF': round(LF[node], 2),
+                        'slack': round(slack[node], 2),
+                        'critical': bool(critical[node])
+                    }
+                    for node in range(self.n)
+                ],
+                'critical_path': critical_path,
+                'critical_path_duration': round(project_duration, 2),
+                'bottlenecks': bottlenecks,
+                'optimization_opportunities': opportunities,
+                'statistics': {
+                    'total_activities': self.n,
+                    'critical_activities': len(critical_path),
+                    'non_critical_activities': non_critical,
+                    'average_slack': round(
+                        sum(slack[node] for node in range(self.n) if not critical[node]) / max(1, non_critical),
+                        2
+                    )
+                }
+            }
+
+            logger.info(f"CPM analysis complete: {len(critical_path)}/{self.n} activities critical")
+            return result
+
+        except Exception as e:
+            logger.error(f"CPM analysis failed: {e}")
+            raise CalculationError(f"Analysis failed: {e}")
+
+
+def analyze_critical_path(activities: List[Dict], unit: str = "days", engine: str = "analyzer") -> Dict:
     """
     Convenience function to perform CPM analysis.
 
     Args:
         activities: List of activity dictionaries with id, name, duration, predecessors
         unit: Time unit for durations (days, weeks, sprints)
+        engine: "analyzer" (CriticalPathAnalyzer) or "array" (CPMEngine, for
+            very large networks); both return the same result
 
     Returns:
         Dict with complete CPM analysis results
@@ -416,7 +1283,9 @@ def analyze_critical_path(activities: List[Dict], unit: str = "days") -> Dict:
         >>> result = analyze_critical_path(activities, unit="sprints")
         >>> print(json.dumps(result, indent=2))
     """
-    analyzer = CriticalPathAnalyzer(activities, unit)
+    if engine not in ENGINES:
+        raise ValidationError(f"Unknown engine '{engine}'. Available: {', '.join(ENGINES)}")
+    analyzer = CPMEngine(activities, unit) if engine == "array" else CriticalPathAnalyzer(activities, unit)
     return analyzer.analyze()
 
 
@@ -506,6 +1375,11 @@ if __name__ == "__main__":
         print(f"🔴 Critical Path: {' → '.join(result2['critical_path'])}")
         print(f"📊 Avg Slack (non-critical): {result2['statistics']['average_slack']} {result2['unit']}")
 
+        print("\n🛤️  Near-Critical Paths (within 1 week):")
+        near = CriticalPathAnalyzer(complex_activities, unit="weeks").near_critical_paths(1)
+        for path in near['paths']:
+            print(f"   - {' → '.join(path['activities'])}: {path['duration']} weeks (slack {path['slack']})")
+
         print("\n💾 Full JSON Output:")
         print(json.dumps(result2, indent=2))
 
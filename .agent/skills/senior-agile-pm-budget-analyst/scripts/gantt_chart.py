@@ -7,21 +7,38 @@ Creates Gantt chart data structures for Agile/Scrum project scheduling:
 - Calculates dependencies and parallel tracks
 - Produces ASCII and structured data outputs
 - Integrates with Critical Path Analysis
+- Detects overallocated resources and levels them with a serial or
+  parallel schedule-generation scheme
+- Indexes task spans for point, range and daily concurrency queries
 
 Author: Senior Agile PM Budget Analyst Skill
 License: MIT
 """
 
+from bisect import bisect_right, insort
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from enum import Enum
+import heapq
 import logging
 
+from business_calendar import BusinessCalendar, ValidationError as CalendarError
+from graph_validation import find_cycles
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Resource leveling: schedule-generation schemes and task priority rules
+SGS_SCHEMES = ("serial", "parallel")
+PRIORITY_RULES = ("min_slack", "earliest_start", "longest_duration", "most_successors")
+
+# Task interval index: tasks added since the last tree build are scanned
+# linearly until they outnumber this share of the tree (or INDEX_REBUILD_MIN)
+INDEX_REBUILD_FRACTION = 0.25
+INDEX_REBUILD_MIN = 64
+
 
 class ValidationError(Exception):
     """Raised when validation fails"""
@@ -59,6 +76,15 @@ class Task:
     sprint_number: Optional[int] = None
     story_points: Optional[int] = None
 
+    # Bumped whenever an existing task's start_date or duration_days is
+    # reassigned; interval indexes built under an older value are stale
+    span_version = 0
+
+    def __setattr__(self, name, value):
+        if name in ("start_date", "duration_days") and name in self.__dict__:
+            Task.span_version += 1
+        object.__setattr__(self, name, value)
+
     @property
     def end_date(self) -> datetime:
         """Calculate end date based on start and duration"""
@@ -89,6 +115,7 @@ class GanttConfig:
     sprint_duration_days: int = 14  # 2 weeks
     work_days_per_week: int = 5
     show_weekends: bool = False
+    holidays: List[date] = field(default_factory=list)  # Non-working dates
     milestone_markers: bool = True
     show_progress: bool = True
     ascii_chart_width: int = 80
@@ -105,6 +132,182 @@ class GanttConfig:
             raise ValidationError("ascii_chart_width must be at least 40")
 
 
+@dataclass
+class ResourceCalendar:
+    """
+    Daily capacity of a resource: how many tasks it can work on at once.
+
+    Exceptions override the capacity on specific dates (0 for vacations and
+    holidays, 2 for a day with extra help, ...).
+    """
+    capacity: int = 1
+    exceptions: Dict[date, int] = field(default_factory=dict)
+
+    def validate(self) -> None:
+        """Validate calendar"""
+        if self.capacity < 1:
+            raise ValidationError("capacity must be at least 1")
+
+        if any(value < 0 for value in self.exceptions.values()):
+            raise ValidationError("exception capacities cannot be negative")
+
+    def capacity_on(self, day: date) -> int:
+        """Capacity on a given date"""
+        if isinstance(day, datetime):
+            day = day.date()
+        return self.exceptions.get(day, self.capacity)
+
+
+class TaskIntervalIndex:
+    """
+    Interval index over task spans [start_date, end_date)
+
+    A task occupies its start moment up to, but not including, its end_date
+    (start_date + duration_days), as in resource overallocation and leveling:
+    a task ending on a day is not active on it, so back-to-back tasks never
+    overlap.
+
+    - Sorted start and end lists count the tasks active at a time with two
+      binary searches and drive single-sweep concurrency profiles
+    - A centered interval tree lists the tasks active at a time, or
+      overlapping a range, in O(log n + k)
+
+    Adding a task inserts its endpoints into the sorted lists and parks the
+    span in a pending list that queries scan; the tree is rebuilt from
+    scratch once pending spans outgrow INDEX_REBUILD_FRACTION of it, so a
+    batch of additions costs one O(n log n) rebuild. Results are returned in
+    the order the tasks were added.
+    """
+
+    def __init__(self):
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        self._indexed: List[Tuple] = []  # (start, end, sequence, task ID) in the tree
+        self._pending: List[Tuple] = []
+        self._tree = None
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def add(self, task_id: str, start: datetime, end: datetime) -> None:
+        """Index one task span"""
+        insort(self._starts, start)
+        insort(self._ends, end)
+        self._pending.append((start, end, self._sequence, task_id))
+        self._sequence += 1
+
+    def extend(self, spans: List[Tuple[str, datetime, datetime]]) -> None:
+        """Index many (task ID, start, end) spans, sorting the endpoint lists once"""
+        for task_id, start, end in spans:
+            self._starts.append(start)
+            self._ends.append(end)
+            self._pending.append((start, end, self._sequence, task_id))
+            self._sequence += 1
+        self._starts.sort()
+        self._ends.sort()
+
+    def clear(self) -> None:
+        """Drop every span"""
+        self.__init__()
+
+    def count_at(self, moment: datetime) -> int:
+        """Number of tasks with start <= moment < end"""
+        return bisect_right(self._starts, moment) - bisect_right(self._ends, moment)
+
+    def _current_tree(self):
+        if self._pending and len(self._pending) > max(INDEX_REBUILD_MIN, INDEX_REBUILD_FRACTION * len(self._indexed)):
+            self._indexed = sorted(self._indexed + self._pending)
+            self._pending = []
+            self._tree = self._build(self._indexed)
+        return self._tree
+
+    @classmethod
+    def _build(cls, spans: List[Tuple]):
+        """
+        Centered interval tree node [center, by_start, by_end, left, right]
+        over spans sorted by start; the center is the median span's start and
+        the node keeps the spans with start <= center < end.
+        """
+        if not spans:
+            return None
+        center = spans[len(spans) // 2][0]
+        here, left, right = [], [], []
+        for span in spans:
+            if span[1] <= center:
+                left.append(span)
+            elif span[0] > center:
+                right.append(span)
+            else:
+                here.append(span)
+        by_end = sorted(here, key=lambda span: span[1], reverse=True)
+        return [center, here, by_end, cls._build(left), cls._build(right)]
+
+    def at(self, moment: datetime) -> List[str]:
+        """IDs of the tasks with start <= moment < end"""
+        node = self._current_tree()  # May fold the pending spans into the tree
+        found = [span for span in self._pending if span[0] <= moment < span[1]]
+        while node is not None:
+            center, by_start, by_end, left, right = node
+            if moment < center:
+                for span in by_start:
+                    if span[0] > moment:
+                        break
+                    found.append(span)
+                node = left
+            elif moment > center:
+                for span in by_end:
+                    if span[1] <= moment:
+                        break
+                    found.append(span)
+                node = right
+            else:
+                found.extend(by_start)
+                break
+        found.sort(key=lambda span: span[2])
+        return [span[3] for span in found]
+
+    def overlapping(self, start: datetime, end: datetime) -> List[str]:
+        """IDs of the tasks whose span shares at least one moment with [start, end] (start <= end)"""
+        stack = [self._current_tree()]
+        found = [span for span in self._pending if span[0] <= end and span[1] > start]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center, by_start, by_end, left, right = node
+            if end < center:
+                for span in by_start:
+                    if span[0] > end:
+                        break
+                    found.append(span)
+                stack.append(left)
+            elif start > center:
+                for span in by_end:
+                    if span[1] <= start:
+                        break
+                    found.append(span)
+                stack.append(right)
+            else:
+                found.extend(by_start)
+                stack.extend((left, right))
+        found.sort(key=lambda span: span[2])
+        return [span[3] for span in found]
+
+    def counts(self, moments: List[datetime]) -> List[int]:
+        """count_at() for ascending moments, in one sweep over the sorted endpoints"""
+        starts, ends = self._starts, self._ends
+        started = finished = 0
+        result = []
+        for moment in moments:
+            while started < len(starts) and starts[started] <= moment:
+                started += 1
+            while finished < len(ends) and ends[finished] <= moment:
+                finished += 1
+            result.append(started - finished)
+        return result
+
+
 class GanttChartGenerator:
     """
     Gantt Chart Generator
@@ -150,6 +353,15 @@ class GanttChartGenerator:
         self.config = config
         self.tasks: Dict[str, Task] = {}
         self.milestones: List[Task] = []
+        self.resource_calendars: Dict[str, ResourceCalendar] = {}
+        try:
+            self.calendar = BusinessCalendar.from_work_days(
+                config.work_days_per_week, config.show_weekends, config.holidays
+            )
+        except CalendarError as e:
+            raise ValidationError(str(e)) from e
+        self.interval_index = TaskIntervalIndex()
+        self._index_version = Task.span_version
 
         logger.info("GanttChartGenerator initialized")
 
@@ -163,6 +375,32 @@ class GanttChartGenerator:
         Raises:
             ValidationError: If task is invalid or duplicate ID
         """
+        self._register_task(task)
+        self.interval_index.add(task.id, task.start_date, task.end_date)
+
+    def add_tasks_batch(self, tasks: List[Task]) -> None:
+        """
+        Add multiple tasks at once (the interval index is updated once for the batch)
+
+        Tasks are added in order, like repeated add_task() calls: if one is
+        invalid, the tasks before it stay added (and indexed) and its
+        ValidationError is raised; it and the tasks after it are not added.
+
+        Args:
+            tasks: Task instances
+
+        Raises:
+            ValidationError: If a task is invalid or a duplicate ID
+        """
+        added = []
+        try:
+            for task in tasks:
+                self._register_task(task)
+                added.append((task.id, task.start_date, task.end_date))
+        finally:
+            self.interval_index.extend(added)
+
+    def _register_task(self, task: Task) -> None:
         task.validate()
 
         if task.id in self.tasks:
@@ -175,10 +413,21 @@ class GanttChartGenerator:
 
         logger.info(f"Added task: {task.id} - {task.name}")
 
-    def add_tasks_batch(self, tasks: List[Task]) -> None:
-        """Add multiple tasks at once"""
-        for task in tasks:
-            self.add_task(task)
+    def rebuild_interval_index(self) -> None:
+        """Re-index every task"""
+        self.interval_index.clear()
+        self.interval_index.extend([(task.id, task.start_date, task.end_date) for task in self.tasks.values()])
+        self._index_version = Task.span_version
+
+    def _current_index(self) -> TaskIntervalIndex:
+        """
+        The interval index, rebuilt first if a task's start_date or
+        duration_days was reassigned since it was built (any Task counts, so
+        a change elsewhere costs one spare rebuild)
+        """
+        if self._index_version != Task.span_version:
+            self.rebuild_interval_index()
+        return self.interval_index
 
     def validate_dependencies(self) -> List[str]:
         """
@@ -194,27 +443,10 @@ class GanttChartGenerator:
                 if dep_id not in self.tasks:
                     errors.append(f"Task {task_id} depends on non-existent task {dep_id}")
 
-        # Check for circular dependencies
-        def has_cycle(task_id: str, visited: set, rec_stack: set) -> bool:
-            visited.add(task_id)
-            rec_stack.add(task_id)
-
-            if task_id in self.tasks:
-                for dep in self.tasks[task_id].dependencies:
-                    if dep not in visited:
-                        if has_cycle(dep, visited, rec_stack):
-                            return True
-                    elif dep in rec_stack:
-                        return True
-
-            rec_stack.remove(task_id)
-            return False
-
-        visited = set()
-        for task_id in self.tasks.keys():
-            if task_id not in visited:
-                if has_cycle(task_id, visited, set()):
-                    errors.append(f"Circular dependency detected involving task {task_id}")
+        # Check for circular dependencies (iterative SCC search, one error per cycle)
+        graph = {task_id: task.dependencies for task_id, task in self.tasks.items()}
+        for members in find_cycles(graph):
+            errors.append(f"Circular dependency detected involving tasks {', '.join(members)}")
 
         return errors
 
@@ -235,13 +467,8 @@ class GanttChartGenerator:
         project_end = max(all_end_dates)
         project_duration = (project_end - project_start).days
 
-        # Calculate working days (excluding weekends if configured)
-        working_days = 0
-        current = project_start
-        while current <= project_end:
-            if self.config.show_weekends or current.weekday() < 5:  # 0-4 is Mon-Fri
-                working_days += 1
-            current += timedelta(days=1)
+        # Working days (work week and holidays from the config), closed form
+        working_days = self.calendar.count(project_start, project_end)
 
         timeline = {
             "project_start": project_start.strftime("%Y-%m-%d"),
@@ -310,13 +537,61 @@ class GanttChartGenerator:
             date: Date to check
 
         Returns:
-            List of task IDs active on that date
+            List of task IDs active on that date (start_date <= date < end_date,
+            so a task is not active on its end_date)
         """
-        parallel = []
-        for task_id, task in self.tasks.items():
-            if task.start_date <= date <= task.end_date:
-                parallel.append(task_id)
-        return parallel
+        return self._current_index().at(date)
+
+    def get_tasks_in_range(self, start: datetime, end: datetime) -> List[str]:
+        """
+        Get all tasks active at any moment between two dates
+
+        Args:
+            start: Range start
+            end: Range end (inclusive)
+
+        Returns:
+            List of task IDs whose span [start_date, end_date) overlaps [start, end]
+        """
+        if end < start:
+            raise ValidationError("Range end cannot be before its start")
+        return self._current_index().overlapping(start, end)
+
+    def get_concurrency_profile(self, start: Optional[datetime] = None,
+                                end: Optional[datetime] = None) -> Dict:
+        """
+        Number of tasks running on each day, as get_parallel_tasks() counts them
+
+        One sweep over the sorted task endpoints covers the whole range, so a
+        multi-year daily profile costs O(tasks + days).
+
+        Args:
+            start: First day (default: earliest task start)
+            end: Last day (default: the day before the latest task end_date, the
+                last day a task is active)
+
+        Returns:
+            Dictionary with start, end, peak_active, peak_date and by_day
+            (date -> active task count)
+        """
+        if not self.tasks:
+            return {"error": "No tasks added"}
+
+        first = (start or min(task.start_date for task in self.tasks.values())).date()
+        last = (end or max(task.end_date for task in self.tasks.values()) - timedelta(days=1)).date()
+        days = [datetime.combine(first + timedelta(days=offset), time())
+                for offset in range((last - first).days + 1)]
+        counts = self._current_index().counts(days)
+
+        by_day = {day.strftime("%Y-%m-%d"): count for day, count in zip(days, counts)}
+        peak = max(range(len(counts)), key=counts.__getitem__) if counts else None
+        return {
+            "start": first.strftime("%Y-%m-%d"),
+            "end": last.strftime("%Y-%m-%d"),
+            "peak_active": counts[peak] if counts else 0,
+            "peak_date": days[peak].strftime("%Y-%m-%d") if counts else None,
+            "by_day": by_day
+        }
 
     def get_resource_allocation(self) -> Dict:
         """
@@ -341,6 +616,11 @@ class GanttChartGenerator:
             "by_resource": {}
         }
 
+        overallocated_days: Dict[str, int] = {}
+        for window in self.find_overallocations():
+            resource = window["resource"]
+            overallocated_days[resource] = overallocated_days.get(resource, 0) + window["days"]
+
         for assignee, tasks in by_assignee.items():
             total_days = sum(t.duration_days for t in tasks)
             completed_tasks = [t for t in tasks if t.status == TaskStatus.COMPLETED]
@@ -352,11 +632,336 @@ class GanttChartGenerator:
                 "completed": len(completed_tasks),
                 "in_progress": len(in_progress_tasks),
                 "not_started": len(tasks) - len(completed_tasks) - len(in_progress_tasks),
+                "overallocated_days": overallocated_days.get(assignee, 0),
                 "task_ids": [t.id for t in tasks]
             }
 
         return allocation
 
+    def set_resource_calendar(self, resource: str, calendar: ResourceCalendar) -> None:
+        """
+        Set the capacity calendar of a resource (default: capacity 1 every day)
+
+        Args:
+            resource: Resource name, as used in Task.assigned_to
+            calendar: ResourceCalendar instance
+
+        Raises:
+            ValidationError: If the calendar is invalid
+        """
+        calendar.validate()
+        self.resource_calendars[resource] = calendar
+
+    def _resource_tasks(self) -> Dict[str, List[Task]]:
+        """Tasks that consume resource capacity (assigned, not milestones), by resource"""
+        by_resource: Dict[str, List[Task]] = {}
+        for task in self.tasks.values():
+            if task.assigned_to and task.task_type != TaskType.MILESTONE:
+                by_resource.setdefault(task.assigned_to, []).append(task)
+        return by_resource
+
+    def _capacity_exceptions(self, resource: str, origin: date) -> Tuple[int, Dict[int, int]]:
+        """Base capacity and exception capacities keyed by day offset from origin"""
+        calendar = self.resource_calendars.get(resource) or ResourceCalendar()
+        exceptions = {
+            ((day.date() if isinstance(day, datetime) else day) - origin).days: value
+            for day, value in calendar.exceptions.items()
+        }
+        return calendar.capacity, exceptions
+
+    def find_overallocations(self, starts: Optional[Dict[str, date]] = None) -> List[Dict]:
+        """
+        Find the windows in which a resource is assigned more tasks than its capacity
+
+        A sweep line runs over each resource's task intervals (a task occupies
+        [start_date, end_date), so back-to-back tasks do not overlap) and its
+        capacity changes, in O(n log n) per resource.
+
+        Args:
+            starts: Optional task ID -> start date overrides (e.g. a leveled schedule)
+
+        Returns:
+            List of windows ordered by resource and start, each with resource,
+            start, end (exclusive), days, peak_load, capacity (lowest in the
+            window) and task_ids
+        """
+        windows = []
+        for resource, tasks in self._resource_tasks().items():
+            intervals = []
+            for task in tasks:
+                start = starts[task.id] if starts and task.id in starts else task.start_date
+                intervals.append((start.date() if isinstance(start, datetime) else start, task.duration_days, task.id))
+            origin = min(start for start, _, _ in intervals)
+
+            # Load changes at task starts/ends, capacity changes around exception days
+            events: Dict[int, List[Tuple[int, str]]] = {}
+            for start, duration, task_id in intervals:
+                offset = (start - origin).days
+                events.setdefault(offset, []).append((1, task_id))
+                events.setdefault(offset + duration, []).append((-1, task_id))
+            base, exceptions = self._capacity_exceptions(resource, origin)
+            boundaries = set(events)
+            for day in exceptions:
+                boundaries.update((day, day + 1))
+            times = sorted(boundaries)
+
+            active: Dict[str, None] = {}  # Ordered set of running tasks
+            window = None
+            for time, next_time in zip(times, times[1:]):
+                for delta, task_id in sorted(events.get(time, ())):  # Ends (-1) before starts
+                    if delta < 0:
+                        del active[task_id]
+                    else:
+                        active[task_id] = None
+                capacity = exceptions.get(time, base)
+                if len(active) <= capacity:
+                    window = None
+                    continue
+                if window is None:
+                    window = {"resource": resource, "start": time, "end": next_time,
+                              "peak_load": len(active), "capacity": capacity, "task_ids": dict(active)}
+                    windows.append((origin, window))
+                else:
+                    window["end"] = next_time
+                    window["peak_load"] = max(window["peak_load"], len(active))
+                    window["capacity"] = min(window["capacity"], capacity)
+                    window["task_ids"].update(active)
+
+        return [
+            {
+                "resource": window["resource"],
+                "start": (origin + timedelta(days=window["start"])).strftime("%Y-%m-%d"),
+                "end": (origin + timedelta(days=window["end"])).strftime("%Y-%m-%d"),
+                "days": window["end"] - window["start"],
+                "peak_load": window["peak_load"],
+                "capacity": window["capacity"],
+                "task_ids": list(window["task_ids"])
+            }
+            for origin, window in windows
+        ]
+
+    @staticmethod
+    def _earliest_fit(usage: List[int], base: int, exceptions: Dict[int, int], start: int, duration: int) -> int:
+        """First day >= start from which the resource has spare capacity for `duration` days"""
+        end = start + duration
+        day = start
+        while day < end:
+            used = usage[day] if day < len(usage) else 0
+            if used >= exceptions.get(day, base):
+                start = day + 1  # Restart the window after the full day
+                end = start + duration
+            day += 1
+        return start
+
+    def level_resources(self, scheme: str = "serial", priority_rule: str = "min_slack",
+                        apply: bool = False) -> Dict:
+        """
+        Resource-constrained schedule: delay tasks until their resource has capacity
+
+        Every task starts no earlier than its planned start_date and the end of
+        its dependencies, and uses one unit of its assignee's capacity on each
+        day it runs. Completed and in-progress tasks keep their dates. Tasks
+        are picked from a heap keyed by the priority rule:
+
+        - min_slack: latest start of the resource-free schedule first
+        - earliest_start: earliest dependency-feasible start first
+        - longest_duration: longest task first
+        - most_successors: task with the most direct successors first
+
+        The serial scheme places each picked task at the first day its
+        resource can take it; the parallel scheme advances a clock and, at
+        each decision time, starts eligible tasks in priority order while
+        capacity lasts.
+
+        Args:
+            scheme: "serial" or "parallel"
+            priority_rule: One of PRIORITY_RULES
+            apply: Move the tasks' start_date to the leveled schedule
+
+        Returns:
+            Dictionary with project end before/after, leveled schedule per
+            task, and overallocation windows before and after leveling
+
+        Raises:
+            ValidationError: If the scheme, rule or dependencies are invalid
+        """
+        if scheme not in SGS_SCHEMES:
+            raise ValidationError(f"Unknown scheme '{scheme}'. Available: {', '.join(SGS_SCHEMES)}")
+        if priority_rule not in PRIORITY_RULES:
+            raise ValidationError(f"Unknown priority rule '{priority_rule}'. Available: {', '.join(PRIORITY_RULES)}")
+        dep_errors = self.validate_dependencies()
+        if dep_errors:
+            raise ValidationError(f"Dependency validation failed: {'; '.join(dep_errors[:10])}")
+        if not self.tasks:
+            return {"error": "No tasks added"}
+
+        task_ids = list(self.tasks)
+        position = {task_id: i for i, task_id in enumerate(task_ids)}
+        origin = min(task.start_date for task in self.tasks.values()).date()
+        release = [(self.tasks[task_id].start_date.date() - origin).days for task_id in task_ids]
+        duration = [self.tasks[task_id].duration_days for task_id in task_ids]
+        preds = [[position[dep_id] for dep_id in self.tasks[task_id].dependencies] for task_id in task_ids]
+        succs: List[List[int]] = [[] for _ in task_ids]
+        for i, task_preds in enumerate(preds):
+            for j in task_preds:
+                succs[j].append(i)
+        pinned = [self.tasks[task_id].status in (TaskStatus.COMPLETED, TaskStatus.IN_PROGRESS) for task_id in task_ids]
+
+        # Resource-free schedule (CPM over release dates) for the priority keys
+        order, in_degree = [], [len(task_preds) for task_preds in preds]
+        stack = [i for i in range(len(task_ids)) if not in_degree[i]]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            for j in succs[i]:
+                in_degree[j] -= 1
+                if not in_degree[j]:
+                    stack.append(j)
+        earliest = [0] * len(task_ids)
+        for i in order:
+            earliest[i] = release[i] if pinned[i] else max([release[i]] + [earliest[j] + duration[j] for j in preds[i]])
+        project_end = max(earliest[i] + duration[i] for i in order)
+        latest = [0] * len(task_ids)
+        for i in reversed(order):
+            latest[i] = min([project_end] + [latest[j] for j in succs[i]]) - duration[i]
+
+        if priority_rule == "min_slack":
+            keys = latest
+        elif priority_rule == "earliest_start":
+            keys = earliest
+        elif priority_rule == "longest_duration":
+            keys = [-d for d in duration]
+        else:
+            keys = [-len(task_succs) for task_succs in succs]
+
+        # Per-resource daily usage, with completed / in-progress tasks placed first
+        resource_of = [None] * len(task_ids)
+        calendars: Dict[str, Tuple[int, Dict[int, int]]] = {}
+        usage: Dict[str, List[int]] = {}
+        for i, task_id in enumerate(task_ids):
+            task = self.tasks[task_id]
+            if task.assigned_to and task.task_type != TaskType.MILESTONE:
+                resource_of[i] = task.assigned_to
+                if task.assigned_to not in calendars:
+                    calendars[task.assigned_to] = self._capacity_exceptions(task.assigned_to, origin)
+                    usage[task.assigned_to] = []
+
+        def occupy(i: int, start: int) -> None:
+            days = usage[resource_of[i]]
+            end = start + duration[i]
+            if len(days) < end:
+                days.extend([0] * (end - len(days)))
+            for day in range(start, end):
+                days[day] += 1
+
+        def fit(i: int, start: int) -> int:
+            if resource_of[i] is None:
+                return start
+            base, exceptions = calendars[resource_of[i]]
+            return self._earliest_fit(usage[resource_of[i]], base, exceptions, start, duration[i])
+
+        for i in range(len(task_ids)):
+            if pinned[i] and resource_of[i] is not None:
+                occupy(i, release[i])
+
+        start = [None] * len(task_ids)
+        ready_at = list(release)  # Max of release date and predecessor finishes so far
+        remaining = [len(task_preds) for task_preds in preds]
+        eligible: List[Tuple] = []  # Heap of (priority key, input position)
+
+        def finish(i: int, day: int) -> None:
+            """Fix task i at `day` and release successors whose predecessors are all scheduled."""
+            start[i] = day
+            stack = [i]
+            while stack:
+                done = stack.pop()
+                for j in succs[done]:
+                    if not pinned[j]:
+                        ready_at[j] = max(ready_at[j], start[done] + duration[done])
+                    remaining[j] -= 1
+                    if not remaining[j]:
+                        if pinned[j]:
+                            start[j] = release[j]
+                            stack.append(j)
+                        else:
+                            heapq.heappush(eligible, (keys[j], j))
+
+        for i in range(len(task_ids)):
+            if not preds[i]:
+                if pinned[i]:
+                    finish(i, release[i])
+                else:
+                    heapq.heappush(eligible, (keys[i], i))
+
+        if scheme == "serial":
+            while eligible:
+                _, i = heapq.heappop(eligible)
+                day = fit(i, ready_at[i])
+                if resource_of[i] is not None:
+                    occupy(i, day)
+                finish(i, day)
+        else:
+            waiting: List[Tuple] = []  # Heap of (earliest possible day, priority key, position)
+            while eligible or waiting:
+                while eligible:
+                    key, i = heapq.heappop(eligible)
+                    heapq.heappush(waiting, (ready_at[i], key, i))
+                now = waiting[0][0]
+                candidates = []
+                while waiting and waiting[0][0] <= now:
+                    _, key, i = heapq.heappop(waiting)
+                    candidates.append((key, i))
+                candidates.sort()
+                for key, i in candidates:
+                    day = fit(i, now)
+                    if day == now:
+                        if resource_of[i] is not None:
+                            occupy(i, day)
+                        finish(i, day)
+                    else:
+                        heapq.heappush(waiting, (day, key, i))  # Lower bound: capacity only shrinks
+
+        leveled = {task_ids[i]: origin + timedelta(days=start[i]) for i in range(len(task_ids))}
+        before = self.find_overallocations()
+        after = self.find_overallocations(leveled)
+
+        schedule = {}
+        moved = 0
+        for i, task_id in enumerate(task_ids):
+            task = self.tasks[task_id]
+            delay = start[i] - release[i]
+            moved += delay > 0
+            schedule[task_id] = {
+                "start_date": leveled[task_id].strftime("%Y-%m-%d"),
+                "end_date": (leveled[task_id] + timedelta(days=duration[i])).strftime("%Y-%m-%d"),
+                "original_start": task.start_date.strftime("%Y-%m-%d"),
+                "delay_days": delay,
+                "assigned_to": task.assigned_to
+            }
+
+        original_end = max(task.end_date for task in self.tasks.values()).date()
+        leveled_end = origin + timedelta(days=max(start[i] + duration[i] for i in range(len(task_ids))))
+        if apply:
+            for i, task_id in enumerate(task_ids):
+                task = self.tasks[task_id]
+                task.start_date += timedelta(days=start[i] - release[i])
+            self.rebuild_interval_index()
+
+        logger.info(f"Leveled {len(task_ids)} tasks ({scheme}, {priority_rule}): {moved} moved, "
+                    f"{len(before)} overallocation windows resolved to {len(after)}")
+
+        return {
+            "scheme": scheme,
+            "priority_rule": priority_rule,
+            "project_end_before": original_end.strftime("%Y-%m-%d"),
+            "project_end_after": leveled_end.strftime("%Y-%m-%d"),
+            "project_delay_days": (leveled_end - original_end).days,
+            "tasks_moved": moved,
+            "schedule": schedule,
+            "overallocations_before": before,
+            "overallocations_after": after
+        }
+
     def generate_ascii_chart(self, max_tasks: int = 20) -> str:
         """
         Generate ASCII Gantt chart
@@ -718,6 +1323,9 @@ def main():
     print(f"  Total Tasks: {timeline['total_tasks']}")
     print(f"  Milestones: {timeline['milestones']}")
 
+    profile = generator.get_concurrency_profile()
+    print(f"  Peak Concurrency: {profile['peak_active']} tasks on {profile['peak_date']}")
+
     # Critical Path
     print("\n" + "=" * 80)
     print("CRITICAL PATH")
@@ -742,6 +1350,28 @@ def main():
         print(f"  Completed: {data['completed']}")
         print(f"  In Progress: {data['in_progress']}")
         print(f"  Not Started: {data['not_started']}")
+        print(f"  Overallocated Days: {data['overallocated_days']}")
+
+    # Resource Leveling
+    print("\n" + "=" * 80)
+    print("RESOURCE LEVELING")
+    print("=" * 80)
+
+    # Team B is away on a planned offsite at the start of sprint 3
+    generator.set_resource_calendar("Team B", ResourceCalendar(
+        exceptions={(project_start + timedelta(days=28 + i)).date(): 0 for i in range(3)}
+    ))
+    leveling = generator.level_resources(scheme="serial", priority_rule="min_slack")
+    print(f"\nOverallocation windows: {len(leveling['overallocations_before'])} before, "
+          f"{len(leveling['overallocations_after'])} after leveling")
+    for window in leveling["overallocations_before"]:
+        print(f"  - {window['resource']}: {window['start']} to {window['end']} "
+              f"({window['peak_load']} tasks, capacity {window['capacity']})")
+    print(f"Project end: {leveling['project_end_before']} -> {leveling['project_end_after']}")
+    for task_id, entry in leveling["schedule"].items():
+        if entry["delay_days"]:
+            print(f"  - {task_id}: {entry['original_start']} -> {entry['start_date']} "
+                  f"(+{entry['delay_days']} days)")
 
     # Milestones
     print("\n" + "=" * 80)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Dependency Graph Validation
+
+Shared cycle detection for the CPM and Gantt dependency graphs:
+- Iterative Tarjan strongly connected components in O(V + E)
+- No recursion, so 50k-task dependency chains validate without hitting
+  Python's recursion limit
+- Reports the member set of every cycle in a single pass
+
+Graphs are mappings of node ID -> neighbouring node IDs (successors or
+predecessors; a cycle has the same members either way). Neighbours that are
+not keys of the mapping are ignored, so unknown dependencies can be reported
+separately by the caller.
+
+Author: Senior Agile PM Budget Analyst Skill
+License: MIT
+"""
+
+from typing import Dict, Iterable, List, Mapping
+
+
+def strongly_connected_components(graph: Mapping[str, Iterable[str]]) -> List[List[str]]:
+    """
+    Find the strongly connected components of a directed graph (Tarjan).
+
+    Args:
+        graph: Mapping of node ID -> neighbour IDs
+
+    Returns:
+        Components in reverse topological order (a component is listed
+        before every component that reaches it); each component's members
+        are in order of discovery
+    """
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    on_stack = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+
+        while work:
+            node, neighbours = work[-1]
+            descended = False
+            for neighbour in neighbours:
+                if neighbour not in graph:
+                    continue
+                if neighbour not in index:
+                    index[neighbour] = low[neighbour] = len(index)
+                    stack.append(neighbour)
+                    on_stack.add(neighbour)
+                    work.append((neighbour, iter(graph[neighbour])))
+                    descended = True
+                    break
+                if neighbour in on_stack:
+                    low[node] = min(low[node], index[neighbour])
+            if descended:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component[::-1])
+
+    return components
+
+
+def find_cycles(graph: Mapping[str, Iterable[str]]) -> List[List[str]]:
+    """
+    Find every circular dependency of a directed graph.
+
+    A cycle is a strongly connected component with more than one node, or a
+    node that depends on itself.
+
+    Args:
+        graph: Mapping of node ID -> neighbour IDs
+
+    Returns:
+        One member list per cycle, members in the graph's key order, cycles
+        ordered by their first member (empty if the graph is acyclic)
+
+    Example:
+        >>> find_cycles({"A": ["B"], "B": ["A"], "C": ["C"], "D": []})
+        [['A', 'B'], ['C']]
+    """
+    position = {node: i for i, node in enumerate(graph)}
+    cycles = [
+        sorted(component, key=position.__getitem__)
+        for component in strongly_connected_components(graph)
+        if len(component) > 1 or component[0] in graph[component[0]]
+    ]
+    cycles.sort(key=lambda members: position[members[0]])
+    return cycles
+
+
+def has_cycle(graph: Mapping[str, Iterable[str]]) -> bool:
+    """Return True if the directed graph contains a circular dependency."""
+    return bool(find_cycles(graph))
+
+
+def describe_cycles(cycles: List[List[str]], limit: int = 10) -> str:
+    """
+    Summarize cycles for an error message, e.g. "A, B; C".
+
+    Args:
+        cycles: Output of find_cycles()
+        limit: Cycles listed before the rest are counted
+
+    Returns:
+        Semicolon-separated member lists
+    """
+    text = "; ".join(", ".join(members) for members in cycles[:limit])
+    if len(cycles) > limit:
+        text += f"; and {len(cycles) - limit} more"
+    return text
@@ -0,0 +1,436 @@
+"""
+Module: schedule_risk.py
+Purpose: Monte Carlo schedule risk analysis on top of the CPM network
+Author: AI PM Assistant - senior-agile-pm-budget-analyst
+Date: 2026-10-18
+
+Samples activity durations from three-point (PERT or triangular) or explicit
+distributions and runs the CPM forward and backward passes for thousands to
+millions of iterations at once. Each batch is a NumPy matrix of activities x
+iterations, propagated level by level over the network's cached topological
+order (see CPMEngine.level_plan), so a batch costs a few whole-row NumPy
+operations per level rather than one Python CPM per iteration.
+
+Outputs:
+- Project duration percentiles (P50/P80/P95) and completion dates
+- Criticality index: share of iterations in which each activity is critical
+- Sensitivity: correlation of each activity's duration with project duration
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import json
+import logging
+
+from critical_path import NUMPY_AVAILABLE, CPMEngine, CalculationError, ValidationError
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Matrix cells (activities x iterations) per batch; three float64 matrices are live
+BATCH_CELLS = 1_000_000
+# Iterations per independently seeded chunk; results do not depend on the worker count
+CHUNK_ITERATIONS = 5_000
+DISTRIBUTIONS = ("fixed", "pert", "triangular", "uniform", "normal", "lognormal")
+UNIT_DAYS = {"days": 1, "weeks": 7}  # Calendar days per unit for completion dates
+SENSITIVITY_TOP = 10
+
+
+def _number(act_id: str, spec: Dict, key: str) -> float:
+    try:
+        return float(spec[key])
+    except KeyError:
+        raise ValidationError(f"Activity {act_id}: missing '{key}'")
+    except (TypeError, ValueError):
+        raise ValidationError(f"Activity {act_id}: '{key}' must be a number")
+
+
+def _parse_distribution(act_data: Dict) -> Tuple[str, Tuple[float, ...]]:
+    """
+    Read an activity's duration distribution.
+
+    Three-point estimates are given as optimistic / most_likely / pessimistic
+    keys (with "distribution": "pert" (default) or "triangular"); other
+    distributions as "distribution": {"type": ..., parameters}:
+        fixed      (duration taken from the activity)
+        uniform    low, high
+        normal     mean, sd          (samples below 0 are clipped to 0)
+        lognormal  mean, sd          (of the duration itself)
+
+    Returns:
+        (distribution name, parameters)
+
+    Raises:
+        ValidationError: If the specification is incomplete or inconsistent
+    """
+    act_id = act_data.get('id', '<unknown>')
+    spec = act_data.get('distribution')
+    if 'optimistic' in act_data or 'pessimistic' in act_data:
+        kind = spec or "pert"
+        if kind not in ("pert", "triangular"):
+            raise ValidationError(f"Activity {act_id}: three-point estimates need distribution 'pert' or 'triangular'")
+        low, mode, high = (_number(act_id, act_data, key) for key in ('optimistic', 'most_likely', 'pessimistic'))
+        if not 0 <= low <= mode <= high:
+            raise ValidationError(f"Activity {act_id}: need 0 <= optimistic <= most_likely <= pessimistic")
+        return (kind, (low, mode, high)) if high > low else ("fixed", (mode,))
+
+    if spec is None:
+        return "fixed", (_number(act_id, act_data, 'duration'),)
+    if not isinstance(spec, dict) or spec.get('type') not in DISTRIBUTIONS:
+        raise ValidationError(f"Activity {act_id}: unknown distribution {spec!r}. Available: {', '.join(DISTRIBUTIONS)}")
+
+    kind = spec['type']
+    if kind == "fixed":
+        return kind, (_number(act_id, act_data, 'duration'),)
+    if kind in ("pert", "triangular"):
+        low, mode, high = (_number(act_id, spec, key) for key in ('optimistic', 'most_likely', 'pessimistic'))
+        if not 0 <= low <= mode <= high:
+            raise ValidationError(f"Activity {act_id}: need 0 <= optimistic <= most_likely <= pessimistic")
+        return (kind, (low, mode, high)) if high > low else ("fixed", (mode,))
+    if kind == "uniform":
+        low, high = _number(act_id, spec, 'low'), _number(act_id, spec, 'high')
+        if not 0 <= low <= high:
+            raise ValidationError(f"Activity {act_id}: need 0 <= low <= high")
+        return kind, (low, high)
+    mean, sd = _number(act_id, spec, 'mean'), _number(act_id, spec, 'sd')
+    if sd < 0 or (kind == "lognormal" and mean <= 0):
+        raise ValidationError(f"Activity {act_id}: need sd >= 0" + (" and mean > 0" if kind == "lognormal" else ""))
+    return kind, (mean, sd)
+
+
+def _expected(kind: str, params: Tuple[float, ...]) -> float:
+    """Deterministic duration used when an activity gives no 'duration' of its own."""
+    if kind in ("pert", "triangular"):
+        return params[1]  # Most likely
+    if kind == "uniform":
+        return (params[0] + params[1]) / 2
+    return params[0]
+
+
+class ScheduleRiskSimulator:
+    """
+    Monte Carlo simulation of project duration over a CPM network.
+
+    Example:
+        >>> activities = [
+        ...     {"id": "A", "name": "Design", "optimistic": 2, "most_likely": 3, "pessimistic": 6, "predecessors": []},
+        ...     {"id": "B", "name": "Build", "distribution": {"type": "normal", "mean": 8, "sd": 2}, "predecessors": ["A"]},
+        ...     {"id": "C", "name": "Docs", "duration": 4, "predecessors": ["A"]}
+        ... ]
+        >>> result = ScheduleRiskSimulator(activities).run(iterations=50000, seed=7)
+        >>> result['percentiles']['P80']
+    """
+
+    def __init__(self, activities_data: List[Dict], unit: str = "days"):
+        """
+        Initialize the simulator.
+
+        Args:
+            activities_data: Activity dictionaries as for CriticalPathAnalyzer;
+                'duration' may be omitted when a distribution is given
+            unit: Time unit (days, weeks, sprints)
+
+        Raises:
+            ValidationError: If activities or distributions are invalid
+            CalculationError: If NumPy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise CalculationError("Monte Carlo schedule analysis requires NumPy (pip install numpy)")
+
+        distributions, activities = [], []
+        for act_data in activities_data:
+            kind, params = _parse_distribution(act_data)
+            distributions.append((kind, params))
+            if 'duration' not in act_data:
+                act_data = dict(act_data, duration=_expected(kind, params))
+            activities.append(act_data)
+
+        self.unit = unit
+        self.engine = CPMEngine(activities, unit)
+        self.deterministic_duration = self.engine.compute()
+        self._columns = None
+
+        # Sampling groups: distribution name -> (activity columns, parameter arrays)
+        by_column = {}
+        for act_data, distribution in zip(activities, distributions):
+            by_column[self.engine.index[act_data['id']]] = distribution  # A repeated ID keeps its last definition
+        columns: Dict[str, List[int]] = {}
+        values: Dict[str, List[Tuple[float, ...]]] = {}
+        for column, (kind, params) in sorted(by_column.items()):
+            columns.setdefault(kind, []).append(column)
+            values.setdefault(kind, []).append(params)
+        self._groups = []
+        for kind, group_columns in columns.items():
+            params = np.array(values[kind], dtype=np.float64)
+            group_columns = np.array(group_columns, dtype=np.int64)
+            if kind == "pert":
+                low, mode, high = params.T
+                params = np.stack([low, high - low, 1 + 4 * (mode - low) / (high - low),
+                                   1 + 4 * (high - mode) / (high - low)], axis=1)
+            elif kind == "lognormal":
+                mean, sd = params.T
+                sigma2 = np.log1p((sd / mean) ** 2)
+                params = np.stack([np.log(mean) - sigma2 / 2, np.sqrt(sigma2)], axis=1)
+            self._groups.append((kind, group_columns, params.T.copy()))
+        self._level_columns()  # Built once, shipped to worker processes with the simulator
+
+    def _sample(self, rng, rows: int):
+        """Duration matrix (activities x rows) for one batch of rows iterations."""
+        durations = np.empty((self.engine.n, rows))
+        for kind, columns, params in self._groups:
+            size = (len(columns), rows)
+            params = [column[:, None] for column in params]
+            if kind == "fixed":
+                durations[columns] = params[0]
+            elif kind == "pert":
+                low, span, alpha, beta = params
+                durations[columns] = low + span * rng.beta(alpha, beta, size)
+            elif kind == "triangular":
+                durations[columns] = rng.triangular(params[0], params[1], params[2], size)
+            elif kind == "uniform":
+                durations[columns] = rng.uniform(params[0], params[1], size)
+            elif kind == "normal":
+                durations[columns] = np.maximum(rng.normal(params[0], params[1], size), 0.0)
+            else:
+                durations[columns] = rng.lognormal(params[0], params[1], size)
+        return durations
+
+    @staticmethod
+    def _neighbour_columns(ptr, idx, members):
+        """
+        Neighbour lists of one level as columns: members sorted by degree
+        (descending) and, for each k, the k-th neighbour of the members that
+        have more than k. Combining column k into the first len(column)
+        accumulator rows visits every edge exactly once without padding.
+        """
+        degrees = ptr[members + 1] - ptr[members]
+        order = np.argsort(-degrees, kind='stable')
+        members, degrees = members[order], degrees[order]
+        max_degree = int(degrees[0]) if len(degrees) else 0
+        columns = []
+        for k in range(max_degree):
+            count = np.count_nonzero(degrees > k)
+            columns.append(idx[ptr[members[:count]] + k])
+        return members[degrees > 0], columns
+
+    def _level_columns(self):
+        """Per-level (members, predecessor columns) and (members, successor columns), built once."""
+        if self._columns is None:
+            engine = self.engine
+            nodes, bounds = engine.level_plan()[:2]
+            levels = [nodes[bounds[level]:bounds[level + 1]] for level in range(engine.n_levels)]
+            self._columns = (
+                [self._neighbour_columns(engine.pred_ptr, engine.pred_idx, members) for members in levels],
+                [self._neighbour_columns(engine.succ_ptr, engine.succ_idx, members) for members in levels]
+            )
+        return self._columns
+
+    def _passes(self, durations):
+        """
+        Forward and backward CPM passes for every column of a duration matrix.
+
+        Matrices are activities x iterations, so each neighbour gather copies
+        whole contiguous rows, combined with np.maximum / np.minimum in place.
+
+        Returns:
+            (project durations, critical mask) of shape (rows,), (activities, rows)
+        """
+        forward, backward = self._level_columns()
+        EF = durations.copy()  # Activities without predecessors start at 0
+        for members, columns in forward[1:]:
+            acc = EF[columns[0]]
+            for column in columns[1:]:
+                np.maximum(acc[:len(column)], EF[column], out=acc[:len(column)])
+            acc += durations[members]
+            EF[members] = acc
+
+        project = EF.max(axis=0)
+        LS = np.empty_like(EF)
+        LS[:] = project
+        LS -= durations
+        for members, columns in reversed(backward):
+            if not columns:
+                continue
+            acc = LS[columns[0]]
+            for column in columns[1:]:
+                np.minimum(acc[:len(column)], LS[column], out=acc[:len(column)])
+            acc -= durations[members]
+            LS[members] = acc
+        return project, np.abs(LS + durations - EF) < 1e-9
+
+    def _run_chunk(self, iterations: int, seed_sequence) -> Dict:
+        """Simulate one chunk and return its project durations and per-activity sums."""
+        rng = np.random.default_rng(seed_sequence)
+        n = self.engine.n
+        rows_per_batch = max(1, BATCH_CELLS // max(n, 1))
+        base_durations = self.engine.duration
+        base_project = self.deterministic_duration
+        projects = np.empty(iterations)
+        critical = np.zeros(n, dtype=np.int64)
+        sum_d = np.zeros(n)
+        sum_d2 = np.zeros(n)
+        sum_dp = np.zeros(n)
+
+        for offset in range(0, iterations, rows_per_batch):
+            rows = min(rows_per_batch, iterations - offset)
+            durations = self._sample(rng, rows)
+            project, critical_mask = self._passes(durations)
+            projects[offset:offset + rows] = project
+            critical += critical_mask.sum(axis=1)
+            # Sums of deviations from the deterministic plan, for the correlations
+            durations -= base_durations[:, None]
+            sum_d += durations.sum(axis=1)
+            sum_d2 += np.einsum('ij,ij->i', durations, durations)
+            sum_dp += durations @ (project - base_project)
+
+        return {'projects': projects, 'critical': critical, 'sum_d': sum_d, 'sum_d2': sum_d2, 'sum_dp': sum_dp}
+
+    def run(self, iterations: int = 10000, seed: Optional[int] = None, workers: int = 1,
+            percentiles: Sequence[float] = (50, 80, 95), start_date: Optional[datetime] = None,
+            days_per_unit: Optional[float] = None) -> Dict:
+        """
+        Run the simulation.
+
+        Args:
+            iterations: Number of simulated projects (10k to 1M+)
+            seed: Random seed; the same seed gives the same result for any worker count
+            workers: Processes to spread chunks of CHUNK_ITERATIONS over (1 = in-process)
+            percentiles: Duration percentiles to report (as P<n> keys)
+            start_date: Project start, to convert percentiles to completion dates
+            days_per_unit: Calendar days per unit (defaults to 1 for days, 7 for weeks)
+
+        Returns:
+            Dict containing:
+            - deterministic_duration: CPM duration with the planned durations
+            - mean_duration, std_duration, min_duration, max_duration
+            - percentiles: {"P50": ..., "P80": ..., "P95": ...}
+            - completion_dates: Same keys as ISO dates (when start_date is given)
+            - probability_on_time: Share of iterations finishing within the deterministic duration
+            - criticality_index: Activities by share of iterations in which they are critical
+            - sensitivity: Top activities by correlation of duration with project duration
+
+        Raises:
+            ValidationError: If iterations or workers are not positive
+        """
+        if iterations < 1 or workers < 1:
+            raise ValidationError("iterations and workers must be positive")
+
+        chunk_sizes = [min(CHUNK_ITERATIONS, iterations - offset) for offset in range(0, iterations, CHUNK_ITERATIONS)]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+        if workers > 1 and len(chunk_sizes) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunk_sizes))) as pool:
+                chunks = list(pool.map(self._run_chunk, chunk_sizes, seeds))
+        else:
+            chunks = [self._run_chunk(size, chunk_seed) for size, chunk_seed in zip(chunk_sizes, seeds)]
+
+        projects = np.concatenate([chunk['projects'] for chunk in chunks])
+        critical = sum(chunk['critical'] for chunk in chunks)
+        sum_d, sum_d2, sum_dp = (sum(chunk[key] for chunk in chunks) for key in ('sum_d', 'sum_d2', 'sum_dp'))
+
+        # Pearson correlation from deviation sums (deviations keep the sums well conditioned)
+        deviations = projects - self.deterministic_duration
+        mean_d, mean_p = sum_d / iterations, deviations.mean()
+        cov = sum_dp / iterations - mean_d * mean_p
+        var_d = np.maximum(sum_d2 / iterations - mean_d ** 2, 0.0)
+        var_p = max(float((deviations ** 2).mean() - mean_p ** 2), 0.0)
+        denominator = np.sqrt(var_d * var_p)
+        correlation = np.divide(cov, denominator, out=np.zeros_like(cov), where=denominator > 1e-12)
+        criticality = critical / iterations
+
+        engine = self.engine
+        values = np.percentile(projects, list(percentiles))
+        result = {
+            'iterations': iterations,
+            'unit': self.unit,
+            'deterministic_duration': round(self.deterministic_duration, 2),
+            'mean_duration': round(float(projects.mean()), 2),
+            'std_duration': round(float(projects.std()), 2),
+            'min_duration': round(float(projects.min()), 2),
+            'max_duration': round(float(projects.max()), 2),
+            'percentiles': {f"P{p:g}": round(float(v), 2) for p, v in zip(percentiles, values)},
+            'probability_on_time': round(float((projects <= self.deterministic_duration + 1e-9).mean()), 4),
+            'criticality_index': [
+                {'id': engine.ids[i], 'name': engine.names[i], 'criticality': round(float(criticality[i]), 4)}
+                for i in np.argsort(-criticality, kind='stable').tolist()
+            ],
+            'sensitivity': [
+                {
+                    'id': engine.ids[i],
+                    'name': engine.names[i],
+                    'correlation': round(float(correlation[i]), 4),
+                    'criticality': round(float(criticality[i]), 4)
+                }
+                for i in np.argsort(-np.abs(correlation), kind='stable')[:SENSITIVITY_TOP].tolist()
+                if correlation[i] != 0
+            ]
+        }
+
+        days = days_per_unit if days_per_unit is not None else UNIT_DAYS.get(self.unit)
+        if start_date is not None and days is not None:
+            if not isinstance(start_date, datetime):
+                start_date = datetime.combine(start_date, datetime.min.time())
+            result['completion_dates'] = {
+                key: (start_date + timedelta(days=value * days)).date().isoformat()
+                for key, value in result['percentiles'].items()
+            }
+
+        logger.info(f"Monte Carlo complete: {iterations} iterations, P80 {result['percentiles'].get('P80')} {self.unit}")
+        return result
+
+
+def simulate_schedule_risk(activities: List[Dict], iterations: int = 10000, unit: str = "days",
+                           seed: Optional[int] = None, workers: int = 1, **options) -> Dict:
+    """
+    Convenience function to run a Monte Carlo schedule risk analysis.
+
+    Args:
+        activities: Activity dictionaries with three-point estimates or distributions
+        iterations: Number of simulated projects
+        unit: Time unit for durations
+        seed: Random seed for reproducible results
+        workers: Worker processes (1 = in-process)
+        **options: percentiles, start_date, days_per_unit (see ScheduleRiskSimulator.run)
+
+    Returns:
+        Dict with percentiles, criticality index and sensitivity ranking
+    """
+    return ScheduleRiskSimulator(activities, unit).run(iterations, seed, workers, **options)
+
+
+# Example usage
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Monte Carlo Schedule Risk Analysis")
+    print("=" * 60)
+
+    activities = [
+        {"id": "REQ", "name": "Requirements", "optimistic": 1.5, "most_likely": 2, "pessimistic": 4, "predecessors": []},
+        {"id": "ARCH", "name": "Architecture", "optimistic": 2, "most_likely": 3, "pessimistic": 6, "predecessors": ["REQ"]},
+        {"id": "UI", "name": "UI/UX Design", "optimistic": 1, "most_likely": 2, "pessimistic": 3, "predecessors": ["REQ"]},
+        {"id": "BE", "name": "Backend", "optimistic": 4, "most_likely": 5, "pessimistic": 9, "predecessors": ["ARCH"]},
+        {"id": "FE", "name": "Frontend", "distribution": {"type": "normal", "mean": 4.5, "sd": 1}, "predecessors": ["UI", "ARCH"]},
+        {"id": "INT", "name": "Integration", "optimistic": 1, "most_likely": 2, "pessimistic": 4, "predecessors": ["BE", "FE"]},
+        {"id": "TEST", "name": "Testing", "duration": 3, "predecessors": ["INT"]}
+    ]
+
+    try:
+        result = simulate_schedule_risk(activities, iterations=100000, unit="weeks", seed=42,
+                                        start_date=datetime(2026, 1, 5))
+        print(f"\n📅 Deterministic: {result['deterministic_duration']} weeks "
+              f"(on time in {result['probability_on_time']:.0%} of runs)")
+        for key, value in result['percentiles'].items():
+            print(f"   {key}: {value} weeks → {result['completion_dates'][key]}")
+        print("\n🔴 Criticality index:")
+        for item in result['criticality_index']:
+            print(f"   {item['name']:<15} {item['criticality']:.0%}")
+        print("\n📈 Sensitivity (duration vs. project correlation):")
+        for item in result['sensitivity']:
+            print(f"   {item['name']:<15} {item['correlation']:+.2f}")
+        print("\n💾 JSON summary:")
+        print(json.dumps({key: result[key] for key in ('percentiles', 'completion_dates')}, indent=2))
+    except (ValidationError, CalculationError) as e:
+        print(f"\n❌ Error: {e}")
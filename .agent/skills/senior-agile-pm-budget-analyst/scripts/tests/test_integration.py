@@ -16,16 +16,21 @@ import os
 sys.path.append('..')
 
 import unittest
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
 import re
 
 # Import all modules to test
-from critical_path import CriticalPathAnalyzer, Activity
+from critical_path import CriticalPathAnalyzer, Activity, CPMEngine, ValidationError as CPMValidationError
+from critical_path import NUMPY_AVAILABLE
+from schedule_risk import simulate_schedule_risk
 from budget_calculator import BudgetCalculator, BudgetConfig, TeamMember
 from poker_planning import PokerPlanningCalculator, PokerConfig, Story, EstimationScale
-from gantt_chart import GanttChartGenerator, GanttConfig, Task, TaskType, TaskStatus
+from gantt_chart import GanttChartGenerator, GanttConfig, Task, TaskType, TaskStatus, ResourceCalendar
+from gantt_chart import ValidationError as GanttValidationError
 from burndown_chart import BurndownCalculator, BurndownConfig, ChartType
+from burndown_chart import ValidationError as BurndownValidationError
+from business_calendar import BusinessCalendar, ValidationError as CalendarValidationError
 from exporters import (
     MarkdownExporter, MermaidExporter, PlantUMLExporter,
     HTMLExporter, CSVExporter, JSONExporter, save_to_file
@@ -330,6 +335,170 @@ class TestCriticalPathIntegration(IntegrationTestBase):
 
         print("\n   🎉 Complex project test PASSED - All exports verified!")
 
+    def test_06_array_engine_matches_analyzer(self):
+        """Test the array-backed CPM engine returns the analyzer's result"""
+        print("\n⚡ Testing Array-Backed CPM Engine...")
+
+        # Layered network: 40 levels of 25 activities, each depending on up to 3 of the previous level
+        activities = []
+        for level in range(40):
+            for slot in range(25):
+                preds = [f"L{level - 1}-{(slot * 7 + k) % 25}" for k in range(slot % 4)] if level else []
+                activities.append({"id": f"L{level}-{slot}", "name": f"Task {level}.{slot}",
+                                   "duration": (level * 31 + slot * 17) % 9 + 0.5, "predecessors": preds})
+
+        expected = CriticalPathAnalyzer(activities).analyze()
+        engine = CPMEngine(activities)
+        result = engine.analyze()
+
+        self.assertEqual(result, expected)
+        self.assertEqual(engine.n_levels, 40)
+        self.assertAlmostEqual(float(engine.EF[engine.index[expected['critical_path'][-1]]]),
+                               expected['project_duration'])
+
+        print(f"   ✅ {len(activities)} activities, duration {result['project_duration']} days")
+        print(f"   ✅ Critical path matches analyzer ({len(result['critical_path'])} activities)")
+
+    def test_07_long_chains_and_cycle_diagnostics(self):
+        """Test 50k-activity chains validate and every cycle is reported"""
+        print("\n🔁 Testing Cycle Detection on Long Chains...")
+
+        chain = [{"id": f"T{i}", "name": f"Task {i}", "duration": 1,
+                  "predecessors": [f"T{i - 1}"] if i else []} for i in range(50000)]
+        result = CriticalPathAnalyzer(chain).analyze()
+        self.assertEqual(result['project_duration'], 50000)
+
+        # Close the chain into one long loop, plus a separate two-task loop
+        chain[0]["predecessors"] = ["T49999"]
+        chain += [{"id": "X", "name": "X", "duration": 1, "predecessors": ["Y"]},
+                  {"id": "Y", "name": "Y", "duration": 1, "predecessors": ["X"]}]
+        for engine in (CriticalPathAnalyzer, CPMEngine):
+            with self.assertRaises(CPMValidationError) as ctx:
+                engine(chain)
+            self.assertIn("circular dependencies: T0, T1, ", str(ctx.exception))
+            self.assertTrue(str(ctx.exception).endswith("; X, Y"))
+
+        print("   ✅ 50,000-activity chain analyzed without recursion errors")
+        print("   ✅ Both cycles reported with their members")
+
+    def test_08_what_if_updates(self):
+        """Test incremental what-if changes match a fresh analysis"""
+        print("\n🔮 Testing What-If Recomputation...")
+
+        analyzer = CriticalPathAnalyzer(self.activities)
+        baseline = analyzer.analyze()
+        self.assertEqual(baseline['critical_path'], ['A', 'B', 'D', 'E', 'F'])
+
+        # Procurement slips past Design + Development: C becomes critical instead of B and D
+        result = analyzer.update_duration("C", 20)
+        self.assertEqual(result['project_duration'], 32)
+        self.assertEqual(result['duration_change'], 2)
+        self.assertEqual(result['critical_path'], ['A', 'C', 'E', 'F'])
+        self.assertEqual(result['no_longer_critical'], ['B', 'D'])
+
+        result = analyzer.add_dependency("B", "C")
+        self.assertEqual(result['project_duration'], 40)
+        result = analyzer.remove_dependency("B", "C")
+        self.assertEqual(result['project_duration'], 32)
+        with self.assertRaises(CPMValidationError):
+            analyzer.add_dependency("F", "A")
+
+        fresh = CriticalPathAnalyzer([dict(a, duration=20) if a['id'] == 'C' else a for a in self.activities])
+        expected = {a['id']: a for a in fresh.analyze()['activities']}
+        for act_id, values in expected.items():
+            times = analyzer.activity_times(act_id)
+            for key in ('ES', 'EF', 'LS', 'LF', 'slack', 'critical'):
+                self.assertEqual(times[key], values[key], f"{act_id}.{key}")
+        self.assertEqual(analyzer.analyze(), fresh.analyze())
+
+        print(f"   ✅ Slip of C: {baseline['project_duration']} → 32 days, critical path A → C → E → F")
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "schedule_risk requires NumPy")
+    def test_09_monte_carlo_schedule_risk(self):
+        """Test Monte Carlo percentiles, criticality index and sensitivity"""
+        print("\n🎲 Testing Monte Carlo Schedule Risk...")
+
+        # Fixed durations: every iteration reproduces the deterministic schedule
+        fixed = simulate_schedule_risk(self.activities, iterations=500, seed=1)
+        self.assertEqual(fixed['percentiles'], {'P50': 30.0, 'P80': 30.0, 'P95': 30.0})
+        self.assertEqual(fixed['sensitivity'], [])
+        criticality = {a['id']: a['criticality'] for a in fixed['criticality_index']}
+        self.assertEqual(criticality, {'A': 1.0, 'B': 1.0, 'D': 1.0, 'E': 1.0, 'F': 1.0, 'C': 0.0})
+
+        # Procurement is highly uncertain and can overtake Design + Development
+        uncertain = [dict(a) for a in self.activities]
+        uncertain[1].update(optimistic=6, most_likely=8, pessimistic=12)
+        uncertain[2].update(optimistic=2, most_likely=10, pessimistic=30)
+        uncertain[3]['distribution'] = {'type': 'normal', 'mean': 10, 'sd': 2}
+
+        result = simulate_schedule_risk(uncertain, iterations=20000, seed=7, start_date=datetime(2026, 1, 5))
+        self.assertEqual(result, simulate_schedule_risk(uncertain, iterations=20000, seed=7,
+                                                        start_date=datetime(2026, 1, 5)))
+        p = result['percentiles']
+        self.assertLessEqual(p['P50'], p['P80'])
+        self.assertLessEqual(p['P80'], p['P95'])
+        self.assertGreater(p['P95'], result['deterministic_duration'])
+        self.assertEqual(list(result['completion_dates']), ['P50', 'P80', 'P95'])
+
+        criticality = {a['id']: a['criticality'] for a in result['criticality_index']}
+        self.assertTrue(all(0.0 <= value <= 1.0 for value in criticality.values()))
+        for always in ('A', 'E', 'F'):
+            self.assertEqual(criticality[always], 1.0)
+        self.assertGreater(criticality['C'], 0.0)
+        self.assertAlmostEqual(criticality['B'] + criticality['C'], 1.0, delta=0.01)
+        self.assertIn(result['sensitivity'][0]['id'], ('C', 'D'))
+
+        print(f"   ✅ P50/P80/P95: {p['P50']} / {p['P80']} / {p['P95']} days")
+        print(f"   ✅ Procurement critical in {criticality['C']:.0%} of iterations")
+
+    def test_10_k_longest_and_near_critical_paths(self):
+        """Test path enumeration separates parallel critical chains and near-critical paths"""
+        print("\n🛤️  Testing K-Longest and Near-Critical Paths...")
+
+        # QA runs in parallel with Design + Development and is just as long
+        activities = self.activities + [
+            {"id": "G", "name": "QA Automation", "duration": 18, "predecessors": ["A"]},
+            {"id": "H", "name": "Docs", "duration": 14, "predecessors": ["A"]}
+        ]
+        activities[4] = dict(activities[4], predecessors=["D", "C", "G", "H"])
+        analyzer = CriticalPathAnalyzer(activities)
+        # The flat critical path interleaves the two chains
+        self.assertEqual(analyzer.analyze()['critical_path'], ['A', 'B', 'G', 'D', 'E', 'F'])
+
+        paths = analyzer.k_longest_paths(3)
+        self.assertEqual([p['activities'] for p in paths],
+                         [['A', 'B', 'D', 'E', 'F'], ['A', 'G', 'E', 'F'], ['A', 'H', 'E', 'F']])
+        self.assertEqual([p['slack'] for p in paths], [0, 0, 4])
+        self.assertEqual([p['critical'] for p in paths], [True, True, False])
+
+        near = analyzer.near_critical_paths(tolerance=5)
+        self.assertEqual(len(near['paths']), 3)
+        self.assertFalse(near['truncated'])
+        self.assertEqual([a['id'] for a in near['near_critical_activities']], ['A', 'B', 'G', 'D', 'E', 'F', 'H'])
+        self.assertTrue(analyzer.near_critical_paths(tolerance=20, max_paths=2)['truncated'])
+        self.assertEqual(CPMEngine(activities).near_critical_paths(tolerance=5), near)
+
+        # Enumeration follows what-if changes
+        analyzer.update_duration("H", 20)
+        self.assertEqual(analyzer.k_longest_paths(1)[0]['activities'], ['A', 'H', 'E', 'F'])
+
+        # Wide layered network: 2^12 equally long paths, only the k requested are built
+        layers = [{"id": "S", "name": "Start", "duration": 1, "predecessors": []}]
+        previous = ["S"]
+        for level in range(12):
+            current = [f"L{level}a", f"L{level}b"]
+            layers += [{"id": act_id, "name": act_id, "duration": 2, "predecessors": previous} for act_id in current]
+            previous = current
+        wide = CriticalPathAnalyzer(layers)
+        paths = wide.k_longest_paths(5)
+        self.assertEqual(len(paths), 5)
+        self.assertTrue(all(p['duration'] == 25 and p['critical'] for p in paths))
+        self.assertEqual(len({tuple(p['activities']) for p in paths}), 5)
+        self.assertEqual(len(wide.near_critical_paths(0, max_paths=100)['paths']), 100)
+
+        print("   ✅ Parallel critical chains reported separately: A → B → D and A → G")
+        print(f"   ✅ Near-critical within 5 days: {len(near['paths'])} paths")
+
 
 class TestBudgetIntegration(IntegrationTestBase):
     """Integration tests for Budget Calculator"""
@@ -680,6 +849,154 @@ class TestGanttIntegration(IntegrationTestBase):
         print(f"   ✅ Mermaid Gantt saved: {filepath}")
 
 
+    def test_04_dependency_cycles_reported(self):
+        """Test every dependency cycle is reported once with its members"""
+        print("\n🔁 Testing Gantt Dependency Validation...")
+
+        generator = GanttChartGenerator(self.config)
+        start = datetime(2024, 3, 1)
+        generator.add_tasks_batch([Task(f"T{i}", f"Task {i}", TaskType.STORY, start, 1,
+                                        dependencies=[f"T{i - 1}"] if i else [])
+                                   for i in range(5000)])
+        self.assertEqual(generator.validate_dependencies(), [])
+
+        generator.add_tasks_batch([
+            Task("A", "A", TaskType.STORY, start, 1, dependencies=["B"]),
+            Task("B", "B", TaskType.STORY, start, 1, dependencies=["C"]),
+            Task("C", "C", TaskType.STORY, start, 1, dependencies=["A", "MISSING"]),
+            Task("S", "S", TaskType.STORY, start, 1, dependencies=["S"]),
+        ])
+        errors = generator.validate_dependencies()
+        self.assertEqual(errors, [
+            "Task C depends on non-existent task MISSING",
+            "Circular dependency detected involving tasks A, B, C",
+            "Circular dependency detected involving tasks S",
+        ])
+
+        print(f"   ✅ {len(errors) - 1} cycles reported")
+
+    def test_05_resource_leveling(self):
+        """Test overallocation detection and resource-leveled schedules"""
+        print("\n👥 Testing Resource Leveling...")
+
+        generator = GanttChartGenerator(self.config)
+        start = datetime(2024, 3, 4)
+        generator.add_tasks_batch([
+            Task("A", "API", TaskType.STORY, start, 5, assigned_to="Ana", status=TaskStatus.IN_PROGRESS),
+            Task("B", "UI", TaskType.STORY, start, 3, assigned_to="Ana"),
+            Task("C", "Docs", TaskType.STORY, start + timedelta(days=1), 2, assigned_to="Ana"),
+            Task("D", "Review", TaskType.STORY, start + timedelta(days=2), 2, dependencies=["B"], assigned_to="Bo"),
+            Task("M", "Release", TaskType.MILESTONE, start + timedelta(days=5), 1, dependencies=["A", "C"]),
+        ])
+
+        # Ana runs A, B and C at once on Mar 5
+        windows = generator.find_overallocations()
+        self.assertEqual(windows, [{
+            "resource": "Ana", "start": "2024-03-04", "end": "2024-03-07", "days": 3,
+            "peak_load": 3, "capacity": 1, "task_ids": ["A", "B", "C"]
+        }])
+        self.assertEqual(generator.get_resource_allocation()["by_resource"]["Ana"]["overallocated_days"], 3)
+
+        # Bo is off on Mar 12; in-progress A keeps its dates
+        generator.set_resource_calendar("Bo", ResourceCalendar(exceptions={date(2024, 3, 12): 0}))
+        result = generator.level_resources(scheme="serial", priority_rule="min_slack")
+        schedule = result["schedule"]
+        self.assertEqual(schedule["A"]["delay_days"], 0)
+        self.assertEqual(schedule["B"]["start_date"], "2024-03-09")  # Less slack than C
+        self.assertEqual(schedule["C"]["start_date"], "2024-03-12")
+        self.assertEqual(schedule["D"]["start_date"], "2024-03-13")  # After B, skipping Bo's day off
+        self.assertEqual(schedule["M"]["start_date"], "2024-03-14")
+        self.assertEqual(result["overallocations_after"], [])
+        self.assertEqual(result["project_end_after"], "2024-03-15")
+
+        parallel = generator.level_resources(scheme="parallel", priority_rule="longest_duration", apply=True)
+        self.assertEqual(parallel["overallocations_after"], [])
+        self.assertEqual(generator.find_overallocations(), [])
+        self.assertEqual(generator.tasks["B"].start_date, datetime(2024, 3, 9))
+
+        with self.assertRaises(GanttValidationError):
+            generator.level_resources(scheme="random")
+
+        print(f"   ✅ Overallocation window: Ana, {windows[0]['start']} to {windows[0]['end']}")
+        print(f"   ✅ Leveled end: {result['project_end_before']} → {result['project_end_after']}")
+
+    def test_06_interval_index_queries(self):
+        """Test indexed point, range and concurrency queries match a linear scan"""
+        print("\n📆 Testing Gantt Interval Index...")
+
+        generator = GanttChartGenerator(self.config)
+        start = datetime(2024, 1, 1)
+        tasks = [Task(f"T{i}", f"Task {i}", TaskType.STORY, start + timedelta(days=(i * 37) % 700), 1 + (i * 11) % 45)
+                 for i in range(3000)]
+        generator.add_tasks_batch(tasks[:2000])
+        for task in tasks[2000:]:
+            generator.add_task(task)
+
+        for offset in range(0, 760, 13):
+            moment = start + timedelta(days=offset, hours=offset % 24)
+            expected = [t.id for t in tasks if t.start_date <= moment < t.end_date]
+            self.assertEqual(generator.get_parallel_tasks(moment), expected)
+            range_end = moment + timedelta(days=offset % 9)
+            expected = [t.id for t in tasks if t.start_date <= range_end and t.end_date > moment]
+            self.assertEqual(generator.get_tasks_in_range(moment, range_end), expected)
+
+        profile = generator.get_concurrency_profile()
+        self.assertEqual(len(profile["by_day"]), (max(t.end_date for t in tasks) - start).days)
+        for day in ("2024-01-01", "2024-06-15", "2025-03-02"):
+            self.assertEqual(profile["by_day"][day],
+                             len(generator.get_parallel_tasks(datetime.strptime(day, "%Y-%m-%d"))))
+        self.assertEqual(profile["peak_active"], max(profile["by_day"].values()))
+
+        # Leveling with apply=True re-indexes the moved tasks
+        leveled = GanttChartGenerator(self.config)
+        leveled.add_tasks_batch([Task("A", "A", TaskType.STORY, start, 5, assigned_to="Ana"),
+                                 Task("B", "B", TaskType.STORY, start, 5, assigned_to="Ana")])
+        leveled.level_resources(apply=True)
+        self.assertEqual(leveled.get_parallel_tasks(start + timedelta(days=5)), ["B"])
+        self.assertEqual(leveled.find_overallocations(), [])
+
+        print(f"   ✅ {len(tasks)} tasks, peak {profile['peak_active']} active on {profile['peak_date']}")
+
+    def test_07_interval_index_follows_task_changes(self):
+        """Test half-open spans, re-indexing after direct task edits and partially added batches"""
+        print("\n🔁 Testing Gantt Interval Index Updates...")
+
+        generator = GanttChartGenerator(self.config)
+        start = datetime(2024, 1, 1)
+        first = Task("A", "A", TaskType.STORY, start, 5, assigned_to="Ana")
+        second = Task("B", "B", TaskType.STORY, start + timedelta(days=5), 5, assigned_to="Ana")
+        generator.add_tasks_batch([first, second])
+
+        # Back-to-back tasks: A is not active on its end date, matching overallocation
+        handover = start + timedelta(days=5)
+        self.assertEqual(generator.get_parallel_tasks(handover), ["B"])
+        self.assertEqual(generator.get_concurrency_profile()["peak_active"], 1)
+        self.assertEqual(len(generator.get_concurrency_profile()["by_day"]), 10)
+        self.assertEqual(generator.find_overallocations(), [])
+
+        # Editing a task's dates directly is picked up by the next query
+        first.duration_days = 7
+        self.assertEqual(generator.get_parallel_tasks(handover + timedelta(days=1)), ["A", "B"])
+        self.assertEqual(generator.get_concurrency_profile()["peak_active"], 2)
+        self.assertEqual(len(generator.find_overallocations()), 1)
+        second.start_date = start + timedelta(days=20)
+        self.assertEqual(generator.get_tasks_in_range(handover, handover + timedelta(days=10)), ["A"])
+
+        # A failing batch keeps (and indexes) the tasks before the invalid one
+        batch = [Task("C", "C", TaskType.STORY, start, 3), Task("D", "D", TaskType.STORY, start, 0),
+                 Task("E", "E", TaskType.STORY, start, 3)]
+        with self.assertRaises(GanttValidationError):
+            generator.add_tasks_batch(batch)
+        self.assertEqual(sorted(generator.tasks), ["A", "B", "C"])
+        self.assertEqual(generator.get_parallel_tasks(start), ["A", "C"])
+        with self.assertRaises(GanttValidationError):
+            generator.add_tasks_batch([Task("F", "F", TaskType.STORY, start, 1),
+                                       Task("A", "Duplicate", TaskType.STORY, start, 1)])
+        self.assertEqual(generator.get_parallel_tasks(start), ["A", "C", "F"])
+
+        print("   ✅ Back-to-back tasks do not overlap, edited tasks re-indexed, partial batches indexed")
+
+
 class TestBurndownIntegration(IntegrationTestBase):
     """Integration tests for Burndown Chart"""
 
@@ -766,6 +1083,58 @@ class TestBurndownIntegration(IntegrationTestBase):
 
         print(f"   ✅ ASCII chart saved: {filepath}")
 
+    def test_04_business_calendar_holidays(self):
+        """Test holiday-aware working days in burndown and Gantt timelines"""
+        print("\n📅 Testing Business-Day Calendar...")
+
+        calendar = BusinessCalendar(holidays=[date(2024, 3, 8)])
+        self.assertEqual(calendar.count(date(2024, 3, 4), date(2024, 3, 15)), 9)
+        self.assertFalse(calendar.is_working_day(datetime(2024, 3, 8)))
+        self.assertEqual(calendar.add_working_days(date(2024, 3, 7), 1), date(2024, 3, 11))
+        self.assertEqual(calendar.index(date(2024, 3, 15)) - calendar.index(date(2024, 3, 4)), 8)
+        self.assertEqual(BusinessCalendar(work_week=(0, 1, 2, 3)).count(date(2024, 3, 4), date(2024, 3, 15)), 8)
+
+        # Sprint Mon Mar 4 - Fri Mar 15 with a holiday on Friday Mar 8: 9 working days
+        config = BurndownConfig(chart_type=ChartType.BURNDOWN, holidays=[date(2024, 3, 8)])
+        calculator = BurndownCalculator(config, start_date=datetime(2024, 3, 4), initial_scope=45,
+                                        end_date=datetime(2024, 3, 15))
+        calculator.add_data_point(date=datetime(2024, 3, 8), completed_points=20)
+        self.assertAlmostEqual(calculator.get_latest_point().ideal_remaining, 25.0)
+
+        # Three-year portfolio burndown with daily data points
+        portfolio = BurndownCalculator(config, start_date=datetime(2024, 1, 1), initial_scope=3000,
+                                       end_date=datetime(2026, 12, 31))
+        for day in range(1, 1096):
+            portfolio.add_data_point(date=datetime(2024, 1, 1) + timedelta(days=day), completed_points=day * 2.5)
+        self.assertEqual(portfolio._calculate_work_days(portfolio.start_date, portfolio.end_date), 783)
+
+        gantt = GanttChartGenerator(GanttConfig(project_start_date=datetime(2024, 3, 4), holidays=[date(2024, 3, 8)]))
+        gantt.add_task(Task("E1", "Epic 1", TaskType.EPIC, datetime(2024, 3, 4), 11))
+        self.assertEqual(gantt.calculate_timeline()["working_days"], 9)
+
+        print("   ✅ Holiday excluded from sprint working days (9 of 10)")
+        print(f"   ✅ {len(portfolio.data_points)} daily data points over three years")
+
+    def test_05_calendar_errors_use_caller_types(self):
+        """Test invalid calendar settings raise each chart module's own ValidationError"""
+        print("\n🚫 Testing calendar validation errors...")
+
+        with self.assertRaises(CalendarValidationError):
+            BusinessCalendar(work_week=())
+        with self.assertRaises(CalendarValidationError):
+            BusinessCalendar(holidays=["2024-03-08"])
+
+        config = BurndownConfig(chart_type=ChartType.BURNDOWN, holidays=["2024-03-08"])
+        with self.assertRaises(BurndownValidationError) as burndown_error:
+            BurndownCalculator(config, start_date=datetime(2024, 3, 4), initial_scope=45)
+        self.assertIn("holidays must be date", str(burndown_error.exception))
+
+        with self.assertRaises(GanttValidationError) as gantt_error:
+            GanttChartGenerator(GanttConfig(project_start_date=datetime(2024, 3, 4), holidays=["2024-03-08"]))
+        self.assertIsInstance(gantt_error.exception.__cause__, CalendarValidationError)
+
+        print("   ✅ Calendar errors surface as burndown and Gantt ValidationErrors")
+
 
 class TestExportersIntegration(IntegrationTestBase):
     """Integration tests for Exporters module"""
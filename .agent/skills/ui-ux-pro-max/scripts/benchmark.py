@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - Index build and search latency on synthetic corpora
+
+Synthesizes CSV corpora with a given number of rows per file, laid out like
+CSV_CONFIG and the stack files. Cell text is sampled from the bundled data,
+so term statistics stay realistic. Each corpus is then measured in fresh
+processes:
+
+    cold      index build from CSV (no .idx files, empty process cache)
+    warm      index load from the persisted .idx files
+    queries   per-call latency of search(), search_stack() and
+              generate_design_system() against warm indexes, with the
+              query-result cache disabled; search_repeat replays the
+              search() workload against a filled result cache
+    memory    peak RSS of the cold-build process and of the warm process
+              (index load plus all queries)
+
+Usage:
+    python benchmark.py                                    # 1k, 10k, 100k rows
+    python benchmark.py --sizes 1000,10000 -o report.json
+    python benchmark.py -o new.json --compare baseline.json
+
+Reports are JSON and record the git commit. --compare prints the headline timing
+and memory metrics next to a previous report and exits with status 1 when
+one regressed by more than --threshold.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from core import CSV_CONFIG, DATA_DIR, NUMPY_AVAILABLE, STACK_CONFIG, _STACK_COLS
+
+# ============ CONFIGURATION ============
+REPORT_VERSION = 1
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_STACKS = ["html-tailwind", "react"]
+QUERIES_PER_FILE = 200
+DESIGN_SYSTEM_QUERIES = 20
+TYPO_RATE = 0.1  # Share of queries with a misspelled word, to exercise fuzzy matching
+MAX_CELL_WORDS = 40
+DEFAULT_THRESHOLD = 1.25
+# --compare ignores changes smaller than these absolute amounts (timer and allocator noise)
+NOISE_FLOOR = {"_s": 0.01, "_ms": 0.1, "_mb": 1.0}
+REASONING_FILE = "ui-reasoning.csv"
+
+
+# ============ CORPUS SYNTHESIS ============
+def _layout(config):
+    """Column order of a synthetic CSV: search columns, then remaining output columns"""
+    return list(dict.fromkeys(config["search_cols"] + config["output_cols"]))
+
+
+def _column_samplers(real_path, columns):
+    """
+    Word pools and cell lengths per column, taken from the bundled CSV.
+
+    Words keep their real frequencies, so sampling from the pool reproduces
+    the term distribution. Columns missing from the real file borrow from
+    every other column.
+    """
+    values = {col: [] for col in columns}
+    if real_path.exists():
+        with open(real_path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for col in columns:
+                    if row.get(col):
+                        values[col].append(row[col].split())
+
+    fallback = [cell for cells in values.values() for cell in cells] or [["lorem", "ipsum", "design"]]
+    samplers = {}
+    for col in columns:
+        cells = values[col] or fallback
+        samplers[col] = (
+            [word for cell in cells for word in cell],
+            [min(len(cell), MAX_CELL_WORDS) for cell in cells if cell],
+        )
+    return samplers
+
+
+def _write_csv(path, columns, samplers, rows, rng):
+    """Write rows of sampled text under the given header"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for _ in range(rows):
+            row = []
+            for col in columns:
+                words, lengths = samplers[col]
+                row.append(" ".join(rng.choices(words, k=rng.choice(lengths))))
+            writer.writerow(row)
+
+
+def _make_query(samplers, search_cols, rng):
+    """One to three words drawn from the search columns, sometimes with a typo"""
+    words = [rng.choice(samplers[rng.choice(search_cols)][0]) for _ in range(rng.randint(1, 3))]
+    if rng.random() < TYPO_RATE:
+        i = rng.randrange(len(words))
+        if len(words[i]) >= 6:
+            cut = rng.randrange(1, len(words[i]) - 1)
+            words[i] = words[i][:cut] + words[i][cut + 1:]
+    return " ".join(words)
+
+
+def synthesize_corpus(data_dir, rows, stacks=DEFAULT_STACKS, queries=QUERIES_PER_FILE, seed=42):
+    """
+    Write a synthetic data directory with `rows` rows in every domain CSV and
+    the selected stack CSVs. The bundled reasoning rules are copied as-is.
+
+    Returns:
+        dict of query lists: {"domains": {domain: [...]}, "stacks": {stack: [...]}, "design_system": [...]}
+    """
+    rng = random.Random(seed)
+    data_dir = Path(data_dir)
+    workload = {"domains": {}, "stacks": {}, "design_system": []}
+
+    sources = [("domains", domain, config) for domain, config in CSV_CONFIG.items()]
+    sources += [("stacks", stack, dict(_STACK_COLS, file=STACK_CONFIG[stack]["file"])) for stack in stacks]
+    for kind, name, config in sources:
+        columns = _layout(config)
+        samplers = _column_samplers(DATA_DIR / config["file"], columns)
+        _write_csv(data_dir / config["file"], columns, samplers, rows, rng)
+        workload[kind][name] = [_make_query(samplers, config["search_cols"], rng) for _ in range(queries)]
+
+    workload["design_system"] = workload["domains"]["product"][:DESIGN_SYSTEM_QUERIES]
+    if (DATA_DIR / REASONING_FILE).exists():
+        shutil.copyfile(DATA_DIR / REASONING_FILE, data_dir / REASONING_FILE)
+    return workload
+
+
+# ============ MEASUREMENT (child processes) ============
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _summary(samples):
+    """Latency percentiles in milliseconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 4)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4),
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def _phase_cold(data_dir):
+    """Build every index from CSV in a process with nothing cached"""
+    from core import warm_indexes
+
+    for idx in Path(data_dir).rglob("*.csv.idx"):
+        idx.unlink()
+    build_s = _timed(warm_indexes)
+    return {"build_s": round(build_s, 4), "peak_rss_mb": _peak_rss_mb()}
+
+
+def _phase_queries(data_dir, workload):
+    """Load persisted indexes, then time every workload query"""
+    from core import RESULT_CACHE_ENTRIES, configure_result_cache, search, search_stack, warm_indexes
+    from design_system import generate_design_system
+
+    configure_result_cache(0, None)
+    load_s = _timed(warm_indexes)
+    by_domain, all_search = {}, []
+    for domain, queries in workload["domains"].items():
+        samples = [_timed(search, query, domain) for query in queries]
+        by_domain[domain] = _summary(samples)
+        all_search.extend(samples)
+    stack_samples = [_timed(search_stack, query, stack)
+                     for stack, queries in workload["stacks"].items() for query in queries]
+    design_samples = [_timed(generate_design_system, query, "Benchmark") for query in workload["design_system"]]
+
+    configure_result_cache(max(RESULT_CACHE_ENTRIES, len(all_search)), None)
+    replay = [(query, domain) for domain, queries in workload["domains"].items() for query in queries]
+    for query, domain in replay:
+        search(query, domain)
+    repeat_samples = [_timed(search, query, domain) for query, domain in replay]
+    return {
+        "warm": {"load_s": round(load_s, 4), "peak_rss_mb": _peak_rss_mb()},
+        "search": _summary(all_search),
+        "search_by_domain": by_domain,
+        "search_stack": _summary(stack_samples),
+        "design_system": _summary(design_samples),
+        "search_repeat": _summary(repeat_samples),
+    }
+
+
+def _run_phase(phase, data_dir, workload_path):
+    """Run one measurement phase in a fresh interpreter pointed at data_dir"""
+    env = dict(os.environ, UI_PRO_MAX_DATA_DIR=str(data_dir))
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--phase", phase, "--data-dir", str(data_dir),
+           "--workload", str(workload_path)]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{phase} phase failed:\n{proc.stderr}")
+    return json.loads(proc.stdout)
+
+
+# ============ REPORT ============
+def _dir_mb(data_dir, pattern):
+    return round(sum(p.stat().st_size for p in Path(data_dir).rglob(pattern)) / (1024 * 1024), 3)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_size(rows, work_dir, stacks=DEFAULT_STACKS, queries=QUERIES_PER_FILE, seed=42):
+    """Synthesize a corpus of `rows` rows per file and measure it"""
+    data_dir = Path(work_dir) / f"rows-{rows}"
+    start = time.perf_counter()
+    workload = synthesize_corpus(data_dir, rows, stacks, queries, seed)
+    synth_s = time.perf_counter() - start
+    workload_path = data_dir / "workload.json"
+    workload_path.write_text(json.dumps(workload), encoding="utf-8")
+
+    cold = _run_phase("cold", data_dir, workload_path)
+    measured = _run_phase("queries", data_dir, workload_path)
+    return {
+        "rows": rows,
+        "files": len(workload["domains"]) + len(workload["stacks"]),
+        "synthesis_s": round(synth_s, 3),
+        "corpus_mb": _dir_mb(data_dir, "*.csv"),
+        "index_mb": _dir_mb(data_dir, "*.csv.idx"),
+        "cold": cold,
+        **measured,
+    }
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, stacks=DEFAULT_STACKS, queries=QUERIES_PER_FILE, seed=42, work_dir=None):
+    """Benchmark every corpus size and return the report dict"""
+    report = {
+        "version": REPORT_VERSION,
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": NUMPY_AVAILABLE,
+        "seed": seed,
+        "queries_per_file": queries,
+        "stacks": list(stacks),
+        "sizes": {},
+    }
+    own_dir = work_dir is None
+    work_dir = Path(work_dir or tempfile.mkdtemp(prefix="ui-pro-max-bench-"))
+    try:
+        for rows in sizes:
+            print(f"Benchmarking {rows} rows per file...", file=sys.stderr)
+            report["sizes"][str(rows)] = benchmark_size(rows, work_dir, stacks, queries, seed)
+    finally:
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def _metrics(node, prefix=""):
+    """
+    Flatten the timing and memory leaves (*_s, *_ms, *_mb) of a report.
+    Per-domain breakdowns, single-sample maxima and synthesis time are left
+    out as too noisy to gate on.
+    """
+    flat = {}
+    for key, value in node.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if key in ("search_by_domain", "max_ms", "synthesis_s"):
+            continue
+        if isinstance(value, dict):
+            flat.update(_metrics(value, path))
+        elif isinstance(value, (int, float)) and key.endswith(tuple(NOISE_FLOOR)):
+            flat[path] = value
+    return flat
+
+
+def compare_reports(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare two reports metric by metric.
+
+    Returns:
+        (lines, regressions): printable comparison lines and the metrics whose
+        ratio current / baseline exceeds threshold
+    """
+    old, new = _metrics(baseline["sizes"]), _metrics(current["sizes"])
+    lines = [f"Baseline {baseline.get('commit') or '?'} -> current {current.get('commit') or '?'}"]
+    regressions = []
+    for path in sorted(old.keys() & new.keys()):
+        if not old[path]:
+            continue
+        ratio = new[path] / old[path]
+        floor = next(amount for suffix, amount in NOISE_FLOOR.items() if path.endswith(suffix))
+        flag = ""
+        if ratio > threshold and new[path] - old[path] > floor:
+            flag = "  REGRESSION"
+            regressions.append(path)
+        lines.append(f"{path:<48} {old[path]:>12} {new[path]:>12} {ratio:>7.2f}x{flag}")
+    return lines, regressions
+
+
+# ============ CLI ============
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max search benchmark")
+    parser.add_argument("--sizes", type=str, default=",".join(map(str, DEFAULT_SIZES)), help="Rows per CSV file, comma-separated (default: 1000,10000,100000)")
+    parser.add_argument("--stacks", type=str, default=",".join(DEFAULT_STACKS), help="Stack files to synthesize, comma-separated")
+    parser.add_argument("--queries", type=int, default=QUERIES_PER_FILE, help="Queries per domain and stack file")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for corpora and queries")
+    parser.add_argument("--work-dir", type=str, default=None, help="Keep synthesized corpora here (default: temporary directory)")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument("--compare", type=str, default=None, metavar="REPORT", help="Compare against a previous JSON report")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Regression ratio for --compare (default: 1.25)")
+    # Internal: one measurement phase in a child process
+    parser.add_argument("--phase", choices=["cold", "queries"], help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", type=str, help=argparse.SUPPRESS)
+    parser.add_argument("--workload", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        workload = json.loads(Path(args.workload).read_text(encoding="utf-8"))
+        result = _phase_cold(args.data_dir) if args.phase == "cold" else _phase_queries(args.data_dir, workload)
+        print(json.dumps(result))
+        sys.exit(0)
+
+    stacks = [s for s in args.stacks.split(",") if s]
+    unknown = [s for s in stacks if s not in STACK_CONFIG]
+    if unknown:
+        parser.error(f"Unknown stack(s): {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    report = run_benchmark(sizes, stacks, args.queries, args.seed, args.work_dir)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            lines, regressions = compare_reports(json.load(f), report, args.threshold)
+        print("\n".join(lines), file=sys.stderr)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold}x", file=sys.stderr)
+            sys.exit(1)
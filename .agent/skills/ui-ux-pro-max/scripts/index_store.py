@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Index Store - Persistent on-disk BM25 index for CSV data files
+
+Each `data/*.csv` and `data/stacks/*.csv` gets a sibling `<name>.csv.idx` file
+holding the fitted BM25 statistics (vocabulary, IDF, postings, document
+lengths, BM25F field statistics), the byte offset of every CSV row, and a
+column store of the cell values. The index is memory-mapped on load, so a search only decodes the
+cells it actually returns.
+
+An index is reused while the CSV's mtime and size match the values recorded in
+its header. When they differ the CSV content hash is compared as well, so a
+`touch` or a checkout that rewrites identical bytes does not force a rebuild.
+
+Rows appended to a CSV go into delta segments `<name>.csv.idx.d1`, `.d2`, ...
+in the same format. Each segment records the byte offset its rows start at
+and the CSV size and hash at the time it was written; a CSV that grew past
+the last segment while keeping that exact prefix only needs its new bytes
+indexed. Segments store their document and field length totals and the raw
+per-field term frequency of every posting, so IDF, average lengths and the
+BM25F field normalization are recomputed over all segments without
+rereading them.
+
+File layout (little-endian, every section 8-byte aligned):
+    header      struct _HEADER
+    meta        UTF-8 JSON: version, search_cols, field_weights, field_avgdl,
+                fieldnames, terms, n_strings, blob_len, irregular_rows,
+                segment, start_offset, doc_start, total_length, field_totals
+    doc_lengths uint32[n_docs]
+    row_offsets uint64[n_docs + 1]
+    idf         float64[n_terms]
+    post_starts uint64[n_terms + 1]
+    post_docs   uint32[n_postings]
+    post_tfs    uint32[n_postings]
+    cell_ids    uint32[n_docs * n_fields]   row-major string id of each cell
+    str_offsets uint64[n_strings + 1]       string i is str_blob[off[i]:off[i + 1]]
+    str_blob    uint8[blob_len]             distinct cell values, UTF-8
+    field_lengths uint32[n_docs * n_search_cols]  tokens per search field (BM25F only)
+    post_ftfs   float64[n_postings]         BM25F pseudo tf per posting (BM25F only)
+    post_field_tfs uint32[n_postings * n_search_cols]  raw tf per posting and search field (BM25F only)
+
+The vocabulary of every index, with the trigram table used for fuzzy
+matching, is kept in `data/fuzzy-vocabulary.idx`. It records the
+(path, mtime, size) of the CSVs it was built from and is rebuilt when any
+of them differs:
+    header      struct _VOCAB_HEADER
+    meta        UTF-8 JSON: version, sources, terms, grams
+    gram_starts uint64[n_grams + 1]         term ids of gram i are gram_terms[start[i]:start[i + 1]]
+    gram_terms  uint32[n_gram_postings]
+"""
+
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+# ============ CONFIGURATION ============
+INDEX_VERSION = 5
+INDEX_SUFFIX = ".idx"
+DELTA_SUFFIX = ".d"  # Delta segment n of foo.csv is foo.csv.idx.d<n>
+
+_MAGIC = b"UXPMIDX1"
+# magic, src_mtime_ns, src_size, src_sha256, n_docs, n_terms, n_postings, avgdl, k1, b, meta_len
+_HEADER = struct.Struct("<8sqQ32sIIQdddQ")
+_FINGERPRINT_OFFSET = 8
+_FINGERPRINT = struct.Struct("<qQ32s")
+_ALIGN = 8
+NULL_ID = 0xFFFFFFFF  # cell_ids entry for a missing value (short CSV row)
+
+VOCABULARY_FILE = "fuzzy-vocabulary.idx"
+_VOCAB_MAGIC = b"UXPMVOC1"
+_VOCAB_HEADER = struct.Struct("<8sQQ")  # magic, meta_len, n_gram_postings
+
+
+# ============ SOURCE FINGERPRINT ============
+def index_path_for(csv_path):
+    """Return the index file path stored next to a CSV file."""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.name + INDEX_SUFFIX)
+
+
+def delta_path_for(csv_path, segment):
+    """Return the path of delta segment `segment` (1, 2, ...) of a CSV's index."""
+    index_path = index_path_for(csv_path)
+    return index_path.with_name(f"{index_path.name}{DELTA_SUFFIX}{segment}")
+
+
+def remove_deltas(csv_path):
+    """Delete every delta segment of a CSV's index (after a full rebuild)."""
+    index_path = index_path_for(csv_path)
+    for path in index_path.parent.glob(f"{index_path.name}{DELTA_SUFFIX}*"):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def source_stat(csv_path):
+    """Return (mtime_ns, size) of a CSV file."""
+    st = os.stat(csv_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def content_hash(csv_path):
+    """Return the SHA-256 digest of a CSV file's bytes."""
+    with open(csv_path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+# ============ CSV PARSING ============
+def _lines(data, consumed):
+    """Yield decoded lines of `data`, recording bytes consumed in `consumed[0]`.
+
+    Line endings are normalized to '\\n' to match text-mode reads, so records
+    parse exactly as they would through `open(..., encoding='utf-8')`.
+    """
+    for raw in data.splitlines(keepends=True):
+        consumed[0] += len(raw)
+        line = raw.decode("utf-8")
+        if line.endswith("\r\n"):
+            line = line[:-2] + "\n"
+        elif line.endswith("\r"):
+            line = line[:-1] + "\n"
+        yield line
+
+
+def _row_dict(fieldnames, values):
+    """Build a row dict with the same shape csv.DictReader produces."""
+    row = dict(zip(fieldnames, values))
+    if len(values) < len(fieldnames):
+        for key in fieldnames[len(values):]:
+            row[key] = None
+    elif len(values) > len(fieldnames):
+        row[None] = values[len(fieldnames):]
+    return row
+
+
+def read_csv_with_offsets(csv_path):
+    """
+    Parse a CSV file and record the byte range of every data row.
+
+    Returns:
+        (fieldnames, rows, offsets, digest) where rows are dicts as from
+        csv.DictReader, row i spans bytes offsets[i]:offsets[i + 1], and
+        digest is the SHA-256 of the file content.
+    """
+    with open(csv_path, "rb") as f:
+        data = f.read()
+
+    consumed = [0]
+    reader = csv.reader(_lines(data, consumed))
+    fieldnames = next(reader, [])
+    rows, offsets = [], [consumed[0]]
+    for values in reader:
+        if not values:
+            # csv.DictReader skips blank lines; fold them into the next row's span
+            offsets[-1] = consumed[0]
+            continue
+        rows.append(_row_dict(fieldnames, values))
+        offsets.append(consumed[0])
+    return fieldnames, rows, offsets, hashlib.sha256(data).digest()
+
+
+def read_appended_rows(csv_path, start, prefix_digest, fieldnames):
+    """
+    Parse the rows appended to a CSV after byte `start`.
+
+    Returns:
+        (rows, offsets, digest) like read_csv_with_offsets() for the new rows
+        only (offsets are absolute), or None if the first `start` bytes no
+        longer hash to prefix_digest or `start` is not a row boundary
+    """
+    with open(csv_path, "rb") as f:
+        data = f.read()
+    if len(data) < start or start == 0:
+        return None
+    prefix = hashlib.sha256(data[:start])
+    if prefix.digest() != prefix_digest:
+        return None
+    # The old last row must have been complete: a newline on either side of the boundary
+    if data[start - 1:start] not in (b"\n", b"\r") and data[start:start + 1] not in (b"\n", b"\r"):
+        return None
+
+    consumed = [start]
+    reader = csv.reader(_lines(data[start:], consumed))
+    rows, offsets = [], [start]
+    for values in reader:
+        if not values:
+            offsets[-1] = consumed[0]
+            continue
+        rows.append(_row_dict(fieldnames, values))
+        offsets.append(consumed[0])
+    prefix.update(data[start:])
+    return rows, offsets, prefix.digest()
+
+
+def read_rows(csv_path, fieldnames, spans):
+    """Read and parse CSV rows from their (start, end) byte ranges."""
+    rows = []
+    with open(csv_path, "rb") as f:
+        for start, end in spans:
+            f.seek(start)
+            values = next(csv.reader(_lines(f.read(end - start), [0])), [])
+            rows.append(_row_dict(fieldnames, values))
+    return rows
+
+
+# ============ INDEX FILE ============
+class IndexFile:
+    """A memory-mapped index file. Array attributes are zero-copy memoryviews."""
+
+    def __init__(self, path, mm, header, meta, arrays):
+        self.path = path
+        self._mmap = mm
+        self.n_docs, self.n_terms, self.n_postings = header[4], header[5], header[6]
+        self.avgdl, self.k1, self.b = header[7], header[8], header[9]
+        self.search_cols = meta["search_cols"]
+        self.fieldnames = meta["fieldnames"]
+        self.terms = meta["terms"]
+        self.doc_lengths = arrays["doc_lengths"]
+        self.row_offsets = arrays["row_offsets"]
+        self.idf = arrays["idf"]
+        self.post_starts = arrays["post_starts"]
+        self.post_docs = arrays["post_docs"]
+        self.post_tfs = arrays["post_tfs"]
+        self.cell_ids = arrays["cell_ids"]
+        self.str_offsets = arrays["str_offsets"]
+        self.str_blob = arrays["str_blob"]
+        self.irregular_rows = meta["irregular_rows"]
+        self.field_weights = meta["field_weights"]
+        self.field_avgdl = meta["field_avgdl"]
+        self.field_lengths = arrays["field_lengths"]
+        self.post_ftfs = arrays["post_ftfs"]
+        self.post_field_tfs = arrays["post_field_tfs"]
+        # Segment chain: CSV (mtime_ns, size, sha256) covered, first row byte and document index
+        self.source = (header[1], header[2], header[3])
+        self.segment = meta["segment"]
+        self.start_offset = meta["start_offset"]
+        self.doc_start = meta["doc_start"]
+        self.total_length = meta["total_length"]
+        self.field_totals = meta["field_totals"]
+
+
+def _pad(n):
+    return (-n) % _ALIGN
+
+
+def _sections(n_docs, n_terms, n_postings, meta):
+    """Return (name, typecode, length) for each array section in file order."""
+    return [
+        ("doc_lengths", "I", n_docs),
+        ("row_offsets", "Q", n_docs + 1),
+        ("idf", "d", n_terms),
+        ("post_starts", "Q", n_terms + 1),
+        ("post_docs", "I", n_postings),
+        ("post_tfs", "I", n_postings),
+        ("cell_ids", "I", n_docs * len(meta["fieldnames"])),
+        ("str_offsets", "Q", meta["n_strings"] + 1),
+        ("str_blob", "B", meta["blob_len"]),
+        ("field_lengths", "I", n_docs * len(meta["field_weights"] or ())),
+        ("post_ftfs", "d", n_postings if meta["field_weights"] else 0),
+        ("post_field_tfs", "I", n_postings * len(meta["field_weights"] or ())),
+    ]
+
+
+# ============ COLUMN STORE ============
+def build_column_store(fieldnames, rows):
+    """
+    Intern the cell values of parsed rows.
+
+    Every distinct value is stored once; cells refer to it by id.
+
+    Returns:
+        (arrays, irregular_rows): the cell_ids / str_offsets / str_blob
+        sections, and the indices of rows with more values than fieldnames,
+        which are read from the CSV instead
+    """
+    ids = {}
+    cell_ids, str_offsets, blob = array("I"), array("Q", [0]), bytearray()
+    irregular_rows = []
+    for idx, row in enumerate(rows):
+        if None in row:
+            irregular_rows.append(idx)
+        for field in fieldnames:
+            value = row.get(field)
+            if value is None:
+                cell_ids.append(NULL_ID)
+                continue
+            string_id = ids.get(value)
+            if string_id is None:
+                string_id = ids[value] = len(ids)
+                blob += value.encode("utf-8")
+                str_offsets.append(len(blob))
+            cell_ids.append(string_id)
+    return {"cell_ids": cell_ids, "str_offsets": str_offsets, "str_blob": bytes(blob)}, irregular_rows
+
+
+class ColumnStore:
+    """
+    Read-only cell values of a CSV, decoded on demand.
+
+    Works over the memory-mapped sections of an index file or over the arrays
+    from build_column_store(). Rows are materialized only for the requested
+    indices and columns.
+    """
+
+    def __init__(self, csv_path, fieldnames, row_offsets, cell_ids, str_offsets, str_blob, irregular_rows=()):
+        self.csv_path = csv_path
+        self.fieldnames = fieldnames
+        self.row_offsets = row_offsets
+        self.cell_ids = cell_ids
+        self.str_offsets = str_offsets
+        self.str_blob = str_blob
+        self.irregular_rows = frozenset(irregular_rows)
+
+    @classmethod
+    def from_index_file(cls, csv_path, index_file):
+        return cls(csv_path, index_file.fieldnames, index_file.row_offsets, index_file.cell_ids,
+                   index_file.str_offsets, index_file.str_blob, index_file.irregular_rows)
+
+    def _string(self, string_id):
+        if string_id == NULL_ID:
+            return None
+        return str(self.str_blob[self.str_offsets[string_id]:self.str_offsets[string_id + 1]], "utf-8")
+
+    def rows(self, indices, columns=None):
+        """
+        Return a dict per row index, shaped like csv.DictReader rows but
+        limited to `columns` when given.
+        """
+        n_fields = len(self.fieldnames)
+        fields = [(j, field) for j, field in enumerate(self.fieldnames) if columns is None or field in columns]
+
+        irregular = [idx for idx in indices if idx in self.irregular_rows]
+        spans = [(self.row_offsets[idx], self.row_offsets[idx + 1]) for idx in irregular]
+        parsed = dict(zip(irregular, read_rows(self.csv_path, self.fieldnames, spans))) if irregular else {}
+
+        rows = []
+        for idx in indices:
+            if idx in parsed:
+                row = parsed[idx]
+                rows.append(row if columns is None else {field: row[field] for _, field in fields})
+                continue
+            base = idx * n_fields
+            rows.append({field: self._string(self.cell_ids[base + j]) for j, field in fields})
+        return rows
+
+
+class SegmentedColumnStore:
+    """ColumnStores of consecutive index segments, addressed by global row index."""
+
+    def __init__(self, stores):
+        self.stores = stores
+        self.fieldnames = stores[0].fieldnames
+        self.starts = [0]
+        for store in stores:
+            self.starts.append(self.starts[-1] + len(store.row_offsets) - 1)
+
+    def rows(self, indices, columns=None):
+        """Return row dicts for global row indices, as ColumnStore.rows()"""
+        by_store = {}
+        for idx in indices:
+            part = bisect_right(self.starts, idx) - 1
+            by_store.setdefault(part, []).append(idx)
+        found = {}
+        for part, part_indices in by_store.items():
+            start = self.starts[part]
+            local = self.stores[part].rows([idx - start for idx in part_indices], columns)
+            found.update(zip(part_indices, local))
+        return [found[idx] for idx in indices]
+
+
+def save_index(index_path, source, meta, stats, arrays):
+    """
+    Atomically write an index file.
+
+    Args:
+        index_path: Destination path
+        source: (mtime_ns, size, sha256_digest) of the indexed CSV
+        meta: JSON-serializable dict with search_cols, field_weights (or
+              None), field_avgdl, fieldnames, terms, irregular_rows and the
+              segment keys: segment (0 = base), start_offset, doc_start,
+              total_length, field_totals
+        stats: (avgdl, k1, b)
+        arrays: dict of section name -> array.array (str_blob: bytes), see _sections()
+    """
+    meta = dict(meta, version=INDEX_VERSION, n_strings=len(arrays["str_offsets"]) - 1,
+                blob_len=len(arrays["str_blob"]))
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    n_docs = len(arrays["doc_lengths"])
+    n_terms = len(arrays["idf"])
+    n_postings = len(arrays["post_docs"])
+    header = _HEADER.pack(_MAGIC, source[0], source[1], source[2], n_docs, n_terms, n_postings,
+                          stats[0], stats[1], stats[2], len(meta_bytes))
+
+    sections = [(typecode, arrays[name]) for name, typecode, _ in _sections(n_docs, n_terms, n_postings, meta)]
+    _write_file(index_path, header + meta_bytes, sections)
+
+
+def _write_file(path, head, sections):
+    """Atomically write `head` and the (typecode, array) sections, each 8-byte aligned, little-endian"""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(head)
+            f.write(b"\0" * _pad(len(head)))
+            for typecode, arr in sections:
+                if isinstance(arr, (bytes, bytearray)):
+                    arr = array(typecode, arr)
+                if arr.typecode != typecode or sys.byteorder != "little":
+                    arr = array(typecode, arr)
+                    if sys.byteorder != "little":
+                        arr.byteswap()
+                raw = arr.tobytes()
+                f.write(raw)
+                f.write(b"\0" * _pad(len(raw)))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def refresh_fingerprint(index_path, mtime_ns, size, digest):
+    """Record a new CSV mtime/size in place after a content-hash match."""
+    try:
+        with open(index_path, "r+b") as f:
+            f.seek(_FINGERPRINT_OFFSET)
+            f.write(_FINGERPRINT.pack(mtime_ns, size, digest))
+    except OSError:
+        pass
+
+
+def load_segments(csv_path, search_cols, field_weights=None):
+    """
+    Memory-map the base index of a CSV file and its chain of delta segments.
+
+    Returns:
+        (segments, append_from): segments is the list of IndexFiles, base
+        first, or None if the index is missing, corrupt, built for other
+        search columns or field weights, or stale relative to the CSV.
+        append_from is None when the segments cover the whole CSV, otherwise
+        the byte offset after which the CSV grew; pass it to
+        read_appended_rows(), which also verifies that the bytes before it
+        are unchanged.
+    """
+    base = open_index_file(index_path_for(csv_path), search_cols, field_weights)
+    if base is None or base.segment != 0:
+        return None, None
+    segments = [base]
+    while True:
+        last = segments[-1]
+        delta = open_index_file(delta_path_for(csv_path, len(segments)), search_cols, field_weights)
+        if (delta is None or delta.segment != len(segments) or delta.start_offset != last.source[1]
+                or delta.doc_start != last.doc_start + last.n_docs):
+            break
+        segments.append(delta)
+
+    last = segments[-1]
+    try:
+        mtime_ns, size = source_stat(csv_path)
+    except OSError:
+        return None, None
+    if (mtime_ns, size) == last.source[:2]:
+        return segments, None
+    if size == last.source[1]:
+        digest = content_hash(csv_path)
+        if digest != last.source[2]:
+            return None, None
+        refresh_fingerprint(last.path, mtime_ns, size, digest)
+        return segments, None
+    if size > last.source[1]:
+        return segments, last.source[1]
+    return None, None
+
+
+def _read_array(view, offset, typecode, length):
+    """Array section at offset of a mapped file: a zero-copy cast, or a byte-swapped copy on big-endian hosts"""
+    nbytes = length * array(typecode).itemsize
+    if offset + nbytes > len(view):
+        raise ValueError("truncated section")
+    if sys.byteorder == "little":
+        return view[offset:offset + nbytes].cast(typecode), offset + nbytes + _pad(nbytes)
+    arr = array(typecode, bytes(view[offset:offset + nbytes]))
+    arr.byteswap()
+    return arr, offset + nbytes + _pad(nbytes)
+
+
+def open_index_file(index_path, search_cols, field_weights=None):
+    """
+    Memory-map one index segment file without checking it against the CSV.
+
+    Returns:
+        IndexFile, or None if it is missing, corrupt, or built for other
+        search columns or field weights.
+    """
+    try:
+        with open(index_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if len(mm) < _HEADER.size:
+            return None
+        header = _HEADER.unpack_from(mm, 0)
+        if header[0] != _MAGIC:
+            return None
+        meta_end = _HEADER.size + header[10]
+        meta = json.loads(bytes(mm[_HEADER.size:meta_end]).decode("utf-8"))
+        if meta.get("version") != INDEX_VERSION or meta.get("search_cols") != list(search_cols):
+            return None
+        if meta.get("field_weights") != (list(field_weights) if field_weights is not None else None):
+            return None
+
+        view = memoryview(mm)
+        offset = meta_end + _pad(meta_end)
+        arrays = {}
+        for name, typecode, length in _sections(header[4], header[5], header[6], meta):
+            arrays[name], offset = _read_array(view, offset, typecode, length)
+    except (OSError, ValueError, KeyError, struct.error, UnicodeDecodeError):
+        return None
+
+    return IndexFile(index_path, mm, header, meta, arrays)
+
+
+# ============ FUZZY VOCABULARY ============
+def save_vocabulary(path, sources, terms, grams, gram_starts, gram_terms):
+    """
+    Atomically write the fuzzy-matching vocabulary file.
+
+    Args:
+        path: Destination path
+        sources: JSON-serializable (path, mtime_ns, size) of every CSV the
+                 vocabulary was built from
+        terms: Sorted vocabulary
+        grams: Trigrams, in gram_starts order
+        gram_starts: array('Q'), gram i lists gram_terms[gram_starts[i]:gram_starts[i + 1]]
+        gram_terms: array('I') of term ids
+    """
+    meta = {"version": INDEX_VERSION, "sources": sources, "terms": terms, "grams": grams}
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    header = _VOCAB_HEADER.pack(_VOCAB_MAGIC, len(meta_bytes), len(gram_terms))
+    _write_file(path, header + meta_bytes, [("Q", gram_starts), ("I", gram_terms)])
+
+
+def load_vocabulary(path, sources):
+    """
+    Memory-map the fuzzy-matching vocabulary file.
+
+    Returns:
+        (terms, grams, gram_starts, gram_terms) as passed to save_vocabulary,
+        or None if the file is missing, corrupt, or was built from other
+        versions of the CSVs than `sources`
+    """
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, meta_len, n_gram_postings = _VOCAB_HEADER.unpack_from(mm, 0)
+        if magic != _VOCAB_MAGIC:
+            return None
+        meta_end = _VOCAB_HEADER.size + meta_len
+        meta = json.loads(bytes(mm[_VOCAB_HEADER.size:meta_end]).decode("utf-8"))
+        if meta.get("version") != INDEX_VERSION or meta.get("sources") != sources:
+            return None
+        view = memoryview(mm)
+        gram_starts, offset = _read_array(view, meta_end + _pad(meta_end), "Q", len(meta["grams"]) + 1)
+        gram_terms, _ = _read_array(view, offset, "I", n_gram_postings)
+    except (OSError, ValueError, KeyError, struct.error, UnicodeDecodeError):
+        return None
+    return meta["terms"], meta["grams"], gram_starts, gram_terms
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Profiler - Phase timing spans, counters and optional cProfile capture
+
+Instrumented code marks phases with `with span("name"):` and counts work
+with `count("name", n)`. Both are no-ops until start() is called: span()
+then returns a shared null context and count() returns immediately, so
+the instrumentation costs one global lookup per call when disabled.
+
+While enabled, spans are timed with the monotonic perf_counter clock and
+aggregated per nesting path ("design_system > search > score"), counters
+are summed, and cProfile can additionally record the calling thread.
+Spans opened in worker threads start a new path of their own.
+
+Usage:
+    profiler.start(cprofile=False)
+    ...                                  # instrumented work
+    report = profiler.stop()             # JSON-serializable dict
+    print(profiler.format_report(report))
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+# ============ CONFIGURATION ============
+CPROFILE_TOP = 25  # Functions listed from the cProfile capture, by cumulative time
+PATH_SEP = " > "
+
+_profile = None  # Active _Profile, or None when profiling is disabled
+
+
+# ============ SPANS AND COUNTERS ============
+class _Profile:
+    """Span and counter totals of one profiling session"""
+
+    def __init__(self, cprofile=False):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.spans = {}  # path -> [calls, total_s, max_s], in order of first entry
+        self.counters = defaultdict(int)
+        self.cprofile = None
+        if cprofile:
+            import cProfile  # Only paid for when a capture is requested
+            self.cprofile = cProfile.Profile()
+        self.started = time.perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+
+class _Span:
+    __slots__ = ("profile", "name", "path", "start")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        profile = self.profile
+        stack = getattr(profile.local, "stack", None)
+        if stack is None:
+            stack = profile.local.stack = []
+        stack.append(self.name)
+        self.path = PATH_SEP.join(stack)
+        with profile.lock:
+            profile.spans.setdefault(self.path, [0, 0.0, 0.0])
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        profile = self.profile
+        profile.local.stack.pop()
+        with profile.lock:
+            totals = profile.spans[self.path]
+            totals[0] += 1
+            totals[1] += elapsed
+            totals[2] = max(totals[2], elapsed)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing one phase; a shared no-op when profiling is off"""
+    profile = _profile
+    if profile is None:
+        return _NULL_SPAN
+    return _Span(profile, name)
+
+
+def count(name, amount=1):
+    """Add amount to a counter (documents, tokens, postings, ...) when profiling"""
+    profile = _profile
+    if profile is None:
+        return
+    with profile.lock:
+        profile.counters[name] += amount
+
+
+def enabled():
+    """Whether a profiling session is active"""
+    return _profile is not None
+
+
+# ============ SESSIONS ============
+def start(cprofile=False):
+    """Begin a profiling session (replacing any active one)"""
+    global _profile
+    if _profile is not None and _profile.cprofile is not None:
+        _profile.cprofile.disable()
+    _profile = _Profile(cprofile)
+
+
+def stop():
+    """End the active session and return its report (None if none was active)"""
+    global _profile
+    profile, _profile = _profile, None
+    if profile is None:
+        return None
+    if profile.cprofile is not None:
+        profile.cprofile.disable()
+    return _report(profile)
+
+
+def _report(profile):
+    total_s = time.perf_counter() - profile.started
+    with profile.lock:
+        spans = {path: {"calls": calls, "total_ms": round(total * 1000, 3), "max_ms": round(longest * 1000, 3)}
+                 for path, (calls, total, longest) in profile.spans.items()}
+        counters = dict(profile.counters)
+    report = {"total_ms": round(total_s * 1000, 3), "spans": spans, "counters": counters}
+    if profile.cprofile is not None:
+        report["cprofile"] = _cprofile_top(profile.cprofile)
+    return report
+
+
+def _cprofile_top(cprofile, limit=CPROFILE_TOP):
+    """Top functions of a cProfile capture by cumulative time"""
+    import pstats
+    stats = pstats.Stats(cprofile)
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({function})",
+            "calls": calls,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: -row["cumtime_ms"])
+    return rows[:limit]
+
+
+# ============ OUTPUT ============
+def format_report(report):
+    """Human-readable table of a report: nested spans, counters, cProfile top list"""
+    lines = [f"Profile: {report['total_ms']:.3f} ms total", "",
+             f"{'span':<56} {'calls':>7} {'total ms':>11} {'max ms':>10}"]
+    for path, stat in report["spans"].items():
+        parts = path.split(PATH_SEP)
+        label = "  " * (len(parts) - 1) + parts[-1]
+        lines.append(f"{label:<56} {stat['calls']:>7} {stat['total_ms']:>11.3f} {stat['max_ms']:>10.3f}")
+    if report["counters"]:
+        lines += ["", f"{'counter':<56} {'value':>7}"]
+        lines += [f"{name:<56} {value:>7}" for name, value in sorted(report["counters"].items())]
+    if report.get("cprofile"):
+        lines += ["", f"{'function (cProfile, by cumulative time)':<80} {'calls':>8} {'cum ms':>10} {'tot ms':>10}"]
+        for row in report["cprofile"]:
+            name = row["function"] if len(row["function"]) <= 80 else "..." + row["function"][-77:]
+            lines.append(f"{name:<80} {row['calls']:>8} {row['cumtime_ms']:>10.3f} {row['tottime_ms']:>10.3f}")
+    return "\n".join(lines)
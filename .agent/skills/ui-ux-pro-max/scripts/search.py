@@ -3,20 +3,63 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python search.py "<query>" --stack nextjs,shadcn,react [--per-stack 2]
        python search.py "<query>" --design-system [-p "Project Name"]
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py "<query>" --design-system --persist [-p "Project Name"] --pages home,pricing,dashboard
+       python search.py --batch queries.txt [--domain <domain>] [--json]
 
-Domains: style, prompt, color, chart, landing, product, ux, typography
-Stacks: html-tailwind, react, nextjs
+Misspelled words are matched to the nearest indexed terms (disable with --no-fuzzy).
+Search columns are scored as one text (BM25); --ranking bm25f weighs them per column, so matches in
+name/keyword columns outrank matches in long descriptions.
+
+Result cache:
+  Repeat queries are answered from an in-memory cache; --cache-file keeps results in a SQLite file
+  shared across runs (or set UI_PRO_MAX_RESULT_CACHE). Any CSV change invalidates them. --no-cache disables.
+
+Domains: style, prompt, color, chart, landing, product, ux, typography, all (every domain and stack in one pass)
+Stacks: html-tailwind, react, nextjs, ... ; "all" or a comma-separated list searches those stacks together,
+        ranked in one list with each result tagged by its stack (--per-stack caps results per stack)
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+  --pages      Create several page overrides in one run (comma-separated); MASTER.md is built once
+  --pages-file Read pages from a manifest: one "page" or "page: extra query" per line, # comments
+               Files are only rewritten when more than their Generated timestamp changes
+
+Profiling (written to stderr, so stdout output is unchanged):
+  --profile       Phase timings (index load/build, fuzzy, scoring, rows, reasoning, rendering) and counters
+  --profile-json  The same as one JSON line on stderr, or into FILE
+  --cprofile      Add the top functions of a cProfile capture to the report
+
+Index maintenance:
+  Rows appended to a data CSV are indexed on their own into delta segments, which are folded back
+  into the base index by the search that finds them piled up.
+  --compact    Rebuild the indexes of the given CSVs (default: every one with delta segments) now
+
+Batch mode:
+  --batch      Read one query per line from FILE ("-" for stdin) and score them in one pass
+
+Server mode (warm indexes, JSON-lines requests; see server.py for the protocol):
+  --serve      Answer requests on stdin/stdout
+  --socket     Listen on a Unix socket instead of stdio (owner-only; only a stale socket file is replaced)
+  --output-dir Directory persist requests write to (without it the server refuses them)
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
+import atexit
+import json
+import sys
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, RANKING, RANKINGS, RESULT_CACHE_FILE, compact_indexes, configure_result_cache, search, search_many, search_stack
 from design_system import generate_design_system, persist_design_system
+import profiler
+
+
+def format_corrections(corrections):
+    """One line listing misspelled query words and the terms they matched"""
+    fixes = ", ".join(f"{token} -> {'/'.join(terms)}" for token, terms in corrections.items())
+    return f"**Fuzzy matched:** {fixes}"
 
 
 def format_output(result):
@@ -31,6 +74,8 @@ def format_output(result):
     else:
         output.append(f"## UI Pro Max Search Results")
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
+    if result.get("corrections"):
+        output.append(format_corrections(result["corrections"]))
     output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
 
     for i, row in enumerate(result['results'], 1):
@@ -45,13 +90,77 @@ def format_output(result):
     return "\n".join(output)
 
 
+def format_all_output(result):
+    """Format a --domain all result: best matches first, partitions without hits omitted"""
+    output = [f"## UI Pro Max Search Results (all domains)"]
+    output.append(f"**Query:** {result['query']} | **Best domain:** {result['best_domain'] or '-'} | **Best stack:** {result['best_stack'] or '-'}")
+    if result.get("corrections"):
+        output.append(format_corrections(result["corrections"]))
+    output.append("")
+    for entry in result["ranking"]:
+        if "domain" in entry:
+            output.append(format_output(result["domains"][entry["domain"]]))
+        else:
+            output.append(format_output(result["stacks"][entry["stack"]]))
+    return "\n".join(output)
+
+
+def read_pages_manifest(path):
+    """Read (page, query) pairs from a manifest: "page" or "page: query" per line, # comments"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    pages = []
+    for line in lines:
+        if line:
+            name, _, query = line.partition(":")
+            pages.append((name.strip(), query.strip() or None))
+    return pages
+
+
+def write_profile(human=True, json_path=None):
+    """Stop profiling and write its report: a table and/or JSON ("-" = one line on stderr)"""
+    report = profiler.stop()
+    if report is None:
+        return
+    if human:
+        print(profiler.format_report(report), file=sys.stderr)
+    if json_path == "-":
+        print(json.dumps(report, ensure_ascii=False), file=sys.stderr)
+    elif json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def read_batch_queries(path):
+    """Read one query per line from a file or stdin ("-"), skipping blank lines"""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()) + ["all"], help="Search domain ('all' searches every domain and stack)")
+    parser.add_argument("--stack", "-s", type=str, default=None, help="Stack-specific search (html-tailwind, react, nextjs), 'all', or comma-separated stacks")
+    parser.add_argument("--per-stack", type=int, default=None, metavar="N", help="With several stacks, at most N results per stack")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--no-fuzzy", action="store_true", help="Match query words exactly (no typo correction)")
+    parser.add_argument("--ranking", choices=RANKINGS, default=RANKING, help=f"Ranking function: bm25f weighs columns, bm25 treats them as one text (default: {RANKING})")
+    parser.add_argument("--cache-file", type=str, default=RESULT_CACHE_FILE, metavar="FILE", help="Also keep query results in this SQLite file across runs")
+    parser.add_argument("--no-cache", action="store_true", help="Compute every result from the indexes (no result cache)")
+    parser.add_argument("--batch", type=str, default=None, metavar="FILE", help="Batch domain search: one query per line from FILE ('-' for stdin)")
+    # Index maintenance
+    parser.add_argument("--compact", type=str, nargs="*", default=None, metavar="CSV", help="Merge index delta segments into the base index of these data CSVs (default: all) and exit")
+    # Server mode
+    parser.add_argument("--serve", action="store_true", help="Run a warm JSON-lines search server on stdin/stdout")
+    parser.add_argument("--socket", type=str, default=None, metavar="PATH", help="With --serve, listen on a Unix socket at PATH")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent workers: --serve stdio requests (default: 8) or design-system domain searches (default: one per domain, 1 = sequential)")
+    parser.add_argument("--executor", choices=["thread", "process"], default=None, help="Pool for design-system domain searches (default: thread)")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
@@ -59,19 +168,79 @@ if __name__ == "__main__":
     # Persistence (Master + Overrides pattern)
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
-    parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    parser.add_argument("--pages", type=str, default=None, help="Create several page override files, comma-separated (e.g. home,pricing,dashboard)")
+    parser.add_argument("--pages-file", type=str, default=None, metavar="FILE", help="Page manifest: one 'page' or 'page: query' per line")
+    parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory); with --serve, enables persist requests")
+    # Profiling
+    parser.add_argument("--profile", action="store_true", help="Print phase timings and counters to stderr")
+    parser.add_argument("--profile-json", type=str, nargs="?", const="-", default=None, metavar="FILE", help="Write the profile as JSON to FILE (default: one line on stderr)")
+    parser.add_argument("--cprofile", action="store_true", help="Include the top cProfile functions in the profile")
 
     args = parser.parse_args()
 
+    if args.batch and (args.design_system or args.stack or args.domain == "all"):
+        parser.error("--batch supports single-domain search only")
+    if args.batch and (args.serve or args.compact is not None):
+        parser.error("--batch cannot be combined with --serve or --compact")
+    if args.socket and not args.serve:
+        parser.error("--socket requires --serve")
+    if args.query is None and not (args.serve or args.batch) and args.compact is None:
+        parser.error("the following arguments are required: query")
+    if (args.pages or args.pages_file) and not (args.design_system and args.persist):
+        parser.error("--pages/--pages-file require --design-system --persist")
+    if args.stack:
+        unknown = [name for name in args.stack.split(",") if name.strip() not in AVAILABLE_STACKS + ["all"]]
+        if unknown:
+            parser.error(f"argument --stack/-s: invalid choice: {', '.join(unknown)} (choose from {', '.join(AVAILABLE_STACKS)}, all)")
+    if args.per_stack is not None and not (args.stack and (args.stack == "all" or "," in args.stack)):
+        parser.error("--per-stack requires --stack all or several comma-separated stacks")
+
+    if (args.profile or args.profile_json or args.cprofile) and args.serve:
+        parser.error("--profile/--profile-json/--cprofile profile one run; use the server's stats method with --serve")
+
+    if args.no_cache:
+        configure_result_cache(0, None)
+    elif args.cache_file != RESULT_CACHE_FILE:
+        configure_result_cache(path=args.cache_file)
+
+    pages = [page for page in (args.pages or "").split(",") if page.strip()]
+    if args.pages_file:
+        pages += read_pages_manifest(args.pages_file)
+
+    if args.profile or args.profile_json or args.cprofile:
+        profiler.start(cprofile=args.cprofile)
+        atexit.register(write_profile, args.profile or not args.profile_json, args.profile_json)
+
+    # Index maintenance
+    if args.compact is not None:
+        for path in compact_indexes(args.compact):
+            print(f"Compacted index of {path}")
+    # Server mode
+    elif args.serve:
+        from server import DEFAULT_WORKERS, serve
+        try:
+            serve(args.socket, args.workers or DEFAULT_WORKERS, args.output_dir)
+        except RuntimeError as e:
+            sys.exit(f"Error: {e}")
+    # Batch domain search
+    elif args.batch:
+        results = search_many(read_batch_queries(args.batch), args.domain, args.max_results, not args.no_fuzzy, args.ranking)
+        if args.json:
+            print(json.dumps(results, indent=2, ensure_ascii=False))
+        else:
+            print("\n".join(format_output(result) for result in results))
     # Design system takes priority
-    if args.design_system:
+    elif args.design_system:
         result = generate_design_system(
             args.query, 
             args.project_name, 
             args.format,
             persist=args.persist,
             page=args.page,
-            output_dir=args.output_dir
+            output_dir=args.output_dir,
+            workers=args.workers,
+            executor=args.executor,
+            pages=pages
         )
         print(result)
         
@@ -81,8 +250,8 @@ if __name__ == "__main__":
             print("\n" + "=" * 60)
             print(f"✅ Design system persisted to design-system/{project_slug}/")
             print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
-            if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
+            page_names = ([args.page] if args.page else []) + [p if isinstance(p, str) else p[0] for p in pages]
+            for page_filename in dict.fromkeys(page.strip().lower().replace(' ', '-') for page in page_names):
                 print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
             print("")
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
@@ -90,17 +259,17 @@ if __name__ == "__main__":
             print("=" * 60)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        result = search_stack(args.query, args.stack, args.max_results, not args.no_fuzzy, args.ranking, args.per_stack)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = search(args.query, args.domain, args.max_results, not args.no_fuzzy, args.ranking)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
+        elif args.domain == "all":
+            print(format_all_output(result))
         else:
             print(format_output(result))
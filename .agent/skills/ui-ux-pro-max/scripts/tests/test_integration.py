@@ -0,0 +1,1379 @@
+#!/usr/bin/env python3
+"""
+Integration Tests for UI/UX Pro Max Search
+
+These tests run the real search engine over a private copy of data/. Each
+optimized path is compared against the straightforward implementation it
+replaced (a scan of every document, a linear rule scan, one search per
+query, a full index rebuild, a fresh computation) or has its invariants
+checked directly.
+
+Author: UI/UX Pro Max Skill
+License: MIT
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+import csv
+import io
+import json
+import random
+import shutil
+import socket
+import stat
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import core
+from core import search, search_many, search_stack, compact_index, configure_result_cache, result_cache_info
+import design_system
+from design_system import (DesignSystemGenerator, ReasoningIndex, _without_timestamp, format_master_md,
+                           format_page_override_md, persist_design_system, run_searches)
+from index_store import (ColumnStore, SegmentedColumnStore, build_column_store, delta_path_for, index_path_for,
+                         load_segments, read_csv_with_offsets)
+import profiler
+import result_cache
+from result_cache import ResultCache
+from search import read_pages_manifest
+import server as server_module
+from server import SearchServer, serve_stdio
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+
+class SearchTestBase(unittest.TestCase):
+    """Base class: every test class searches its own copy of data/ with fresh caches"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Copy the data files (without indexes) into a temporary data directory"""
+        cls.original_data_dir = core.DATA_DIR
+        cls.work_dir = tempfile.mkdtemp(prefix="uipro-test-")
+        cls.data_dir = Path(cls.work_dir) / "data"
+        shutil.copytree(cls.original_data_dir, cls.data_dir, ignore=shutil.ignore_patterns("*.idx*", "*.lock"))
+        core.DATA_DIR = cls.data_dir
+        core.clear_cache()
+
+    @classmethod
+    def tearDownClass(cls):
+        core.DATA_DIR = cls.original_data_dir
+        configure_result_cache()
+        core.clear_cache()
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+
+    def load_rows(self, filename):
+        """Rows of a data file as dicts"""
+        with open(self.data_dir / filename, 'r', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def sample_queries(self, domain, count=20, seed=7):
+        """Queries of up to three words drawn from a domain's own search columns"""
+        config = core.CSV_CONFIG[domain]
+        rows = self.load_rows(config["file"])
+        rng = random.Random(seed)
+        queries = []
+        for row in rng.sample(rows, min(count, len(rows))):
+            words = core.BM25().tokenize(" ".join(row.get(col) or "" for col in config["search_cols"]))
+            if words:
+                queries.append(" ".join(rng.sample(words, min(3, len(words)))))
+        return queries
+
+    def append_rows(self, filename, rows):
+        """Append CSV rows to a data file (each starts on a new line)"""
+        with open(self.data_dir / filename, 'a', encoding='utf-8', newline='') as f:
+            for row in rows:
+                f.write("\n" + row)
+
+
+def full_scan_scores(bm25, query):
+    """BM25 score of every document by a scan of the tokenized corpus (the pre-postings implementation)"""
+    query_tokens = bm25.tokenize(query)
+    scores = []
+    for idx, doc in enumerate(bm25.corpus):
+        score = 0
+        term_freqs = defaultdict(int)
+        for word in doc:
+            term_freqs[word] += 1
+        for token in query_tokens:
+            if token in bm25.idf:
+                tf = term_freqs[token]
+                denominator = tf + bm25.k1 * (1 - bm25.b + bm25.b * bm25.doc_lengths[idx] / bm25.avgdl)
+                score += bm25.idf[token] * (tf * (bm25.k1 + 1)) / denominator
+        scores.append((idx, score))
+    return sorted(scores, key=lambda x: x[1], reverse=True)
+
+
+class TestPostingsScoring(SearchTestBase):
+    """Scoring over postings with a top-k heap must rank like scoring every document"""
+
+    def fitted_domains(self):
+        """(domain, queries, BM25 fitted over the domain's search columns with its corpus kept)"""
+        for domain, config in core.CSV_CONFIG.items():
+            rows = self.load_rows(config["file"])
+            bm25 = core.BM25()
+            bm25.fit([" ".join(str(row.get(col, "")) for col in config["search_cols"]) for row in rows])
+            queries = self.sample_queries(domain) + ["zzzz nothing matches", "", "the the and", "mobile mobile app"]
+            yield domain, queries, bm25
+
+    def test_01_postings_match_full_scan(self):
+        """Test the full ranking (scores and tie order) equals a scan of every document"""
+        print("\n📇 Testing postings scoring against a full scan...")
+
+        checked = 0
+        for domain, queries, bm25 in self.fitted_domains():
+            for query in queries:
+                self.assertEqual(bm25.score(query), full_scan_scores(bm25, query), f"{domain}: {query!r}")
+                checked += 1
+
+        print(f"   ✅ {checked} full rankings identical")
+
+    def test_02_top_k_matches_sorted_prefix(self):
+        """Test the top-k heap returns the matching prefix of the full ranking for any k"""
+        print("\n🏔️  Testing top-k selection...")
+
+        checked = 0
+        for domain, queries, bm25 in self.fitted_domains():
+            for query in queries:
+                full = bm25.score(query)
+                for k in (0, 1, 3, 10, bm25.N + 5):
+                    expected = [(idx, score) for idx, score in full[:k] if score > 0]
+                    self.assertEqual(bm25.score(query, top_k=k), expected, f"{domain}: {query!r} top {k}")
+                    checked += 1
+
+        self.assertEqual(core.BM25().score("anything", top_k=3), [])
+        print(f"   ✅ {checked} top-k rankings identical")
+
+
+class TestProcessCache(SearchTestBase):
+    """Tables and indexes are built once per process and rebuilt only when their file changes"""
+
+    def test_01_lru_fingerprints_and_eviction(self):
+        """Test rebuild on a new fingerprint and eviction by entry count, byte cost and recency"""
+        print("\n🗃️  Testing the process LRU cache...")
+
+        cache = core._LRUCache(max_entries=3, max_bytes=100)
+        builds = []
+
+        def get(key, fingerprint=1, cost=10):
+            return cache.get_or_build(key, fingerprint, cost, lambda: builds.append(key) or f"{key}@{fingerprint}")
+
+        self.assertEqual([get("a"), get("a"), get("a", 2)], ["a@1", "a@1", "a@2"])
+        self.assertEqual(builds, ["a", "a"])
+        get("b")
+        get("c")
+        get("a", 2)  # Most recently used: "b" is evicted next
+        get("d")
+        self.assertEqual(list(cache._entries), ["c", "a", "d"])
+        get("big", cost=90)  # Over max_bytes: evicts until it fits
+        self.assertEqual(list(cache._entries), ["d", "big"])
+        get("huge", cost=500)  # Alone over budget: still kept
+        self.assertEqual(list(cache._entries), ["huge"])
+
+        info = cache.info()
+        self.assertEqual((info["entries"], info["bytes"], info["hits"]), (1, 500, 2))
+        self.assertEqual(info["misses"], len(builds))
+        self.assertEqual(info["evictions"], 5)
+        print(f"   ✅ {info['misses']} builds, {info['evictions']} evictions")
+
+    def test_02_one_build_per_key(self):
+        """Test concurrent misses on one key build once, other keys build in parallel, locks are released"""
+        print("\n🔒 Testing per-key build locks...")
+
+        cache = core._LRUCache(max_entries=16, max_bytes=1 << 20)
+        builds = defaultdict(int)
+        both_building = threading.Barrier(2, timeout=10)
+
+        def build(key):
+            builds[key] += 1
+            if key in ("x", "y"):
+                both_building.wait()  # Deadlocks (and times out) if keys build one at a time
+            time.sleep(0.01)
+            return key.upper()
+
+        keys = ["x"] * 8 + ["y"] * 8
+        with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+            values = list(pool.map(lambda key: cache.get_or_build(key, 1, 1, lambda: build(key)), keys))
+
+        self.assertEqual(values, [key.upper() for key in keys])
+        self.assertEqual(dict(builds), {"x": 1, "y": 1})
+        self.assertEqual(cache._build_locks, {})
+
+        def failing():
+            raise OSError("unreadable")
+        with self.assertRaises(OSError):
+            cache.get_or_build("z", 1, 1, failing)
+        self.assertEqual(cache._build_locks, {})
+        self.assertEqual(cache.get_or_build("z", 1, 1, lambda: "Z"), "Z")
+        print("   ✅ 16 concurrent lookups, 2 builds, no leftover locks")
+
+    def test_03_indexes_rebuilt_when_csv_changes(self):
+        """Test repeat searches reuse the cached index and a CSV edit is picked up"""
+        print("\n📂 Testing index reuse and invalidation...")
+
+        configure_result_cache(0, None)
+        core.clear_cache()
+        first = search("keyboard navigation", "ux")
+        misses = core.cache_info()["misses"]
+        self.assertEqual(search("keyboard navigation", "ux"), first)
+        self.assertEqual(core.cache_info()["misses"], misses)
+
+        self.append_rows("ux-guidelines.csv", ["3000,Zephyrine,Zephyrine keyboard shortcuts,All,"
+                                               "Document zephyrine shortcuts,Do,Don't,,,Low"])
+        self.assertEqual(search("zephyrine", "ux")["count"], 1)
+        self.assertGreater(core.cache_info()["misses"], misses)
+        print("   ✅ Cached index reused, edited CSV re-indexed")
+
+
+def run_search_cli(*args, data_dir):
+    """Run search.py over data_dir without a result cache; returns the CompletedProcess"""
+    env = dict(os.environ, UI_PRO_MAX_DATA_DIR=str(data_dir))
+    env.pop("UI_PRO_MAX_RESULT_CACHE", None)
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / "search.py"), *args, "--no-cache"],
+                          capture_output=True, text=True, encoding='utf-8', env=env, timeout=120)
+
+
+class TestBatchSearch(SearchTestBase):
+    """search_many must answer exactly like one search() call per query"""
+
+    def setUp(self):
+        configure_result_cache(0, None)
+
+    def test_01_search_many_matches_sequential_search(self):
+        """Test batch results equal sequential search for every domain and both rankings"""
+        print("\n📦 Testing search_many against sequential search...")
+
+        checked = 0
+        for domain in core.CSV_CONFIG:
+            queries = self.sample_queries(domain) + ["zzzz nothing matches", ""]
+            for ranking in core.RANKINGS:
+                batch = search_many(queries, domain, max_results=5, ranking=ranking)
+                sequential = [search(query, domain, max_results=5, ranking=ranking) for query in queries]
+                self.assertEqual(batch, sequential, f"{domain} / {ranking}")
+                checked += len(queries)
+
+        print(f"   ✅ {checked} batch results identical to sequential search")
+
+    def test_02_search_many_routes_queries_by_domain(self):
+        """Test domain=None detects each query's domain like search()"""
+        print("\n🧭 Testing search_many domain routing...")
+
+        queries = ["glassmorphism dark mode style", "pie chart trend", "saas dashboard",
+                   "font pairing serif heading", "touch target accessibility"]
+        batch = search_many(queries)
+        sequential = [search(query) for query in queries]
+
+        self.assertEqual(batch, sequential)
+        self.assertEqual(len({result["domain"] for result in batch}), len(queries))
+        print(f"   ✅ Routed to: {', '.join(result['domain'] for result in batch)}")
+
+    def test_03_batch_command_line(self):
+        """Test --batch answers like search_many and rejects flags it would ignore"""
+        print("\n⌨️  Testing --batch on the command line...")
+
+        batch_file = os.path.join(self.work_dir, "queries.txt")
+        with open(batch_file, 'w', encoding='utf-8') as f:
+            f.write("dark mode\n\n  glassmorphism  \nminimal flat\n")
+        output = run_search_cli("--batch", batch_file, "--domain", "style", "--json", data_dir=self.data_dir)
+        self.assertEqual(output.returncode, 0, output.stderr)
+        self.assertEqual(json.loads(output.stdout), search_many(["dark mode", "glassmorphism", "minimal flat"], "style"))
+
+        rejected = {
+            ("--batch", batch_file, "--serve"): "--batch cannot be combined with --serve",
+            ("--batch", batch_file, "--compact"): "--batch cannot be combined with --serve or --compact",
+            ("--batch", batch_file, "--socket", "/tmp/x.sock"): "--socket requires --serve",
+            ("--batch", batch_file, "--pages", "home"): "--pages/--pages-file require --design-system --persist",
+            ("--batch", batch_file, "--stack", "react"): "--batch supports single-domain search only",
+        }
+        for flags, message in rejected.items():
+            output = run_search_cli(*flags, data_dir=self.data_dir)
+            self.assertEqual(output.returncode, 2, flags)
+            self.assertIn(message, output.stderr)
+        print(f"   ✅ Batch output matches, {len(rejected)} flag combinations rejected")
+
+
+class TestConcurrentSearches(SearchTestBase):
+    """Domain searches on the shared pools must answer like sequential calls, with one pool per kind"""
+
+    JOBS = {
+        "product": ("fintech crypto dashboard", "product", 1),
+        "style": ("fintech crypto dashboard glassmorphism", "style", 3),
+        "color": ("fintech crypto dashboard", "color", 2),
+        "landing": ("fintech crypto dashboard", "landing", 2),
+        "typography": ("fintech crypto dashboard", "typography", 2),
+        "ux": ("animation", "ux", 3),
+    }
+
+    def setUp(self):
+        configure_result_cache(0, None)
+
+    def tearDown(self):
+        design_system._shutdown_executors()
+
+    def test_01_pools_match_sequential_search(self):
+        """Test thread and process pools return every job's result, keyed in job order"""
+        print("\n🧵 Testing concurrent domain searches...")
+
+        sequential = run_searches(self.JOBS, workers=1)
+        self.assertEqual(sequential, {key: search(*args) for key, args in self.JOBS.items()})
+        data_dir = os.environ.get("UI_PRO_MAX_DATA_DIR")
+        os.environ["UI_PRO_MAX_DATA_DIR"] = str(self.data_dir)  # Process workers that re-import core
+        try:
+            for workers, executor in ((6, "thread"), (2, "thread"), (3, "process")):
+                found = run_searches(self.JOBS, workers, executor)
+                self.assertEqual(list(found), list(self.JOBS))
+                self.assertEqual(found, sequential, f"{workers} {executor} workers")
+        finally:
+            if data_dir is None:
+                del os.environ["UI_PRO_MAX_DATA_DIR"]
+            else:
+                os.environ["UI_PRO_MAX_DATA_DIR"] = data_dir
+
+        one_by_one = DesignSystemGenerator(workers=1).generate("fintech crypto dashboard", "Demo")
+        self.assertEqual(DesignSystemGenerator(workers=5).generate("fintech crypto dashboard", "Demo"), one_by_one)
+        print("   ✅ Thread, process and sequential searches identical")
+
+    def test_02_one_pool_per_kind(self):
+        """Test a new pool size replaces the kind's pool and shutdown clears every pool"""
+        print("\n🏊 Testing the shared pool cache...")
+
+        pools = []
+        for workers in (2, 3, 3, 4, 2):
+            run_searches(self.JOBS, workers)
+            self.assertEqual(list(design_system._executors), ["thread"])
+            size, pool = design_system._executors["thread"]
+            self.assertEqual(size, workers)
+            if not pools or pools[-1] is not pool:
+                pools.append(pool)
+        run_searches(self.JOBS, 2, "no-such-kind")  # Unknown kinds share the thread pool
+        self.assertEqual(list(design_system._executors), ["thread"])
+
+        self.assertEqual(len(pools), 4)
+        self.assertTrue(all(pool._shutdown for pool in pools[:-1]))
+        self.assertFalse(pools[-1]._shutdown)
+        design_system._shutdown_executors()
+        self.assertEqual(design_system._executors, {})
+        self.assertTrue(pools[-1]._shutdown)
+        self.assertEqual(run_searches(self.JOBS, 2), run_searches(self.JOBS, 1))
+        print(f"   ✅ {len(pools)} pools created, {len(pools) - 1} replaced, at most one alive")
+
+
+def linear_find(rules, category):
+    """Reasoning rule lookup as a linear scan of the rules (the pre-index implementation)"""
+    category_lower = category.lower()
+    for rule in rules:
+        if rule.get("UI_Category", "").lower() == category_lower:
+            return rule
+    for rule in rules:
+        ui_cat = rule.get("UI_Category", "").lower()
+        if ui_cat in category_lower or category_lower in ui_cat:
+            return rule
+    for rule in rules:
+        ui_cat = rule.get("UI_Category", "").lower()
+        keywords = ui_cat.replace("/", " ").replace("-", " ").split()
+        if any(kw in category_lower for kw in keywords):
+            return rule
+    return {}
+
+
+class TestReasoningIndex(SearchTestBase):
+    """ReasoningIndex must pick the same rule as the linear scan it replaces"""
+
+    def test_01_matches_linear_scan_on_real_rules(self):
+        """Test every category, product type, fragment and miss resolves to the same rule"""
+        print("\n🧠 Testing ReasoningIndex against linear matching...")
+
+        with open(self.data_dir / "ui-reasoning.csv", 'r', encoding='utf-8') as f:
+            rules = list(csv.DictReader(f))
+        with open(self.data_dir / "products.csv", 'r', encoding='utf-8') as f:
+            product_types = [row["Product Type"] for row in csv.DictReader(f)]
+        index = ReasoningIndex(rules)
+
+        categories = [rule["UI_Category"] for rule in rules]
+        probes = categories + [c.upper() for c in categories] + product_types
+        probes += [c[:len(c) // 2] for c in categories] + [c[len(c) // 3:] for c in categories]
+        probes += [f"modern {c} platform" for c in categories[::5]]
+        probes += ["", "x", "zzzz", "ai", "dashboard", "e-commerce luxury", "health / fitness app"]
+
+        for probe in probes:
+            self.assertEqual(index.find(probe), linear_find(rules, probe), f"category {probe!r}")
+
+        print(f"   ✅ {len(probes)} lookups match over {len(rules)} rules")
+
+    def test_02_precedence_on_synthetic_rules(self):
+        """Test exact > partial > keyword precedence, first rule winning ties, empty categories"""
+        print("\n🧪 Testing ReasoningIndex precedence...")
+
+        rules = [{"UI_Category": name, "No": str(i)} for i, name in enumerate([
+            "Fintech/Crypto", "Crypto", "SaaS (General)", "Micro SaaS", "E-commerce Luxury",
+            "E-commerce", "", "Health-Care App", "crypto", "Gaming"])]
+        index = ReasoningIndex(rules)
+        rng = random.Random(11)
+        alphabet = "acegimnorstuy /-()"
+        probes = [rule["UI_Category"] for rule in rules]
+        probes += ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(500)]
+        probes += ["crypto wallet", "luxury e-commerce store", "care", "micro", "saas"]
+
+        for probe in probes:
+            self.assertEqual(index.find(probe), linear_find(rules, probe), f"category {probe!r}")
+
+        without_empty = [rule for rule in rules if rule["UI_Category"]]
+        self.assertEqual(ReasoningIndex(without_empty).find("zzzz"), {})
+        print(f"   ✅ {len(probes)} lookups match")
+
+
+class TestSearchAll(SearchTestBase):
+    """--domain all must give every domain and stack the results of searching it alone"""
+
+    QUERIES = ["glassmorphism dark mode", "saas dashboard pricing", "pie chart trend", "form validation error",
+               "serif heading font", "image optimization lazy loading", "touch target", "zzzz qqqq", ""]
+
+    def setUp(self):
+        configure_result_cache(0, None)
+
+    def test_01_partitions_match_single_searches(self):
+        """Test each partition's results equal search() / search_stack() under both rankings"""
+        print("\n🌐 Testing search_all against per-domain searches...")
+
+        checked = 0
+        for ranking in core.RANKINGS:
+            for query in self.QUERIES:
+                combined = search(query, "all", 3, ranking=ranking)
+                self.assertEqual(set(combined["domains"]), set(core.CSV_CONFIG))
+                self.assertEqual(set(combined["stacks"]), set(core.STACK_CONFIG))
+                for domain, result in combined["domains"].items():
+                    alone = search(query, domain, 3, ranking=ranking)
+                    self.assertEqual(result["results"], alone["results"], f"{query!r} {domain} {ranking}")
+                    checked += 1
+                for stack, result in combined["stacks"].items():
+                    alone = search_stack(query, stack, 3, ranking=ranking)
+                    self.assertEqual(result["results"], alone["results"], f"{query!r} {stack} {ranking}")
+                    checked += 1
+        print(f"   ✅ {checked} partitions identical")
+
+    def test_02_best_domain_and_ranking(self):
+        """Test the partition ranking is by top score and best_domain prefers the keyword domain"""
+        print("\n🏆 Testing best_domain / best_stack selection...")
+
+        for query in self.QUERIES:
+            combined = search(query, "all")
+            scores = [entry["score"] for entry in combined["ranking"]]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+            matched = [entry.get("domain") or entry.get("stack") for entry in combined["ranking"]]
+            self.assertEqual(sorted(matched), sorted([name for name, result in combined["domains"].items()
+                                                      if result["count"]] +
+                                                     [name for name, result in combined["stacks"].items()
+                                                      if result["count"]]))
+
+            keyword_scores = core._domain_keyword_scores(query)
+            keyword_domain = max(keyword_scores, key=keyword_scores.get)
+            domains = [entry["domain"] for entry in combined["ranking"] if "domain" in entry]
+            stacks = [entry["stack"] for entry in combined["ranking"] if "stack" in entry]
+            if keyword_scores[keyword_domain] and combined["domains"][keyword_domain]["count"]:
+                self.assertEqual(combined["best_domain"], keyword_domain, query)
+            else:
+                self.assertEqual(combined["best_domain"], domains[0] if domains else None, query)
+            self.assertEqual(combined["best_stack"], stacks[0] if stacks else None, query)
+
+        self.assertEqual(search("zzzz qqqq", "all")["ranking"], [])
+        print(f"   ✅ {len(self.QUERIES)} queries ranked consistently")
+
+    def test_03_unified_index_follows_csv_changes(self):
+        """Test a row appended to a stack CSV shows up in the next --domain all search"""
+        print("\n🔄 Testing unified index invalidation...")
+
+        query = "quokkaflow"
+        self.assertIsNone(search(query, "all")["best_stack"])
+        self.append_rows("stacks/svelte.csv", ['999,Rendering,Quokkaflow renderer,Use the quokkaflow renderer,'
+                                               'Do,Don\'t,,,Low,'])
+        combined = search(query, "all")
+
+        self.assertEqual(combined["best_stack"], "svelte")
+        self.assertEqual(combined["stacks"]["svelte"]["results"], search_stack(query, "svelte")["results"])
+        print("   ✅ Appended stack row found")
+
+
+def full_edit_distance(a, b):
+    """Optimal string alignment distance over the whole DP table (no early exit)"""
+    d = [[i + j if i == 0 or j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+def linear_nearest(terms, token):
+    """FuzzyIndex.nearest as a scan of the whole vocabulary"""
+    limit = core.max_edits(token)
+    if limit == 0:
+        return []
+    distances = {term: core.edit_distance(token, term, limit) for term in terms}
+    best = min([d for d in distances.values() if d <= limit], default=None)
+    if best is None:
+        return []
+    matches = sorted(term for term, distance in distances.items() if distance == best)
+    return [(term, 1 / (1 + best)) for term in matches[:core.FUZZY_MAX_EXPANSIONS]]
+
+
+class TestFuzzyMatching(SearchTestBase):
+    """Typo correction must find the vocabulary's nearest terms, from a vocabulary file kept in sync with the CSVs"""
+
+    def setUp(self):
+        configure_result_cache(0, None)
+
+    def typos(self, terms, count, seed):
+        """Random one- and two-edit misspellings (substitution, deletion, insertion, transposition) of terms"""
+        rng = random.Random(seed)
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        typos = []
+        for term in rng.sample(terms, count):
+            word = term
+            for _ in range(rng.choice((1, 2))):
+                i = rng.randrange(len(word))
+                edit = rng.randrange(4)
+                if edit == 0:
+                    word = word[:i] + rng.choice(letters) + word[i + 1:]
+                elif edit == 1 and len(word) > 1:
+                    word = word[:i] + word[i + 1:]
+                elif edit == 2:
+                    word = word[:i] + rng.choice(letters) + word[i:]
+                elif i + 1 < len(word):
+                    word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+            typos.append(word)
+        return typos
+
+    def test_01_edit_distance_with_cutoff(self):
+        """Test edit_distance equals the full DP distance up to max_distance and exceeds max_distance beyond it"""
+        print("\n✏️  Testing bounded edit distance...")
+
+        rng = random.Random(5)
+        pairs = [("".join(rng.choice("abcd") for _ in range(rng.randint(0, 7))),
+                  "".join(rng.choice("abcd") for _ in range(rng.randint(0, 7)))) for _ in range(2000)]
+        pairs += [("ca", "ac"), ("abc", "ca"), ("kitten", "sitting"), ("", "abc")]
+        for a, b in pairs:
+            exact = full_edit_distance(a, b)
+            for max_distance in (0, 1, 2, 3):
+                distance = core.edit_distance(a, b, max_distance)
+                if exact <= max_distance:
+                    self.assertEqual(distance, exact, (a, b, max_distance))
+                else:
+                    self.assertGreater(distance, max_distance, (a, b, max_distance))
+        print(f"   ✅ {len(pairs)} pairs checked at 4 cutoffs")
+
+    def test_02_trigram_candidates_match_vocabulary_scan(self):
+        """Test nearest() over trigram candidates equals a scan of every vocabulary term"""
+        print("\n🔤 Testing FuzzyIndex against a vocabulary scan...")
+
+        terms = sorted(core._get_unified_index().terms)
+        fuzzy = core.FuzzyIndex(terms)
+        long_terms = [term for term in terms if len(term) >= core.FUZZY_MIN_LENGTH]
+        tokens = self.typos(long_terms, 80, seed=3) + ["zzzzqqqq", "abc", "glasmorphism", "dashbaord", "prue",
+                                                        "mdoe", "lyaout", "tyopgraphy"]
+        for token in tokens:
+            self.assertEqual(fuzzy.nearest(token), linear_nearest(terms, token), token)
+        print(f"   ✅ {len(tokens)} tokens over {len(terms)} terms")
+
+    def test_03_corrections_in_results(self):
+        """Test misspelled words are corrected, reported, and left alone with fuzzy=False"""
+        print("\n🩹 Testing corrections in search results...")
+
+        result = search("glasmorphism", "style")
+        self.assertEqual(result["corrections"], {"glasmorphism": ["glassmorphism"]})
+        self.assertEqual(result["results"][0], search("glassmorphism", "style")["results"][0])
+        self.assertEqual(search("glasmorphism", "style", fuzzy=False)["count"], 0)
+        self.assertNotIn("corrections", search("glassmorphism", "style"))
+        self.assertEqual(core.query_corrections("glassmorphism dashboard abc"), {})
+        print("   ✅ glasmorphism -> glassmorphism")
+
+    def test_04_vocabulary_file(self):
+        """Test the vocabulary is loaded from its file while the CSVs are unchanged and rebuilt after an edit"""
+        print("\n💾 Testing the persisted vocabulary...")
+
+        path = self.data_dir / core.VOCABULARY_FILE
+        core.query_corrections("dashbaord")
+        self.assertTrue(path.exists())
+        expected = core.query_corrections("dashbaord glasmorphism")
+
+        unified = core._get_unified_index
+        core.clear_cache()
+        core._get_unified_index = lambda: self.fail("vocabulary rebuilt although the CSVs did not change")
+        try:
+            self.assertEqual(core.query_corrections("dashbaord glasmorphism"), expected)
+        finally:
+            core._get_unified_index = unified
+
+        mtime = path.stat().st_mtime_ns
+        self.append_rows("ux-guidelines.csv", ["4000,Zanzibarization,Zanzibarization rules,All,"
+                                               "Zanzibarization,Do,Don't,,,Low"])
+        self.assertEqual(search("zanzibarizatoin", "ux")["corrections"], {"zanzibarizatoin": ["zanzibarization"]})
+        self.assertNotEqual(path.stat().st_mtime_ns, mtime)
+        print("   ✅ Loaded from file, rebuilt after a CSV edit")
+
+
+class TestPagePersistence(SearchTestBase):
+    """--pages must write what one page at a time would, and leave unchanged files alone"""
+
+    QUERY = "fintech crypto dashboard"
+
+    def setUp(self):
+        configure_result_cache(0, None)
+        self.design_system = DesignSystemGenerator().generate(self.QUERY, "Demo Co")
+        self.output_dir = tempfile.mkdtemp(dir=self.work_dir)
+        self.project_dir = Path(self.output_dir) / "design-system" / "demo-co"
+
+    def persist(self, **kwargs):
+        return persist_design_system(self.design_system, output_dir=self.output_dir, page_query=self.QUERY, **kwargs)
+
+    def test_01_batched_pages_match_single_pages(self):
+        """Test every page file equals the standalone override and repeated slugs are written once"""
+        print("\n📑 Testing batched page overrides...")
+
+        pages = ["home", ("pricing", "plans comparison table"), ("Home", "ignored repeat"), "  ", "Admin Settings"]
+        outcome = self.persist(page="checkout", pages=pages)
+
+        expected = {"checkout": self.QUERY, "home": self.QUERY, "pricing": "plans comparison table",
+                    "admin-settings": self.QUERY}
+        self.assertEqual(sorted(path.name for path in (self.project_dir / "pages").iterdir()),
+                         sorted(f"{slug}.md" for slug in expected))
+        self.assertEqual(len(outcome["created_files"]), 1 + len(expected))
+        names = {"checkout": "checkout", "home": "home", "pricing": "pricing", "admin-settings": "Admin Settings"}
+        for slug, query in expected.items():
+            content = (self.project_dir / "pages" / f"{slug}.md").read_text(encoding='utf-8')
+            alone = format_page_override_md(self.design_system, names[slug], query)
+            self.assertEqual(_without_timestamp(content), _without_timestamp(alone), slug)
+        master = (self.project_dir / "MASTER.md").read_text(encoding='utf-8')
+        self.assertEqual(_without_timestamp(master), _without_timestamp(format_master_md(self.design_system)))
+        print(f"   ✅ {len(expected)} page overrides identical to single-page output")
+
+    def test_02_unchanged_files_are_not_rewritten(self):
+        """Test a repeat run writes nothing, a real change rewrites only its file and keeps its mode"""
+        print("\n📝 Testing write_if_changed...")
+
+        first = self.persist(pages=["home", "pricing"])
+        self.assertEqual(first["written_files"], first["created_files"])
+        home = self.project_dir / "pages" / "home.md"
+        os.chmod(home, 0o640)
+        mtimes = {path: os.stat(path).st_mtime_ns for path in first["created_files"]}
+
+        time.sleep(0.01)
+        again = self.persist(pages=["home", "pricing"])
+        self.assertEqual(again["written_files"], [])
+        self.assertEqual(again["unchanged_files"], first["created_files"])
+        self.assertEqual({path: os.stat(path).st_mtime_ns for path in first["created_files"]}, mtimes)
+
+        home.write_text(home.read_text(encoding='utf-8') + "\nlocal edit\n", encoding='utf-8')
+        self.assertEqual(self.persist(pages=["home", "pricing"])["written_files"], [str(home)])
+        self.assertEqual(stat.S_IMODE(os.stat(home).st_mode), 0o640)
+        self.assertNotIn("local edit", home.read_text(encoding='utf-8'))
+        self.assertEqual([path.name for path in self.project_dir.rglob("*.tmp")], [])
+        print("   ✅ Repeat run wrote 0 files, edited page restored with its mode")
+
+    def test_03_pages_manifest_on_the_command_line(self):
+        """Test --pages-file entries and comments are parsed and written in one run"""
+        print("\n🗂️  Testing --pages-file...")
+
+        manifest = os.path.join(self.output_dir, "pages.txt")
+        with open(manifest, 'w', encoding='utf-8') as f:
+            f.write("# site map\nhome\npricing: plans comparison  # compare tiers\n\n  blog : articles list\n")
+        self.assertEqual(read_pages_manifest(manifest),
+                         [("home", None), ("pricing", "plans comparison"), ("blog", "articles list")])
+
+        output = run_search_cli(self.QUERY, "--design-system", "--persist", "-p", "Demo Co", "--pages", "about",
+                                "--pages-file", manifest, "-o", self.output_dir, data_dir=self.data_dir)
+        self.assertEqual(output.returncode, 0, output.stderr)
+        self.assertEqual(sorted(path.name for path in (self.project_dir / "pages").iterdir()),
+                         ["about.md", "blog.md", "home.md", "pricing.md"])
+        print("   ✅ 4 pages from --pages and --pages-file")
+
+
+class TestColumnStore(SearchTestBase):
+    """Cells decoded from the interned column store must equal the rows csv.DictReader reads"""
+
+    IRREGULAR_CSV = ("Name,Notes,Extra\r\n"
+                     "alpha,plain row,x\r\n"
+                     "beta,short row\r\n"
+                     "\r\n"
+                     "gamma,\"quoted, with comma\",x,spill one,spill two\r\n"
+                     "delta,\"two\nlines\",\r\n"
+                     "alpha,plain row,x\r\n")
+
+    def test_01_data_files_round_trip(self):
+        """Test every data CSV's rows (all columns and a subset) and that each distinct value is stored once"""
+        print("\n🧱 Testing the column store on the data files...")
+
+        checked = 0
+        sources = [(domain, config["file"], config) for domain, config in core.CSV_CONFIG.items()]
+        sources += [(stack, config["file"], core._STACK_COLS) for stack, config in core.STACK_CONFIG.items()]
+        for domain, filename, config in sources:
+            rows = self.load_rows(filename)
+            columns = core._config_index(self.data_dir / filename, config).columns
+            self.assertEqual(columns.rows(range(len(rows))), rows, domain)
+            subset = config["output_cols"][:2]
+            self.assertEqual(columns.rows([len(rows) - 1, 0], subset),
+                             [{col: row[col] for col in subset} for row in (rows[-1], rows[0])], domain)
+
+            distinct = {row[field] for row in rows for field in columns.fieldnames if row[field] is not None}
+            self.assertEqual(len(columns.str_offsets) - 1, len(distinct), domain)
+            self.assertEqual(len(columns.str_blob), sum(len(value.encode('utf-8')) for value in distinct), domain)
+            checked += len(rows)
+
+        print(f"   ✅ {checked} rows decoded exactly")
+
+    def test_02_irregular_rows_and_segments(self):
+        """Test short, long, quoted and multi-line rows, in memory, memory-mapped and across a delta segment"""
+        print("\n🧮 Testing irregular rows...")
+
+        path = Path(self.work_dir) / "irregular.csv"
+        path.write_bytes(self.IRREGULAR_CSV.encode('utf-8'))
+
+        def expected():
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                return list(csv.DictReader(f))
+
+        fieldnames, rows, offsets, _ = read_csv_with_offsets(path)
+        self.assertEqual(rows, expected())
+        arrays, irregular_rows = build_column_store(fieldnames, rows)
+        self.assertEqual(irregular_rows, [2])
+        in_memory = ColumnStore(path, fieldnames, offsets, arrays["cell_ids"], arrays["str_offsets"],
+                                arrays["str_blob"], irregular_rows)
+        self.assertEqual(in_memory.rows(range(len(rows))), expected())
+        self.assertEqual(in_memory.rows([2, 1], ["Extra"]), [{"Extra": "x"}, {"Extra": None}])
+
+        mapped = core._get_index(path, ["Name", "Notes"]).columns
+        self.assertIsInstance(mapped, ColumnStore)
+        self.assertEqual(mapped.rows(range(len(rows))), expected())
+
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            f.write("epsilon,appended,x,spill\r\nzeta\r\n")
+        core.clear_cache()
+        ratio, core.COMPACT_DELTA_RATIO = core.COMPACT_DELTA_RATIO, 1.0  # Keep the delta segment
+        try:
+            segmented = core._get_index(path, ["Name", "Notes"]).columns
+        finally:
+            core.COMPACT_DELTA_RATIO = ratio
+        self.assertIsInstance(segmented, SegmentedColumnStore)
+        self.assertEqual(segmented.rows(range(len(expected()))), expected())
+        self.assertEqual(segmented.rows([6, 0, 5], ["Name"]), [{"Name": "zeta"}, {"Name": "alpha"}, {"Name": "epsilon"}])
+        print(f"   ✅ {len(expected())} rows across 2 segments decoded exactly")
+
+
+def bm25f_scores(bm25, fields, query):
+    """BM25F score of every matched document computed from the tokenized fields (no postings, no pseudo tf cache)"""
+    avglen = [sum(len(doc[f]) for doc in fields) / len(fields) for f in range(len(bm25.field_weights))]
+    scores = {}
+    for idx, doc in enumerate(fields):
+        score = 0
+        for token in bm25.tokenize(query):
+            if token not in bm25.idf:
+                continue
+            pseudo_tf = sum(weight * tokens.count(token) / (1 - bm25.b + bm25.b * len(tokens) / avglen[f])
+                            for f, (weight, tokens) in enumerate(zip(bm25.field_weights, doc)) if tokens)
+            if pseudo_tf:
+                score += bm25.idf[token] * pseudo_tf * (bm25.k1 + 1) / (pseudo_tf + bm25.k1)
+        if score:
+            scores[idx] = score
+    return scores
+
+
+class TestFieldedRanking(SearchTestBase):
+    """BM25F must follow its formula over the fields and stay opt-in next to plain BM25"""
+
+    def test_01_bm25f_matches_formula(self):
+        """Test fielded scores equal the BM25F formula and unfielded scores stay plain BM25"""
+        print("\n⚖️  Testing BM25F against its formula...")
+
+        checked = 0
+        for domain, config in core.CSV_CONFIG.items():
+            rows = self.load_rows(config["file"])
+            texts = [[str(row.get(col, "")) for col in config["search_cols"]] for row in rows]
+            bm25 = core.BM25()
+            bm25.fit(texts, core._field_weights(config))
+            fields = [[bm25.tokenize(text) for text in doc] for doc in texts]
+            for query in self.sample_queries(domain, count=10) + ["zzzz qqqq"]:
+                fielded = {idx: score for idx, score in bm25.score(query, fielded=True) if score}
+                expected = bm25f_scores(bm25, fields, query)
+                self.assertEqual(sorted(fielded), sorted(expected), f"{domain}: {query!r}")
+                for idx, score in expected.items():
+                    self.assertAlmostEqual(fielded[idx], score, places=9, msg=f"{domain}: {query!r} doc {idx}")
+                self.assertEqual(bm25.score(query), full_scan_scores(bm25, query), f"{domain}: {query!r}")
+                checked += 1
+
+        print(f"   ✅ {checked} BM25F rankings follow the formula")
+
+    def test_02_field_weights_and_ranking_option(self):
+        """Test a heavily weighted field outranks a longer match elsewhere, and bm25 stays the default"""
+        print("\n🏷️  Testing field weights and --ranking...")
+
+        documents = [["Aurora", "A soft gradient theme with calm colors for reading apps"],
+                     ["Calm", "An aurora aurora gradient backdrop with colors"]]
+        bm25 = core.BM25()
+        bm25.fit(documents, [3.0, 1.0])
+        self.assertEqual(bm25.score("aurora")[0][0], 1)
+        self.assertEqual(bm25.score("aurora", fielded=True)[0][0], 0)
+        unweighted = core.BM25()
+        unweighted.fit(documents, [1.0, 1.0])
+        self.assertEqual(unweighted.score("aurora", fielded=True)[0][0], 1)
+
+        for domain in ("style", "ux", "typography"):
+            for query in self.sample_queries(domain, count=5):
+                default = search(query, domain, 5)
+                self.assertEqual(default, search(query, domain, 5, ranking="bm25"), query)
+                index = core._config_index(self.data_dir / core.CSV_CONFIG[domain]["file"], core.CSV_CONFIG[domain])
+                fielded_first = index.bm25.score(query, top_k=1, fielded=True)
+                if fielded_first:
+                    first = search(query, domain, 5, ranking="bm25f")["results"][0]
+                    self.assertEqual(first, index.rows([fielded_first[0][0]], core.CSV_CONFIG[domain]["output_cols"])[0])
+        with self.assertRaises(ValueError):
+            search("glass", "style", ranking="tfidf")
+        print("   ✅ Weighted name field ranks first under bm25f only")
+
+
+class TestStackSearch(SearchTestBase):
+    """Several stacks searched together must rank like one index fitted over all their guidelines"""
+
+    STACKS = ["nextjs", "react", "shadcn", "vue"]
+    QUERIES = ["server components data fetching", "form validation state", "dark mode theme",
+               "image optimization lazy loading", "accessibility keyboard focus", "zzzz qqqq"]
+
+    def setUp(self):
+        configure_result_cache(0, None)
+
+    def concatenated(self, stacks):
+        """(BM25 fitted over the stacks' rows in order, [(stack, row)] per document)"""
+        config = core._STACK_COLS
+        rows = [(stack, row) for stack in stacks for row in self.load_rows(core.STACK_CONFIG[stack]["file"])]
+        bm25 = core.BM25()
+        bm25.fit([[str(row.get(col, "")) for col in config["search_cols"]] for _, row in rows],
+                 core._field_weights(config))
+        return bm25, rows
+
+    def test_01_merged_index_matches_one_fit(self):
+        """Test merged per-stack indexes score like one index over the concatenated stacks (BM25 and BM25F)"""
+        print("\n🥞 Testing the merged stack index...")
+
+        merged = core._get_stack_index(self.STACKS).bm25
+        reference, _ = self.concatenated(self.STACKS)
+        checked = 0
+        for query in self.QUERIES:
+            for fielded in (False, True):
+                got = dict(merged.score(query, fielded=fielded))
+                expected = dict(reference.score(query, fielded=fielded))
+                self.assertEqual(sorted(got), sorted(expected))
+                for idx, score in expected.items():
+                    self.assertAlmostEqual(got[idx], score, places=9, msg=f"{query!r} doc {idx}")
+                checked += 1
+        print(f"   ✅ {checked} merged rankings identical")
+
+    def test_02_results_and_per_stack_quota(self):
+        """Test results follow the global ranking, carry their Stack tag and respect per_stack"""
+        print("\n🎚️  Testing stack results and quotas...")
+
+        reference, rows = self.concatenated(self.STACKS)
+        for query in self.QUERIES:
+            ranked = [rows[idx] for idx, score in reference.score(query) if score > 0]
+            for per_stack in (None, 1, 2):
+                expected, taken = [], defaultdict(int)
+                for stack, row in ranked:
+                    if len(expected) == 5:
+                        break
+                    if per_stack is None or taken[stack] < per_stack:
+                        taken[stack] += 1
+                        expected.append((stack, row["Guideline"]))
+                result = core.search_stacks(query, ",".join(self.STACKS), 5, fuzzy=False, per_stack=per_stack)
+                self.assertEqual([(r["Stack"], r["Guideline"]) for r in result["results"]], expected,
+                                 f"{query!r} per_stack={per_stack}")
+                self.assertEqual(result.get("per_stack"), per_stack)
+
+        single = search_stack("form validation", "react", 5)
+        together = core.search_stacks("form validation", ["react", " react "], 5)
+        self.assertEqual(together["stacks"], ["react"])
+        self.assertEqual([{k: v for k, v in r.items() if k != "Stack"} for r in together["results"]],
+                         single["results"])
+        print(f"   ✅ {len(self.QUERIES)} queries ranked globally with quotas")
+
+    def test_03_stack_names(self):
+        """Test "all", lists and comma-separated names resolve, and unknown names are errors"""
+        print("\n🔤 Testing stack name resolution...")
+
+        everything = search_stack("dark mode", "all", 3)
+        self.assertEqual((everything["stack"], everything["stacks"]), ("all", core.AVAILABLE_STACKS))
+        self.assertEqual(search_stack("dark mode", "vue,nextjs", 3)["stacks"], ["vue", "nextjs"])
+        for stacks in ("vue,bogus", ["bogus"], " , "):
+            self.assertIn("error", core.search_stacks("dark mode", stacks))
+        self.assertIn("Unknown stack: bogus", search_stack("dark mode", "react,bogus")["error"])
+        output = run_search_cli("form state validation", "--stack", "react,vue", "--per-stack", "1", "--json",
+                                data_dir=self.data_dir)
+        self.assertEqual(output.returncode, 0, output.stderr)
+        self.assertEqual(sorted(r["Stack"] for r in json.loads(output.stdout)["results"]), ["react", "vue"])
+        print("   ✅ Stack lists resolved, unknown stacks rejected")
+
+
+class TestProfiler(SearchTestBase):
+    """Profiling must record nested spans and counters without changing any result"""
+
+    def tearDown(self):
+        profiler.stop()
+
+    def test_01_spans_and_counters(self):
+        """Test span paths, call counts and timings, per-thread paths, counters and the disabled no-ops"""
+        print("\n⏱️  Testing profiler spans and counters...")
+
+        self.assertFalse(profiler.enabled())
+        self.assertIs(profiler.span("idle"), profiler.span("other"))
+        profiler.count("ignored", 5)
+
+        profiler.start()
+        self.assertTrue(profiler.enabled())
+        for _ in range(2):
+            with profiler.span("outer"):
+                with profiler.span("inner"):
+                    time.sleep(0.002)
+                profiler.count("items", 3)
+        def work():
+            with profiler.span("worker"):
+                pass
+
+        with profiler.span("outer"):
+            worker = threading.Thread(target=work)
+            worker.start()
+            worker.join()
+        with self.assertRaises(KeyError):
+            with profiler.span("failing"):
+                raise KeyError("x")
+        report = profiler.stop()
+
+        self.assertIsNone(profiler.stop())
+        self.assertFalse(profiler.enabled())
+        self.assertEqual(list(report["spans"]), ["outer", "outer > inner", "worker", "failing"])
+        self.assertEqual([stat["calls"] for stat in report["spans"].values()], [3, 2, 1, 1])
+        inner = report["spans"]["outer > inner"]
+        self.assertGreaterEqual(inner["total_ms"], 4)
+        self.assertLessEqual(inner["max_ms"], inner["total_ms"])
+        self.assertLessEqual(report["spans"]["outer"]["total_ms"], report["total_ms"])
+        self.assertEqual(report["counters"], {"items": 6})
+        self.assertEqual(json.loads(json.dumps(report)), report)
+        table = profiler.format_report(report)
+        self.assertIn("\n  inner ", table)
+        self.assertIn("items", table)
+        print(f"   ✅ {len(report['spans'])} span paths, counters summed")
+
+    def test_02_instrumented_search(self):
+        """Test a profiled cold search returns the unprofiled results and counts the indexed work"""
+        print("\n🔬 Testing a profiled search...")
+
+        configure_result_cache(0, None)
+        core.clear_cache()
+        expected = search("glass dark card", "style", 3)
+        for path in self.data_dir.glob("styles.csv.idx*"):
+            path.unlink()
+        core.clear_cache()
+
+        profiler.start(cprofile=True)
+        result = search("glass dark card", "style", 3)
+        report = profiler.stop()
+
+        self.assertEqual(result, expected)
+        rows = self.load_rows(core.CSV_CONFIG["style"]["file"])
+        bm25 = core._config_index(self.data_dir / core.CSV_CONFIG["style"]["file"], core.CSV_CONFIG["style"]).bm25
+        self.assertEqual(report["counters"]["docs_indexed"], len(rows))
+        self.assertEqual(report["counters"]["tokens_indexed"], sum(bm25.doc_lengths))
+        self.assertEqual(report["counters"]["rows_decoded"], result["count"])
+        for path in ("search", "search > index_build > fit", "search > score", "search > rows"):
+            self.assertTrue(any(span.startswith(path) for span in report["spans"]), path)
+        self.assertTrue(report["cprofile"])
+        print(f"   ✅ {report['counters']['tokens_indexed']} tokens counted, results unchanged")
+
+    def test_03_profile_json_on_the_command_line(self):
+        """Test --profile-json FILE writes the report without touching stdout"""
+        print("\n📊 Testing --profile-json...")
+
+        path = os.path.join(self.work_dir, "profile.json")
+        plain = run_search_cli("animation", "--domain", "ux", "--json", data_dir=self.data_dir)
+        profiled = run_search_cli("animation", "--domain", "ux", "--json", "--profile-json", path,
+                                  data_dir=self.data_dir)
+        self.assertEqual(profiled.returncode, 0, profiled.stderr)
+        self.assertEqual(json.loads(profiled.stdout), json.loads(plain.stdout))
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(set(report), {"total_ms", "spans", "counters"})
+        self.assertIn("search", report["spans"])
+        print(f"   ✅ {len(report['spans'])} spans written to the JSON file")
+
+
+class TestIndexSegments(SearchTestBase):
+    """Rows appended to a CSV are indexed into delta segments that rank like a full rebuild"""
+
+    FILE = "ux-guidelines.csv"
+    QUERIES = ["animation reduced motion", "touch target size", "keyboard focus navigation",
+               "motion budget", "layout spacing grid", "form error message"]
+
+    def setUp(self):
+        configure_result_cache(0, None)
+        self.config = core.CSV_CONFIG["ux"]
+        self.path = self.data_dir / self.FILE
+        core.clear_cache()
+        compact_index(self.path)
+
+    def new_rows(self, start, count):
+        """ux-guidelines rows mentioning the test queries' words"""
+        topics = [("Animation", "Motion budget", "Keep animation short and respect reduced motion settings"),
+                  ("Accessibility", "Focus order", "Keyboard focus must follow the visual navigation order"),
+                  ("Layout", "Grid gaps", "Consistent spacing in every layout grid")]
+        rows = []
+        for i in range(start, start + count):
+            category, issue, description = topics[i % len(topics)]
+            rows.append(f"{1000 + i},{category},{issue} {i},All,{description},Do it,Don't,,,Medium")
+        return rows
+
+    def ranking_snapshot(self):
+        """Full score lists of every test query under both rankings, loaded through the process cache"""
+        index = core._config_index(self.path, self.config)
+        return [index.bm25.score(query, fielded=fielded) for query in self.QUERIES for fielded in (False, True)]
+
+    def rebuilt_snapshot(self):
+        """The same scores from a single freshly built base segment"""
+        self.assertTrue(compact_index(self.path))
+        core.clear_cache()
+        return self.ranking_snapshot()
+
+    def test_01_appended_rows_rank_like_a_rebuild(self):
+        """Test base + delta segments score exactly like a full rebuild (BM25 and BM25F)"""
+        print("\n🧩 Testing delta segments against a full rebuild...")
+
+        self.ranking_snapshot()
+        self.append_rows(self.FILE, self.new_rows(0, 3))
+        core.clear_cache()
+        merged = self.ranking_snapshot()
+
+        self.assertTrue(delta_path_for(self.path, 1).exists(), "appended rows were not indexed into a delta")
+        self.assertEqual(merged, self.rebuilt_snapshot())
+        self.assertFalse(delta_path_for(self.path, 1).exists(), "compaction left a delta segment behind")
+        print(f"   ✅ {len(merged)} score lists identical after an append")
+
+    def test_02_segment_chain_validation(self):
+        """Test broken segment chains and in-place edits fall back to correct indexes"""
+        print("\n🔗 Testing segment chain validation...")
+
+        search_cols, weights = self.config["search_cols"], core._field_weights(self.config)
+        for start in (0, 2):
+            self.append_rows(self.FILE, self.new_rows(start, 2))
+            core.clear_cache()
+            self.ranking_snapshot()
+        segments, append_from = load_segments(self.path, search_cols, weights)
+        self.assertEqual([seg.segment for seg in segments], [0, 1, 2])
+        self.assertIsNone(append_from)
+        self.assertEqual([seg.doc_start for seg in segments[1:]],
+                         [segments[0].n_docs, segments[0].n_docs + segments[1].n_docs])
+
+        # A gap in the chain: rows after the base are re-indexed as one new delta
+        delta_path_for(self.path, 1).unlink()
+        segments, append_from = load_segments(self.path, search_cols, weights)
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(append_from, segments[0].source[1])
+        core.clear_cache()
+        after_gap = self.ranking_snapshot()
+        self.assertEqual(after_gap, self.rebuilt_snapshot())
+
+        # An edit before the indexed end is not an append: the whole index is rebuilt
+        self.append_rows(self.FILE, self.new_rows(4, 1))
+        core.clear_cache()
+        self.ranking_snapshot()
+        content = self.path.read_text(encoding='utf-8')
+        self.path.write_text(content.replace("Smooth Scroll", "Smooth Scrolling", 1), encoding='utf-8')
+        core.clear_cache()
+        edited = self.ranking_snapshot()
+        self.assertIsNone(load_segments(self.path, search_cols, weights)[1])
+        self.assertFalse(delta_path_for(self.path, 1).exists())
+        self.assertEqual(edited, self.rebuilt_snapshot())
+        self.assertEqual(search("smooth scrolling", "ux", 1)["results"][0]["Issue"], "Smooth Scrolling")
+        print("   ✅ Gaps re-index the appended rows, edits rebuild")
+
+    def test_03_compaction_runs_in_process(self):
+        """Test passing COMPACT_MAX_DELTAS compacts during the load, leaving one base segment"""
+        print("\n🗜️  Testing in-process compaction...")
+
+        self.ranking_snapshot()
+        for i in range(core.COMPACT_MAX_DELTAS):
+            self.append_rows(self.FILE, self.new_rows(i, 1))
+            core.clear_cache()
+            snapshot = self.ranking_snapshot()
+
+        index_path = index_path_for(self.path)
+        self.assertEqual(sorted(p.name for p in index_path.parent.glob(index_path.name + "*")), [index_path.name])
+        self.assertEqual(snapshot, self.rebuilt_snapshot())
+        print(f"   ✅ Compacted after {core.COMPACT_MAX_DELTAS} deltas")
+
+
+class TestResultCache(SearchTestBase):
+    """Cached results must be dropped when the data, settings or code they came from change"""
+
+    def setUp(self):
+        self.check_interval = core.RESULT_CACHE_CHECK_S
+        core.RESULT_CACHE_CHECK_S = 0  # Notice changes immediately
+        self.cache_file = os.path.join(self.work_dir, "results.db")
+        configure_result_cache(64, self.cache_file)
+        core.clear_cache()
+
+    def tearDown(self):
+        core.RESULT_CACHE_CHECK_S = self.check_interval
+        configure_result_cache(0, None)
+
+    def test_01_repeat_queries_hit(self):
+        """Test a repeat query is served from the cache with the caller's query text"""
+        print("\n⚡ Testing result cache hits...")
+
+        first = search("Dark Mode", "style")
+        hits = result_cache_info()["hits"]
+        second = search("  dark mode ", "style")
+
+        self.assertEqual(result_cache_info()["hits"], hits + 1)
+        self.assertEqual(second["query"], "  dark mode ")
+        self.assertEqual(dict(second, query=first["query"]), first)
+        print("   ✅ Normalized repeat query hit the cache")
+
+    def test_02_csv_change_invalidates(self):
+        """Test editing a CSV invalidates cached results"""
+        print("\n♻️  Testing result cache invalidation on CSV edits...")
+
+        query = "quantumflux holographic"
+        self.assertEqual(search(query, "ux")["count"], 0)
+        self.append_rows("ux-guidelines.csv", ["2000,Quantumflux,Holographic quantumflux panels,All,"
+                                               "Render holographic panels,Do,Don't,,,Low"])
+        result = search(query, "ux")
+
+        self.assertEqual(result["count"], 1)
+        self.assertEqual(result["results"][0]["Category"], "Quantumflux")
+        print("   ✅ Appended row visible on the next search")
+
+    def test_03_settings_change_invalidates(self):
+        """Test changing field weights or the default ranking changes the fingerprint"""
+        print("\n⚙️  Testing result cache invalidation on settings changes...")
+
+        weights = core.CSV_CONFIG["style"]["field_weights"]
+        ranking = core.RANKING
+        before = core.data_fingerprint()
+        search("minimal flat", "style")
+        misses = result_cache_info()["misses"]
+        try:
+            core.CSV_CONFIG["style"]["field_weights"] = dict(weights, Keywords=5)
+            self.assertNotEqual(core.data_fingerprint(), before)
+            search("minimal flat", "style")
+            self.assertEqual(result_cache_info()["misses"], misses + 1)
+
+            core.CSV_CONFIG["style"]["field_weights"] = weights
+            self.assertEqual(core.data_fingerprint(), before)
+            core.RANKING = "bm25f" if ranking == "bm25" else "bm25"
+            self.assertNotEqual(core.data_fingerprint(), before)
+        finally:
+            core.CSV_CONFIG["style"]["field_weights"] = weights
+            core.RANKING = ranking
+        print("   ✅ Field weights and ranking are part of the fingerprint")
+
+    def test_04_disk_tier_checks_fingerprint(self):
+        """Test a SQLite entry is shared across cache instances only under its fingerprint"""
+        print("\n💽 Testing the SQLite result tier...")
+
+        path = os.path.join(self.work_dir, "disk.db")
+        writer = ResultCache(0, path, 1024 * 1024)
+        writer.put("key", "fingerprint-a", '{"count": 1}')
+
+        reader = ResultCache(0, path, 1024 * 1024)
+        self.assertEqual(reader.get("key", "fingerprint-a"), '{"count": 1}')
+        self.assertIsNone(reader.get("key", "fingerprint-b"))
+        self.assertEqual(reader.info()["disk_hits"], 1)
+
+        # A writer under another fingerprint keeps the first writer's rows
+        reader.put("key", "fingerprint-b", '{"count": 2}')
+        self.assertEqual(ResultCache(0, path).get("key", "fingerprint-a"), '{"count": 1}')
+        self.assertEqual(ResultCache(0, path).get("key", "fingerprint-b"), '{"count": 2}')
+        print("   ✅ Disk entries are served only under their own fingerprint")
+
+    def test_05_disk_tier_eviction(self):
+        """Test rows of other fingerprints go by size eviction or once unused for DISK_STALE_S"""
+        print("\n🧹 Testing SQLite eviction...")
+
+        path = os.path.join(self.work_dir, "evict.db")
+        value = json.dumps({"text": "x" * 80})
+        first = ResultCache(0, path, 10 * 100)
+        for i in range(6):
+            first.put(f"a{i}", "fingerprint-a", value)
+        second = ResultCache(0, path, 10 * 100)
+        for i in range(6):
+            second.put(f"b{i}", "fingerprint-b", value)
+        # 10 rows fit: the two least recently used ones, both fingerprint-a, are evicted
+        self.assertEqual(second.info()["disk_entries"], 10)
+        self.assertEqual([first.get(f"a{i}", "fingerprint-a") is not None for i in range(6)], [False] * 2 + [True] * 4)
+        self.assertEqual(second.disk_evictions, 2)
+
+        # Unused for DISK_STALE_S: purged by the next writer under another fingerprint
+        conn = first._connect()
+        conn.execute("UPDATE results SET used = used - ? WHERE fingerprint = 'fingerprint-a'",
+                     (result_cache.DISK_STALE_S + 1,))
+        ResultCache(0, path, 10 * 100).put("c0", "fingerprint-c", value)
+        self.assertEqual(ResultCache(0, path).info()["disk_entries"], 7)
+        self.assertIsNone(ResultCache(0, path).get("a5", "fingerprint-a"))
+        print("   ✅ Size eviction by recency, stale fingerprints purged after DISK_STALE_S")
+
+
+class TestSearchServer(SearchTestBase):
+    """The JSON-lines server must answer like direct calls"""
+
+    def setUp(self):
+        configure_result_cache(0, None)
+
+    def test_01_json_lines_round_trip(self):
+        """Test requests over the stdio transport return the direct results by id"""
+        print("\n🔌 Testing the JSON-lines server round trip...")
+
+        requests = [
+            {"id": 1, "method": "search", "params": {"query": "glassmorphism", "domain": "style"}},
+            {"id": 2, "method": "search_stack", "params": {"query": "image optimization", "stack": "nextjs",
+                                                           "max_results": 2}},
+            {"id": 3, "method": "search_stack", "params": {"query": "form validation", "stack": "react,vue",
+                                                           "per_stack": 1}},
+            {"id": 4, "method": "search", "params": {"domain": "ux"}},
+            {"id": 5, "method": "nope", "params": {}},
+        ]
+        lines = [json.dumps(request) for request in requests] + ["not json", "", "[1, 2]"]
+        stdout = io.StringIO()
+        server = SearchServer(workers=4)
+        serve_stdio(server, io.StringIO("\n".join(lines) + "\n"), stdout)
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(len(responses), len(requests) + 2)
+        by_id = {response["id"]: response for response in responses if response["id"] is not None}
+
+        self.assertEqual(by_id[1]["result"], search("glassmorphism", "style"))
+        self.assertEqual(by_id[2]["result"], search_stack("image optimization", "nextjs", 2))
+        self.assertEqual(by_id[3]["result"], search_stack("form validation", "react,vue", per_stack=1))
+        self.assertIn("Missing required param", by_id[4]["error"])
+        self.assertIn("Unknown method", by_id[5]["error"])
+        self.assertEqual(sum(1 for response in responses if response["id"] is None and "error" in response), 2)
+
+        stats = json.loads(server.handle_line(json.dumps({"id": 9, "method": "stats"})))["result"]
+        self.assertEqual(stats["methods"]["search"]["requests"], 2)
+        self.assertEqual(stats["methods"]["search"]["errors"], 1)
+        self.assertEqual(stats["methods"]["search_stack"]["requests"], 2)
+        print(f"   ✅ {len(responses)} responses matched by id")
+
+    def test_02_persist_stays_in_output_dir(self):
+        """Test persist needs a server output directory and rejects client paths and path-like names"""
+        print("\n🛡️  Testing persist restrictions in server mode...")
+
+        def call(server, **params):
+            return json.loads(server.handle_line(json.dumps({"id": 1, "method": "generate_design_system",
+                                                             "params": dict({"query": "saas dashboard"}, **params)})))
+
+        output_dir = os.path.join(self.work_dir, "site")
+        self.assertIn("persist is disabled", call(SearchServer(), persist=True)["error"])
+        self.assertIn("result", call(SearchServer(), persist=False))
+
+        server = SearchServer(output_dir=output_dir)
+        self.assertIn("output_dir is set when the server starts",
+                      call(server, persist=True, output_dir=self.work_dir)["error"])
+        for params in ({"project_name": "../escape"}, {"page": "..\\escape"}, {"pages": [["nested/page", "q"]]},
+                       {"project_name": "Demo", "page": ".."}, {"query": "../../up"}):
+            self.assertIn("must not contain path separators", call(server, **dict(params, persist=True))["error"])
+        self.assertEqual(os.listdir(self.work_dir).count("escape"), 0)
+        self.assertFalse(os.path.exists(output_dir))
+
+        self.assertIn("result", call(server, persist=True, project_name="Demo", pages=["home", ["pricing", "plans"]]))
+        self.assertEqual(sorted(os.listdir(os.path.join(output_dir, "design-system", "demo", "pages"))),
+                         ["home.md", "pricing.md"])
+        print("   ✅ Persist confined to the server's output directory")
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets not supported")
+    def test_03_socket_file_safety(self):
+        """Test the socket is owner-only, live sockets and regular files are never replaced, stale ones are"""
+        print("\n🧦 Testing Unix socket file handling...")
+
+        path = os.path.join(self.work_dir, "s.sock")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("keep me")
+        output = run_search_cli("--serve", "--socket", path, data_dir=self.data_dir)
+        self.assertNotEqual(output.returncode, 0)
+        self.assertIn("is not a socket", output.stderr)
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), "keep me")
+        os.unlink(path)
+
+        # A socket nobody listens on is stale
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server_module._remove_stale_socket(path)
+        self.assertFalse(os.path.exists(path))
+
+        env = dict(os.environ, UI_PRO_MAX_DATA_DIR=str(self.data_dir))
+        process = subprocess.Popen([sys.executable, str(SCRIPTS_DIR / "search.py"), "--serve", "--socket", path],
+                                   stderr=subprocess.PIPE, text=True, env=env)
+        try:
+            deadline = time.monotonic() + 60
+            while not os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(60)
+                client.connect(path)
+                client.sendall(b'{"id": 7, "method": "search", "params": {"query": "glassmorphism"}}\n')
+                reply = json.loads(client.makefile('r', encoding='utf-8').readline())
+            self.assertEqual(reply["id"], 7)
+            self.assertEqual(reply["result"]["domain"], "style")
+
+            with self.assertRaisesRegex(RuntimeError, "already listening"):
+                server_module._remove_stale_socket(path)
+            self.assertTrue(os.path.exists(path))
+        finally:
+            process.terminate()
+            process.communicate(timeout=30)
+        self.assertFalse(os.path.exists(path))
+        print("   ✅ 0600 socket; files and live sockets kept, stale socket replaced")
+
+
+def run_integration_tests():
+    """Run all integration tests"""
+
+    print("=" * 80)
+    print("UI/UX PRO MAX SEARCH - INTEGRATION TESTS")
+    print("=" * 80)
+
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestPostingsScoring))
+    suite.addTests(loader.loadTestsFromTestCase(TestProcessCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchSearch))
+    suite.addTests(loader.loadTestsFromTestCase(TestConcurrentSearches))
+    suite.addTests(loader.loadTestsFromTestCase(TestReasoningIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestSearchAll))
+    suite.addTests(loader.loadTestsFromTestCase(TestFuzzyMatching))
+    suite.addTests(loader.loadTestsFromTestCase(TestPagePersistence))
+    suite.addTests(loader.loadTestsFromTestCase(TestColumnStore))
+    suite.addTests(loader.loadTestsFromTestCase(TestFieldedRanking))
+    suite.addTests(loader.loadTestsFromTestCase(TestStackSearch))
+    suite.addTests(loader.loadTestsFromTestCase(TestProfiler))
+    suite.addTests(loader.loadTestsFromTestCase(TestIndexSegments))
+    suite.addTests(loader.loadTestsFromTestCase(TestResultCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestSearchServer))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    print("\n" + "=" * 80)
+    print(f"Tests Run: {result.testsRun} | Failures: {len(result.failures)} | Errors: {len(result.errors)}")
+    print("=" * 80)
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_integration_tests()
+    sys.exit(0 if success else 1)
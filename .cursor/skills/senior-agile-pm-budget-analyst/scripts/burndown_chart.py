@@ -15,10 +15,12 @@ License: MIT
 
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from enum import Enum
 import logging
 
+from business_calendar import BusinessCalendar, ValidationError as CalendarError
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
@@ -95,6 +97,7 @@ class BurndownConfig:
     sprint_duration_days: int = 14
     work_days_per_week: int = 5
     show_weekends: bool = False
+    holidays: List[date] = field(default_factory=list)  # Non-working dates
     include_forecast: bool = True
     ascii_chart_height: int = 20
     ascii_chart_width: int = 80
@@ -171,6 +174,13 @@ class BurndownCalculator:
         else:
             self.end_date = end_date
 
+        try:
+            self.calendar = BusinessCalendar.from_work_days(
+                config.work_days_per_week, config.show_weekends, config.holidays
+            )
+        except CalendarError as e:
+            raise ValidationError(str(e)) from e
+
         self.data_points: List[DataPoint] = []
         self.scope_changes: List[Tuple[datetime, float, str]] = []  # (date, change, reason)
 
@@ -189,19 +199,11 @@ class BurndownCalculator:
 
     def _is_work_day(self, date: datetime) -> bool:
         """Check if date is a working day"""
-        if self.config.show_weekends:
-            return True
-        return date.weekday() < 5  # Monday = 0, Friday = 4
+        return self.calendar.is_working_day(date)
 
     def _calculate_work_days(self, start: datetime, end: datetime) -> int:
-        """Calculate number of working days between dates"""
-        days = 0
-        current = start
-        while current <= end:
-            if self._is_work_day(current):
-                days += 1
-            current += timedelta(days=1)
-        return days
+        """Calculate number of working days between dates (both inclusive, closed form)"""
+        return self.calendar.count(start, end)
 
     def add_data_point(
         self,
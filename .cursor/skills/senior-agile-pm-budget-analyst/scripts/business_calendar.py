@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Business-Day Calendar
+
+Working-day arithmetic shared by the burndown and Gantt generators:
+- Custom work weeks (any set of weekdays) and holiday lists
+- Closed-form counting: every date has a cumulative working-day index
+  (whole weeks x working days per week + a per-weekday prefix table -
+  holidays before it), so counting the working days between two dates is
+  two index lookups, O(log holidays), whatever the span
+- Adding N working days to a date by inverting the same index
+
+Dates may be date or datetime objects; only the calendar day is used.
+
+Author: Senior Agile PM Budget Analyst Skill
+License: MIT
+"""
+
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import Iterable, List
+
+MONDAY_TO_FRIDAY = (0, 1, 2, 3, 4)
+ALL_DAYS = (0, 1, 2, 3, 4, 5, 6)
+
+
+class ValidationError(Exception):
+    """Raised when validation fails"""
+    pass
+
+
+class BusinessCalendar:
+    """
+    Working days of a team: a work week plus holidays.
+
+    Day ordinals (date.toordinal()) start on Monday 0001-01-01, so the
+    weekday of ordinal o is (o - 1) % 7 and the working days before it are
+    ((o - 1) // 7) * len(work_week) + prefix[(o - 1) % 7] - holidays before o.
+
+    Example:
+        >>> calendar = BusinessCalendar(holidays=[date(2024, 12, 25)])
+        >>> calendar.count(date(2024, 12, 23), date(2024, 12, 27))
+        4
+        >>> calendar.add_working_days(date(2024, 12, 24), 1)
+        datetime.date(2024, 12, 26)
+    """
+
+    def __init__(self, work_week: Iterable[int] = MONDAY_TO_FRIDAY, holidays: Iterable[date] = ()):
+        """
+        Initialize the calendar.
+
+        Args:
+            work_week: Working weekdays (Monday = 0 ... Sunday = 6)
+            holidays: Non-working dates; those outside the work week are ignored
+
+        Raises:
+            ValidationError: If the work week is empty or has an invalid weekday,
+                or a holiday is not a date
+        """
+        weekdays = sorted(set(work_week))
+        if not weekdays or not all(0 <= day <= 6 for day in weekdays):
+            raise ValidationError("work_week must contain weekdays between 0 (Monday) and 6 (Sunday)")
+        holidays = list(holidays)
+        invalid = [day for day in holidays if not isinstance(day, date)]
+        if invalid:
+            raise ValidationError(f"holidays must be date or datetime objects, got {invalid[0]!r}")
+        self.work_week = tuple(weekdays)
+        self.days_per_week = len(weekdays)
+        self._is_working_weekday = [day in weekdays for day in range(7)]
+        self._prefix = [0] * 8  # Working weekdays among Monday..day - 1
+        for day in range(7):
+            self._prefix[day + 1] = self._prefix[day] + self._is_working_weekday[day]
+
+        # Working-day holidays as sorted ordinals: their rank is the number of holidays before a date
+        self._holidays: List[int] = sorted({
+            day.toordinal() for day in holidays
+            if self._is_working_weekday[day.weekday()]
+        })
+        self._holiday_set = set(self._holidays)
+
+    @classmethod
+    def from_work_days(cls, work_days_per_week: int = 5, show_weekends: bool = False,
+                       holidays: Iterable[date] = ()) -> "BusinessCalendar":
+        """
+        Calendar for the work_days_per_week / show_weekends settings of the
+        chart configs: the first work_days_per_week weekdays from Monday, or
+        every day when weekends count as working days.
+        """
+        work_week = ALL_DAYS if show_weekends else range(work_days_per_week)
+        return cls(work_week, holidays)
+
+    def is_working_day(self, day: date) -> bool:
+        """Check if a date is a working day"""
+        ordinal = day.toordinal()
+        return self._is_working_weekday[(ordinal - 1) % 7] and ordinal not in self._holiday_set
+
+    def index(self, day: date) -> int:
+        """
+        Cumulative working-day index: working days strictly before `day`.
+
+        count(a, b) == index(b) - index(a) + is_working_day(b) for a <= b.
+        """
+        return self._index(day.toordinal())
+
+    def _index(self, ordinal: int) -> int:
+        weeks, weekday = divmod(ordinal - 1, 7)
+        return weeks * self.days_per_week + self._prefix[weekday] - bisect_left(self._holidays, ordinal)
+
+    def count(self, start: date, end: date) -> int:
+        """
+        Number of working days from start to end, both inclusive (0 if end < start).
+
+        Example:
+            >>> BusinessCalendar().count(date(2024, 3, 1), date(2024, 3, 31))
+            21
+        """
+        first, last = start.toordinal(), end.toordinal()
+        if last < first:
+            return 0
+        return self._index(last + 1) - self._index(first)
+
+    def _from_index(self, target: int) -> int:
+        """Ordinal of the working day with index `target` (the target-th working day, from 0)."""
+        ordinal = 0
+        holidays_before = 0
+        while True:
+            # Place the target among plain work-week days, then skip the holidays before it
+            weeks, rank = divmod(target + holidays_before, self.days_per_week)
+            candidate = 1 + weeks * 7 + self.work_week[rank]
+            if candidate == ordinal:
+                return ordinal
+            ordinal = candidate
+            holidays_before = bisect_left(self._holidays, ordinal)
+            if ordinal in self._holiday_set:
+                holidays_before += 1  # A holiday itself is skipped too
+
+    def add_working_days(self, start: date, days: int) -> date:
+        """
+        The working day `days` working days after start (before it if negative).
+
+        A start that is not a working day counts from the next working day,
+        like numpy.busday_offset(roll='forward').
+
+        Args:
+            start: Start date
+            days: Working days to add
+
+        Returns:
+            Resulting date (a date, even for datetime input)
+        """
+        first = self._index(start.toordinal())  # Index of the first working day on or after start
+        return date.fromordinal(self._from_index(first + days))
+
+
+def count_working_days(start: date, end: date, work_week: Iterable[int] = MONDAY_TO_FRIDAY,
+                       holidays: Iterable[date] = ()) -> int:
+    """
+    Convenience function: working days from start to end, both inclusive.
+
+    Example:
+        >>> count_working_days(date(2024, 1, 1), date(2024, 1, 7))
+        5
+    """
+    return BusinessCalendar(work_week, holidays).count(start, end)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Business-Day Calendar")
+    print("=" * 60)
+
+    holidays = [date(2024, 12, 25), date(2025, 1, 1)]
+    calendar = BusinessCalendar(holidays=holidays)
+    start, end = date(2024, 12, 16), date(2025, 1, 10)
+
+    print(f"\n📅 {start} to {end}, holidays {', '.join(str(day) for day in holidays)}")
+    print(f"   Working days: {calendar.count(start, end)}")
+    print(f"   10 working days after {start}: {calendar.add_working_days(start, 10)}")
+
+    four_day_week = BusinessCalendar(work_week=(0, 1, 2, 3), holidays=holidays)
+    print(f"\n📅 Monday-Thursday team over the same period: {four_day_week.count(start, end)} working days")
+
+    long_start, long_end = date(2020, 1, 1), date(2029, 12, 31)
+    print(f"\n📅 {long_start} to {long_end}: {calendar.count(long_start, long_end)} working days "
+          f"(index {calendar.index(long_start)} -> {calendar.index(long_end + timedelta(days=1))})")
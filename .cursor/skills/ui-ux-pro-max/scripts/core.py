@@ -5,69 +5,128 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import hashlib
+import heapq
+import importlib.util
+import json
+import os
 import re
+import threading
+import time
+from array import array
+from bisect import bisect_right
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+
+from index_store import (INDEX_VERSION, VOCABULARY_FILE, ColumnStore, SegmentedColumnStore, build_column_store,
+                         delta_path_for, index_path_for, load_segments, load_vocabulary, open_index_file,
+                         read_appended_rows, read_csv_with_offsets, refresh_fingerprint, remove_deltas, save_index,
+                         save_vocabulary, source_stat)
+from result_cache import ResultCache
+import profiler
+
+# NumPy only backs the batch scorer; it is imported on first use (see _numpy) to keep startup stdlib-only
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+_np = None
 
 # ============ CONFIGURATION ============
-DATA_DIR = Path(__file__).parent.parent / "data"
+DATA_DIR = Path(os.environ.get("UI_PRO_MAX_DATA_DIR") or Path(__file__).parent.parent / "data")  # Override for benchmarks
 MAX_RESULTS = 3
+BATCH_CHUNK = 1024  # Queries scored per sparse product in search_many
+
+# Process-level cache of parsed tables and fitted indexes (all domains + stacks fit)
+CACHE_MAX_ENTRIES = 64
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # Weighed by CSV file size
+
+# Rows appended to a CSV are indexed into delta segments; past either limit the
+# load that added the last one compacts base + deltas into a fresh base index
+COMPACT_MAX_DELTAS = 4
+COMPACT_DELTA_RATIO = 0.25  # Delta documents relative to base documents
+COMPACT_LOCK_STALE_S = 600  # A compaction lock older than this is taken over
+
+# Query-result cache: in-memory LRU entries (0 disables) and an optional SQLite file
+RESULT_CACHE_ENTRIES = int(os.environ.get("UI_PRO_MAX_RESULT_CACHE_ENTRIES") or 512)
+RESULT_CACHE_FILE = os.environ.get("UI_PRO_MAX_RESULT_CACHE") or None
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Summed size of the stored results
+RESULT_CACHE_CHECK_S = 1.0  # CSV changes are noticed within this interval
+RESULT_CACHE_VERSION = 1  # Bump when the shape of cached results changes
+
+# Ranking: "bm25f" weighs search columns by their field_weights, "bm25" treats them as one text
+RANKINGS = ("bm25", "bm25f")
+RANKING = "bm25"  # BM25F is opt-in: it reorders the top results of many queries
+
+# Typo tolerance: tokens found in no index expand to their nearest indexed terms
+FUZZY_MAX_EXPANSIONS = 3
+FUZZY_MIN_LENGTH = 4  # Shorter tokens are never corrected
+FUZZY_LONG_LENGTH = 8  # Tokens this long may be two edits away, shorter ones one
 
+# field_weights: BM25F weight per search column (unlisted columns weigh 1)
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type"],
+        "field_weights": {"Style Category": 3, "Keywords": 2},
         "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity"]
     },
     "prompt": {
         "file": "prompts.csv",
         "search_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords"],
+        "field_weights": {"Style Category": 3, "AI Prompt Keywords (Copy-Paste Ready)": 1.5},
         "output_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords", "Implementation Checklist"]
     },
     "color": {
         "file": "colors.csv",
         "search_cols": ["Product Type", "Keywords", "Notes"],
+        "field_weights": {"Product Type": 3, "Keywords": 2, "Notes": 0.5},
         "output_cols": ["Product Type", "Keywords", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Border (Hex)", "Notes"]
     },
     "chart": {
         "file": "charts.csv",
         "search_cols": ["Data Type", "Keywords", "Best Chart Type", "Accessibility Notes"],
+        "field_weights": {"Data Type": 3, "Keywords": 2, "Best Chart Type": 2, "Accessibility Notes": 0.5},
         "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"]
     },
     "landing": {
         "file": "landing.csv",
         "search_cols": ["Pattern Name", "Keywords", "Conversion Optimization", "Section Order"],
+        "field_weights": {"Pattern Name": 3, "Keywords": 2, "Conversion Optimization": 0.5, "Section Order": 0.5},
         "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"]
     },
     "product": {
         "file": "products.csv",
         "search_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Key Considerations"],
+        "field_weights": {"Product Type": 3, "Keywords": 2, "Key Considerations": 0.5},
         "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"]
     },
     "ux": {
         "file": "ux-guidelines.csv",
         "search_cols": ["Category", "Issue", "Description", "Platform"],
+        "field_weights": {"Category": 2, "Issue": 3},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "typography": {
         "file": "typography.csv",
         "search_cols": ["Font Pairing Name", "Category", "Mood/Style Keywords", "Best For", "Heading Font", "Body Font"],
+        "field_weights": {"Font Pairing Name": 3, "Category": 1.5, "Mood/Style Keywords": 2, "Best For": 1.5},
         "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"]
     },
     "icons": {
         "file": "icons.csv",
         "search_cols": ["Category", "Icon Name", "Keywords", "Best For"],
+        "field_weights": {"Category": 1.5, "Icon Name": 3, "Keywords": 2},
         "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"]
     },
     "react": {
         "file": "react-performance.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "field_weights": {"Category": 1.5, "Issue": 3, "Keywords": 2},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "web": {
         "file": "web-interface.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "field_weights": {"Category": 1.5, "Issue": 3, "Keywords": 2},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     }
 }
@@ -90,12 +149,22 @@ STACK_CONFIG = {
 # Common columns for all stacks
 _STACK_COLS = {
     "search_cols": ["Category", "Guideline", "Description", "Do", "Don't"],
+    "field_weights": {"Category": 1.5, "Guideline": 3, "Don't": 0.5},
     "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"]
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+def _numpy():
+    """Import NumPy on first use; None when it is not installed"""
+    global _np
+    if _np is None and NUMPY_AVAILABLE:
+        import numpy
+        _np = numpy
+    return _np
+
+
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
     """BM25 ranking algorithm for text search"""
@@ -109,54 +178,560 @@ class BM25:
         self.idf = {}
         self.doc_freqs = defaultdict(int)
         self.N = 0
+        # Inverted index: term -> (start, end) slice of post_docs/post_tfs
+        self.postings = {}
+        self.post_docs = array('I')
+        self.post_tfs = array('I')
+        # BM25F: per-field weights and average lengths, field lengths per document
+        # (row-major), each posting's raw tf per field (row-major) and its
+        # field-weighted normalized tf, precomputed from them
+        self.field_weights = None
+        self.field_avgdl = []
+        self.field_totals = []
+        self.field_lengths = array('I')
+        self.post_ftfs = None
+        self.post_field_tfs = None
+        self._impacts = {}
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
         text = re.sub(r'[^\w\s]', ' ', str(text).lower())
         return [w for w in text.split() if len(w) > 2]
 
-    def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
+    def query_terms(self, query, corrections=None):
+        """
+        Return (term, weight) pairs for a query. Tokens are weighted 1 unless
+        corrections maps them to fuzzy-matched terms with lower weights.
+        """
+        terms = []
+        for token in self.tokenize(query):
+            if corrections and token in corrections:
+                terms.extend(corrections[token])
+            else:
+                terms.append((token, 1))
+        return terms
+
+    def fit(self, documents, field_weights=None, prior=None):
+        """
+        Build BM25 index from documents.
+
+        With field_weights, each document is a list of field texts (one per
+        weight). BM25 statistics cover the concatenated fields as before, and
+        each posting also keeps its tf per field and its BM25F pseudo term
+        frequency sum_f(weight_f * tf_f / (1 - b + b * len_f / avglen_f)).
+        prior is (n_docs, field_totals) of documents indexed before these (an
+        index segment being appended to); avglen_f then covers both.
+        """
+        fields = None
+        with profiler.span("tokenize"):
+            if field_weights is not None:
+                fields = [[self.tokenize(text) for text in doc] for doc in documents]
+                self.corpus = [[word for tokens in doc for word in tokens] for doc in fields]
+            else:
+                self.corpus = [self.tokenize(doc) for doc in documents]
         self.N = len(self.corpus)
         if self.N == 0:
             return
         self.doc_lengths = [len(doc) for doc in self.corpus]
         self.avgdl = sum(self.doc_lengths) / self.N
+        profiler.count("docs_indexed", self.N)
+        if profiler.enabled():
+            profiler.count("tokens_indexed", sum(self.doc_lengths))
 
-        for doc in self.corpus:
-            seen = set()
+        if fields is not None:
+            prior_docs, prior_totals = prior or (0, [0] * len(field_weights))
+            self.field_weights = list(field_weights)
+            self.field_totals = [sum(len(doc[f]) for doc in fields) for f in range(len(field_weights))]
+            self.field_avgdl = [(total + prior_total) / (self.N + prior_docs)
+                                for total, prior_total in zip(self.field_totals, prior_totals)]
+            self.field_lengths = array('I', (len(tokens) for doc in fields for tokens in doc))
+            self.post_ftfs = array('d')
+            self.post_field_tfs = array('I')
+
+        term_docs = defaultdict(list)
+        for idx, doc in enumerate(self.corpus):
+            term_freqs = defaultdict(int)
             for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+                term_freqs[word] += 1
+            if fields is None:
+                for word, tf in term_freqs.items():
+                    term_docs[word].append((idx, tf, None, 0.0))
+                continue
+            field_tfs, norms = self._field_tfs(fields[idx]), self._field_norms(idx)
+            for word, tf in term_freqs.items():
+                tfs = field_tfs[word]
+                term_docs[word].append((idx, tf, tfs, self._pseudo_tf(tfs, norms)))
+
+        for word in sorted(term_docs):
+            postings = term_docs[word]
+            start = len(self.post_docs)
+            for idx, tf, tfs, pseudo_tf in postings:
+                self.post_docs.append(idx)
+                self.post_tfs.append(tf)
+                if fields is not None:
+                    self.post_field_tfs.extend(tfs)
+                    self.post_ftfs.append(pseudo_tf)
+            self.postings[word] = (start, len(self.post_docs))
+            self.doc_freqs[word] = len(postings)
 
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+    @staticmethod
+    def _field_tfs(doc_fields):
+        """Term frequencies per field of one document's tokenized fields: word -> [tf of each field]"""
+        field_tfs = {}
+        for f, tokens in enumerate(doc_fields):
+            for word in tokens:
+                tfs = field_tfs.get(word)
+                if tfs is None:
+                    tfs = field_tfs[word] = [0] * len(doc_fields)
+                tfs[f] += 1
+        return field_tfs
+
+    def _field_norms(self, idx):
+        """weight_f / (1 - b + b * len_f / avglen_f) of each field of document idx (0 for empty fields)"""
+        b, n_fields = self.b, len(self.field_weights)
+        lengths = self.field_lengths[idx * n_fields:(idx + 1) * n_fields]
+        return [weight / (1 - b + b * length / avglen) if length else 0.0
+                for weight, length, avglen in zip(self.field_weights, lengths, self.field_avgdl)]
+
+    @staticmethod
+    def _pseudo_tf(tfs, norms):
+        """BM25F pseudo term frequency of a posting from its per-field tfs and its document's field norms"""
+        pseudo_tf = 0.0
+        for tf, norm in zip(tfs, norms):
+            pseudo_tf += tf * norm
+        return pseudo_tf
+
+    def score(self, query, top_k=None, corrections=None, fielded=False):
+        """
+        Score documents against query by walking the postings of its terms.
+
+        Only documents containing at least one query term are touched. With
+        top_k, a heap selects the best k instead of sorting every document;
+        without it, all documents are returned as before (unmatched ones with
+        score 0, in index order). corrections is passed to query_terms().
+        fielded ranks by BM25F when the index was fitted with field weights.
+        """
+        k1, b, avgdl = self.k1, self.b, self.avgdl
+        doc_lengths, post_docs, post_tfs = self.doc_lengths, self.post_docs, self.post_tfs
+        post_ftfs = self.post_ftfs if fielded else None
+        scores = {}
+        walked = 0
+
+        for term, weight in self.query_terms(query, corrections):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            start, end = self.postings[term]
+            walked += end - start
+            if post_ftfs is not None:
+                # BM25F: length normalization is already folded into the pseudo tf
+                for i in range(start, end):
+                    idx = post_docs[i]
+                    ftf = post_ftfs[i]
+                    scores[idx] = scores.get(idx, 0) + idf * (ftf * (k1 + 1)) / (ftf + k1) * weight
+                continue
+            for i in range(start, end):
+                idx = post_docs[i]
+                tf = post_tfs[i]
+                denominator = tf + k1 * (1 - b + b * doc_lengths[idx] / avgdl)
+                scores[idx] = scores.get(idx, 0) + idf * (tf * (k1 + 1)) / denominator * weight
+        profiler.count("queries_scored")
+        profiler.count("postings_scored", walked)
+
+        # Ties keep ascending document order, matching a stable sort
+        if top_k is not None:
+            return heapq.nlargest(top_k, scores.items(), key=lambda x: (x[1], -x[0]))
+
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        ranked.extend((idx, 0) for idx in range(self.N) if idx not in scores)
+        return ranked
+
+    def _impact_matrix(self, fielded=False):
+        """
+        Term-document impact matrix in CSR layout (rows = terms in postings
+        order), built once per index and ranking. Entry values are the full
+        BM25 term contribution idf * tf * (k1 + 1) / (tf + k1 * norm(doc)),
+        or idf * ftf * (k1 + 1) / (ftf + k1) for BM25F.
+        """
+        fielded = fielded and self.post_ftfs is not None
+        if fielded not in self._impacts:
+            np = _numpy()
+            k1, b, avgdl = self.k1, self.b, self.avgdl
+            terms = sorted(self.postings, key=lambda t: self.postings[t][0])
+            lengths = np.array([self.postings[t][1] - self.postings[t][0] for t in terms], dtype=np.int64)
+            idf = np.repeat(np.array([self.idf[t] for t in terms], dtype=np.float64), lengths)
+            docs = np.frombuffer(self.post_docs, dtype=np.uint32).astype(np.int64)
+            if fielded:
+                ftf = np.frombuffer(self.post_ftfs, dtype=np.float64)
+                impacts = idf * (ftf * (k1 + 1)) / (ftf + k1)
+            else:
+                tf = np.frombuffer(self.post_tfs, dtype=np.uint32).astype(np.float64)
+                doc_len = np.asarray(self.doc_lengths, dtype=np.float64)[docs]
+                impacts = idf * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * doc_len / avgdl))
+            self._impacts[fielded] = (docs, impacts)
+        return self._impacts[fielded]
+
+    def score_many(self, queries, top_k, corrections=None, fielded=False):
+        """
+        Score a batch of queries, returning the top_k ranking of each.
+
+        With NumPy the batch is one sparse product of the query-term matrix
+        and the term-document impact matrix, followed by a grouped sort;
+        scores and tie order match score(). Without NumPy each query falls
+        back to score(). corrections, if given, holds one dict per query.
+        """
+        corrections = corrections or [None] * len(queries)
+        np = _numpy()
+        if np is None or self.N == 0:
+            return [self.score(query, top_k=top_k, corrections=fixes, fielded=fielded)
+                    for query, fixes in zip(queries, corrections)]
+
+        docs, impacts = self._impact_matrix(fielded)
+        profiler.count("queries_scored", len(queries))
+        rankings = []
+        for chunk_start in range(0, len(queries), BATCH_CHUNK):
+            chunk = queries[chunk_start:chunk_start + BATCH_CHUNK]
+            chunk_corrections = corrections[chunk_start:chunk_start + BATCH_CHUNK]
+
+            # Non-zeros of the query-term matrix, in query then token order
+            q_ids, starts, ends, weights = [], [], [], []
+            for qi, (query, fixes) in enumerate(zip(chunk, chunk_corrections)):
+                for term, weight in self.query_terms(query, fixes):
+                    span = self.postings.get(term)
+                    if span is not None:
+                        q_ids.append(qi)
+                        starts.append(span[0])
+                        ends.append(span[1])
+                        weights.append(weight)
+            if not q_ids:
+                rankings.extend([] for _ in chunk)
+                continue
+
+            # Gather the postings of every (query, term) pair
+            starts = np.array(starts, dtype=np.int64)
+            lengths = np.array(ends, dtype=np.int64) - starts
+            segment = np.repeat(np.arange(len(starts)), lengths)
+            positions = starts[segment] + np.arange(len(segment)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            keys = np.array(q_ids, dtype=np.int64)[segment] * self.N + docs[positions]
+            contributions = impacts[positions]
+            if any(weight != 1 for weight in weights):
+                contributions = contributions * np.array(weights, dtype=np.float64)[segment]
+
+            # Sum contributions per (query, doc); bincount adds in token order like score()
+            cells, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse.ravel(), weights=contributions, minlength=len(cells))
+            cell_q, cell_doc = cells // self.N, cells % self.N
+
+            order = np.lexsort((cell_doc, -sums, cell_q))
+            bounds = np.searchsorted(cell_q[order], np.arange(len(chunk) + 1))
+            for qi in range(len(chunk)):
+                top = order[bounds[qi]:min(bounds[qi + 1], bounds[qi] + top_k)]
+                rankings.append(list(zip(cell_doc[top].tolist(), sums[top].tolist())))
+        return rankings
+
+    def index_arrays(self):
+        """Export the fitted index as typed arrays for index_store.save_index"""
+        terms = sorted(self.postings)
+        post_starts = array('Q', (self.postings[t][0] for t in terms))
+        post_starts.append(len(self.post_docs))
+        return terms, {
+            "doc_lengths": array('I', self.doc_lengths),
+            "idf": array('d', (self.idf[t] for t in terms)),
+            "post_starts": post_starts,
+            "post_docs": self.post_docs,
+            "post_tfs": self.post_tfs,
+            "field_lengths": self.field_lengths,
+            "post_ftfs": self.post_ftfs if self.post_ftfs is not None else array('d'),
+            "post_field_tfs": self.post_field_tfs if self.post_field_tfs is not None else array('I'),
+        }
+
+    @classmethod
+    def from_index_file(cls, index_file):
+        """Rebuild a fitted BM25 over the memory-mapped arrays of an index file"""
+        bm25 = cls(index_file.k1, index_file.b)
+        bm25.N = index_file.n_docs
+        bm25.avgdl = index_file.avgdl
+        bm25.doc_lengths = index_file.doc_lengths
+        bm25.post_docs = index_file.post_docs
+        bm25.post_tfs = index_file.post_tfs
+        if index_file.field_weights is not None:
+            bm25.field_weights = index_file.field_weights
+            bm25.field_avgdl = index_file.field_avgdl
+            bm25.field_totals = index_file.field_totals
+            bm25.field_lengths = index_file.field_lengths
+            bm25.post_ftfs = index_file.post_ftfs
+            bm25.post_field_tfs = index_file.post_field_tfs
+        starts = index_file.post_starts
+        for i, (term, idf) in enumerate(zip(index_file.terms, index_file.idf)):
+            bm25.idf[term] = idf
+            bm25.postings[term] = (starts[i], starts[i + 1])
+            bm25.doc_freqs[term] = starts[i + 1] - starts[i]
+        return bm25
+
+    @classmethod
+    def merge(cls, parts):
+        """
+        Concatenate fitted indexes into one over all their documents, part i's
+        documents numbered after part i - 1's. Term frequencies and document
+        and field lengths are carried over; IDF, avgdl and the BM25F field
+        averages are recomputed over the merged collection, and the BM25F
+        pseudo tfs are renormalized from the raw per-field tfs, so the merged
+        index scores exactly like one fitted over all the documents.
+        """
+        merged = cls(parts[0].k1, parts[0].b) if parts else cls()
+        offsets = [0]
+        for bm25 in parts:
+            offsets.append(offsets[-1] + bm25.N)
+        merged.N = offsets[-1]
+        if merged.N == 0:
+            return merged
+        merged.doc_lengths = array('I')
+        for bm25 in parts:
+            merged.doc_lengths.extend(bm25.doc_lengths)
+        merged.avgdl = sum(merged.doc_lengths) / merged.N
+        n_fields = 0
+        if all(bm25.post_field_tfs is not None for bm25 in parts):
+            merged.field_weights = parts[0].field_weights
+            n_fields = len(merged.field_weights)
+            merged.field_totals = [sum(totals) for totals in zip(*(bm25.field_totals for bm25 in parts))]
+            merged.field_avgdl = [total / merged.N for total in merged.field_totals]
+            for bm25 in parts:
+                merged.field_lengths.extend(bm25.field_lengths)
+            norms = [merged._field_norms(idx) for idx in range(merged.N)]
+            merged.post_ftfs = array('d')
+            merged.post_field_tfs = array('I')
+
+        for term in sorted(set().union(*(bm25.postings for bm25 in parts))):
+            start = len(merged.post_docs)
+            for bm25, offset in zip(parts, offsets):
+                span = bm25.postings.get(term)
+                if span is None:
+                    continue
+                docs = [doc + offset for doc in bm25.post_docs[span[0]:span[1]]]
+                merged.post_docs.extend(docs)
+                merged.post_tfs.extend(bm25.post_tfs[span[0]:span[1]])
+                if n_fields:
+                    field_tfs = bm25.post_field_tfs[span[0] * n_fields:span[1] * n_fields].tolist()
+                    merged.post_field_tfs.extend(field_tfs)
+                    rows = zip(*[iter(field_tfs)] * n_fields)  # Consecutive n_fields values per posting
+                    merged.post_ftfs.extend(map(cls._pseudo_tf, rows, (norms[doc] for doc in docs)))
+            merged.postings[term] = (start, len(merged.post_docs))
+            merged.doc_freqs[term] = len(merged.post_docs) - start
+
+        for word, freq in merged.doc_freqs.items():
+            merged.idf[word] = log((merged.N - freq + 0.5) / (freq + 0.5) + 1)
+        return merged
+
+
+# ============ PROCESS CACHE ============
+class _LRUCache:
+    """
+    Thread-safe LRU cache of values derived from files.
+
+    Entries are stored with the source file's (mtime_ns, size) fingerprint and
+    rebuilt when it changes. Eviction is least-recently-used, bounded by entry
+    count and by the summed byte cost of the entries.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (fingerprint, cost, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._build_locks = {}  # key -> [lock, threads using it] while a build is pending
+
+    def _lookup(self, key, fingerprint):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self._entries.move_to_end(key)
+            return entry
+        return None
+
+    def get_or_build(self, key, fingerprint, cost, build):
+        """Return the cached value for key, calling build() on a miss"""
+        with self._lock:
+            entry = self._lookup(key, fingerprint)
+            if entry is not None:
+                self.hits += 1
+                return entry[2]
+            # Removed again by the last thread done with it, so the dict only holds keys being built
+            build_lock = self._build_locks.setdefault(key, [threading.Lock(), 0])
+            build_lock[1] += 1
+
+        # One build per key at a time; other keys keep building concurrently
+        try:
+            with build_lock[0]:
+                return self._build(key, fingerprint, cost, build)
+        finally:
+            with self._lock:
+                build_lock[1] -= 1
+                if build_lock[1] == 0:
+                    del self._build_locks[key]
+
+    def _build(self, key, fingerprint, cost, build):
+        """Build and store the value for key unless another thread just did (caller holds its build lock)"""
+        with self._lock:
+            entry = self._lookup(key, fingerprint)
+            if entry is not None:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (fingerprint, cost, value)
+            self._bytes += cost
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_cost, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_cost
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_CACHE = _LRUCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+
+def cache_info():
+    """Return hit/miss/size statistics of the process-level index cache"""
+    return _CACHE.info()
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+def clear_cache():
+    """Drop all cached tables, indexes and query results"""
+    global _fingerprint_checked
+    _CACHE.clear()
+    _RESULTS.clear()
+    _fingerprint_checked = (None, None)
 
-            scores.append((idx, score))
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+# ============ RESULT CACHE ============
+_RESULTS = ResultCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_FILE, RESULT_CACHE_MAX_BYTES)
+_fingerprint_checked = (None, None)  # (monotonic time, data_fingerprint()) of the last check
+_code_stats = None  # _code_fingerprint() of this process
+
+
+def configure_result_cache(max_entries=RESULT_CACHE_ENTRIES, path=RESULT_CACHE_FILE, max_bytes=RESULT_CACHE_MAX_BYTES):
+    """Resize the in-memory result cache (0 disables it) and set or unset its SQLite file"""
+    _RESULTS.configure(max_entries, path, max_bytes)
+
+
+def result_cache_info():
+    """Return hit/miss/size statistics of the query-result cache"""
+    return _RESULTS.info()
+
+
+def _scan_data_files():
+    """(path, mtime, size) of every CSV under DATA_DIR"""
+    stats, pending = [], [str(DATA_DIR)]
+    while pending:
+        try:
+            entries = list(os.scandir(pending.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir():
+                pending.append(entry.path)
+            elif entry.name.endswith(".csv"):
+                st = entry.stat()
+                stats.append((entry.path, st.st_mtime_ns, st.st_size))
+    stats.sort()
+    return stats
+
+
+def _code_fingerprint():
+    """(name, mtime, size) of the scripts as loaded by this process, taken once"""
+    global _code_stats
+    if _code_stats is None:
+        _code_stats = [(path.name, *source_stat(path)) for path in sorted(Path(__file__).parent.glob("*.py"))]
+    return _code_stats
+
+
+def _config_fingerprint():
+    """Settings that change results besides the data files: versions, ranking, BM25 and fuzzy parameters, columns"""
+    bm25 = BM25()
+    return [RESULT_CACHE_VERSION, INDEX_VERSION, RANKING, bm25.k1, bm25.b,
+            FUZZY_MAX_EXPANSIONS, FUZZY_MIN_LENGTH, FUZZY_LONG_LENGTH, CSV_CONFIG, STACK_CONFIG, _STACK_COLS]
+
+
+def data_fingerprint():
+    """
+    Digest of everything a cached result depends on: the (path, mtime, size)
+    of every CSV under DATA_DIR, the _config_fingerprint() settings and the
+    scripts' code. Recomputed at most once per RESULT_CACHE_CHECK_S, so
+    repeat lookups do not rescan the data tree.
+    """
+    global _fingerprint_checked
+    checked, fingerprint = _fingerprint_checked
+    now = time.monotonic()
+    if checked is None or now - checked >= RESULT_CACHE_CHECK_S:
+        state = [_scan_data_files(), _config_fingerprint(), _code_fingerprint()]
+        fingerprint = hashlib.sha1(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+        _fingerprint_checked = (now, fingerprint)
+    return fingerprint
+
+
+def _with_query(result, query):
+    """Restore the caller's query text in a cached result and its nested results"""
+    if "query" in result:
+        result["query"] = query
+    for part in ("domains", "stacks"):
+        for nested in result.get(part, {}).values():
+            nested["query"] = query
+    return result
+
+
+def cached_result(kind, params, query, compute):
+    """
+    Return compute() through the query-result cache.
+
+    The key is (kind, normalized query, params), and entries are tied to the
+    data_fingerprint() they were computed under (checked at most once per
+    RESULT_CACHE_CHECK_S, so a repeat lookup stays a dict access). params
+    must be JSON-serializable and cover every argument that changes the
+    result. Queries are normalized by case and surrounding whitespace, which
+    no ranking depends on, and the "query" fields of a hit are set back to
+    the caller's text. Error results are not cached.
+    """
+    if not _RESULTS.enabled:
+        return compute()
+    with profiler.span("result_cache"):
+        fingerprint = data_fingerprint()
+        key = json.dumps([kind, query.strip().lower()] + list(params), ensure_ascii=False)
+        value = _RESULTS.get(key, fingerprint)
+        if value is not None:
+            profiler.count("result_cache_hits")
+            return _with_query(json.loads(value), query)
+    profiler.count("result_cache_misses")
+    result = compute()
+    if "error" not in result:
+        _RESULTS.put(key, fingerprint, json.dumps(result, ensure_ascii=False))
+    return result
 
 
 # ============ SEARCH FUNCTIONS ============
@@ -166,33 +741,590 @@ def _load_csv(filepath):
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
+def load_cached(filepath, name, build):
+    """
+    Build a value derived from a file once per process.
+
+    The value is cached under (name, filepath) and rebuilt by calling build()
+    when the file's mtime or size changes. Callers must not mutate it.
+    """
+    mtime_ns, size = source_stat(filepath)
+    return _CACHE.get_or_build((name, str(filepath)), (mtime_ns, size), size, build)
+
+
+def load_table(filepath):
+    """Load CSV rows through the process cache. Callers must not mutate the result."""
+    return load_cached(filepath, "table", lambda: _load_csv(filepath))
+
+
+class _CsvIndex:
+    """Fitted BM25 index over one CSV file, with its cells in a ColumnStore"""
+
+    def __init__(self, filepath, bm25, columns):
+        self.filepath = filepath
+        self.bm25 = bm25
+        self.columns = columns
+        self.fieldnames = columns.fieldnames
+
+    def rows(self, indices, columns=None):
+        """Return row dicts for document indices, with only `columns` when given"""
+        return self.columns.rows(indices, columns)
 
-    data = _load_csv(filepath)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+def _index_segment(filepath, search_cols, field_weights, fieldnames, data, row_offsets, source, segment=0,
+                   start_offset=0, prior=None):
+    """
+    Fit one index segment over parsed CSV rows and save it: the base index
+    (segment 0) or delta segment n, holding rows appended at start_offset.
 
-    # BM25 search
+    prior is (n_docs, field_totals) of the segments before it. Returns
+    (bm25, columns), served from the memory-mapped file once saved, so
+    parsed rows and token lists are not kept alive in the process cache.
+    """
+    # Build documents from search columns (one text per field for BM25F)
+    if field_weights is not None:
+        documents = [[str(row.get(col, "")) for col in search_cols] for row in data]
+    else:
+        documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
     bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+    with profiler.span("fit"):
+        bm25.fit(documents, field_weights, prior)
+    bm25.corpus = []  # Token lists are only needed while fitting
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+    terms, arrays = bm25.index_arrays()
+    arrays["row_offsets"] = array('Q', row_offsets)
+    with profiler.span("column_store"):
+        cell_arrays, irregular_rows = build_column_store(fieldnames, data)
+    arrays.update(cell_arrays)
+    del data, documents
+    meta = {"search_cols": list(search_cols), "field_weights": bm25.field_weights, "field_avgdl": bm25.field_avgdl,
+            "fieldnames": fieldnames, "terms": terms, "irregular_rows": irregular_rows,
+            "segment": segment, "start_offset": start_offset, "doc_start": prior[0] if prior else 0,
+            "total_length": sum(bm25.doc_lengths), "field_totals": bm25.field_totals}
+    index_path = index_path_for(filepath) if segment == 0 else delta_path_for(filepath, segment)
+    index_file = None
+    try:
+        with profiler.span("index_save"):
+            save_index(index_path, source, meta, (bm25.avgdl, bm25.k1, bm25.b), arrays)
+            index_file = open_index_file(index_path, search_cols, field_weights)
+    except OSError:
+        pass  # Read-only data directory: keep serving from the in-memory index
+    if index_file is not None:
+        return BM25.from_index_file(index_file), ColumnStore.from_index_file(filepath, index_file)
 
-    return results
+    columns = ColumnStore(filepath, fieldnames, arrays["row_offsets"], arrays["cell_ids"],
+                          arrays["str_offsets"], arrays["str_blob"], irregular_rows)
+    return bm25, columns
 
 
-def detect_domain(query):
-    """Auto-detect the most relevant domain from query"""
+def _build_base(filepath, search_cols, field_weights=None):
+    """Index a whole CSV as a new base segment, dropping its delta segments"""
+    mtime_ns, size = source_stat(filepath)
+    with profiler.span("csv_parse"):
+        fieldnames, data, row_offsets, digest = read_csv_with_offsets(filepath)
+    part = _index_segment(filepath, search_cols, field_weights, fieldnames, data, row_offsets,
+                          (mtime_ns, size, digest))
+    remove_deltas(filepath)
+    return part
+
+
+def _append_segment(filepath, search_cols, field_weights, segments, start):
+    """
+    Index the rows appended to a CSV after byte `start` into the next delta
+    segment. Returns the new (bm25, columns) parts (none if only blank lines
+    were added), or None if the CSV changed other than by appending.
+    """
+    mtime_ns, size = source_stat(filepath)
+    last = segments[-1]
+    with profiler.span("csv_parse"):
+        appended = read_appended_rows(filepath, start, last.source[2], last.fieldnames)
+    if appended is None:
+        return None
+    data, row_offsets, digest = appended
+    if not data:
+        refresh_fingerprint(last.path, mtime_ns, size, digest)
+        return []
+    profiler.count("rows_appended", len(data))
+    prior = (sum(seg.n_docs for seg in segments), [sum(totals) for totals in zip(*(seg.field_totals for seg in segments))])
+    return [_index_segment(filepath, search_cols, field_weights, last.fieldnames, data, row_offsets,
+                           (mtime_ns, size, digest), len(segments), start, prior)]
+
+
+def _open_index(filepath, search_cols, field_weights=None):
+    """
+    Load the persisted index for a CSV, bringing it up to date first.
+
+    Rows appended since the index was written are indexed on their own into
+    a delta segment (the cost tracks the appended bytes), and the base and
+    delta segments are merged at load with IDF, avgdl and the BM25F field
+    statistics over all of them. Once the deltas pass a COMPACT_* limit
+    they are compacted into the base right away. Any other change rebuilds
+    the whole index. With field_weights the index
+    also carries BM25F statistics.
+    """
+    with profiler.span("index_load"):
+        segments, append_from = load_segments(filepath, search_cols, field_weights)
+        parts = [(BM25.from_index_file(seg), ColumnStore.from_index_file(filepath, seg)) for seg in segments or ()]
+
+    if append_from is not None:
+        with profiler.span("index_append"):
+            appended = _append_segment(filepath, search_cols, field_weights, segments, append_from)
+        if appended is None:
+            parts = []
+        else:
+            parts += appended
+            if _compaction_due(segments, appended):
+                with profiler.span("index_compact"):
+                    compacted = _compact(filepath, search_cols, field_weights)
+                if compacted is not None:
+                    parts = [compacted]
+
+    if not parts:
+        with profiler.span("index_build"):
+            parts = [_build_base(filepath, search_cols, field_weights)]
+    if len(parts) == 1:
+        return _CsvIndex(filepath, *parts[0])
+    with profiler.span("segment_merge"):
+        return _CsvIndex(filepath, BM25.merge([bm25 for bm25, _ in parts]),
+                         SegmentedColumnStore([columns for _, columns in parts]))
+
+
+# ============ COMPACTION ============
+def _compact_lock_path(filepath):
+    index_path = index_path_for(filepath)
+    return index_path.with_name(index_path.name + ".lock")
+
+
+def _compaction_due(segments, appended):
+    """Whether the delta segments, with the ones just appended, pass a COMPACT_* limit"""
+    deltas = len(segments) - 1 + len(appended)
+    delta_docs = sum(seg.n_docs for seg in segments[1:]) + sum(bm25.N for bm25, _ in appended)
+    return deltas >= COMPACT_MAX_DELTAS or delta_docs >= COMPACT_DELTA_RATIO * segments[0].n_docs
+
+
+def _compact(filepath, search_cols, field_weights):
+    """
+    Rebuild the index of a CSV as a single base segment, dropping its delta
+    segments. A lock file next to the index keeps concurrent compactions of
+    one CSV from repeating the work.
+
+    Returns:
+        The new base (bm25, columns), or None if another process holds the
+        lock or the lock cannot be created
+    """
+    lock = _compact_lock_path(filepath)
+    try:
+        if time.time() - os.stat(lock).st_mtime >= COMPACT_LOCK_STALE_S:
+            os.unlink(lock)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except OSError:
+        return None
+    try:
+        return _build_base(filepath, search_cols, field_weights)
+    finally:
+        try:
+            os.unlink(lock)
+        except OSError:
+            pass
+
+
+def compact_index(filepath):
+    """
+    Compact the index of a data CSV (see _compact).
+
+    Returns:
+        True if this call rebuilt the index
+    """
+    filepath = Path(filepath).resolve()
+    config = next((config for _, _, config, path in _partition_sources() if path.resolve() == filepath), None)
+    if config is None:
+        return False
+    return _compact(filepath, config["search_cols"], _field_weights(config)) is not None
+
+
+def compact_indexes(filepaths=None):
+    """Compact the given data CSVs, or every one with delta segments. Returns the compacted paths"""
+    if not filepaths:
+        filepaths = [path for _, _, _, path in _partition_sources() if delta_path_for(path, 1).exists()]
+    return [str(path) for path in filepaths if compact_index(path)]
+
+
+def _get_index(filepath, search_cols, field_weights=None):
+    """Return the fitted index for a CSV through the process cache"""
+    mtime_ns, size = source_stat(filepath)
+    weights = tuple(field_weights) if field_weights is not None else None
+    key = ("index", str(filepath), tuple(search_cols), weights)
+    return _CACHE.get_or_build(key, (mtime_ns, size), size, lambda: _open_index(filepath, search_cols, field_weights))
+
+
+def _field_weights(config):
+    """BM25F weight of each search column of a CSV_CONFIG / _STACK_COLS entry (default 1)"""
+    weights = config.get("field_weights", {})
+    return [float(weights.get(col, 1.0)) for col in config["search_cols"]]
+
+
+def _config_index(filepath, config):
+    """Return the fitted index for a CSV searched with a CSV_CONFIG / _STACK_COLS entry"""
+    return _get_index(filepath, config["search_cols"], _field_weights(config))
+
+
+def _fielded(ranking):
+    """Whether a ranking name (None = RANKING) selects BM25F"""
+    ranking = ranking or RANKING
+    if ranking not in RANKINGS:
+        raise ValueError(f"Unknown ranking: {ranking}. Available: {', '.join(RANKINGS)}")
+    return ranking == "bm25f"
+
+
+def _search_csv(filepath, config, query, max_results, fuzzy=True, ranking=None):
+    """Core search function using BM25 / BM25F. Returns (results, corrections)"""
+    if not filepath.exists():
+        return [], {}
+
+    output_cols = config["output_cols"]
+    index = _config_index(filepath, config)
+    with profiler.span("fuzzy"):
+        corrections = query_corrections(query, index.bm25.postings) if fuzzy else {}
+    with profiler.span("score"):
+        ranked = index.bm25.score(query, top_k=max(max_results, 0), corrections=corrections, fielded=_fielded(ranking))
+
+    # Get top results with score > 0; only their output columns are decoded
+    hits = [idx for idx, score in ranked if score > 0]
+    profiler.count("rows_decoded", len(hits))
+    with profiler.span("rows"):
+        return [{col: row.get(col, "") for col in output_cols if col in row}
+                for row in index.rows(hits, output_cols)], corrections
+
+
+def _search_csv_many(filepath, config, queries, max_results, fuzzy=True, ranking=None):
+    """Batch variant of _search_csv: one ranking pass for all queries"""
+    if not filepath.exists():
+        return [[] for _ in queries], [{} for _ in queries]
+
+    output_cols = config["output_cols"]
+    index = _config_index(filepath, config)
+    with profiler.span("fuzzy"):
+        corrections = [query_corrections(query, index.bm25.postings) if fuzzy else {} for query in queries]
+    with profiler.span("score"):
+        rankings = index.bm25.score_many(queries, max(max_results, 0), corrections, _fielded(ranking))
+
+    hits = [[idx for idx, score in ranked if score > 0] for ranked in rankings]
+    wanted = sorted({idx for query_hits in hits for idx in query_hits})
+    profiler.count("rows_decoded", len(wanted))
+    with profiler.span("rows"):
+        rows = dict(zip(wanted, index.rows(wanted, output_cols)))
+    return [[{col: rows[idx].get(col, "") for col in output_cols if col in rows[idx]} for idx in query_hits]
+            for query_hits in hits], corrections
+
+
+# ============ UNIFIED INDEX ============
+class _UnifiedIndex:
+    """
+    One vocabulary over every CSV_CONFIG domain and STACK_CONFIG stack.
+
+    Each term maps to its postings segment in every partition (domain or
+    stack) that contains it, together with that partition's IDF, so a single
+    pass over the query terms scores all partitions at once. Statistics stay
+    per partition, so each partition's ranking matches search()/search_stack().
+    """
+
+    def __init__(self, partitions):
+        self.partitions = partitions  # list of (kind, name, config, _CsvIndex)
+        self.terms = defaultdict(list)  # term -> [(partition, start, end, idf), ...]
+        for part, (_, _, _, index) in enumerate(partitions):
+            bm25 = index.bm25
+            for term, (start, end) in bm25.postings.items():
+                self.terms[term].append((part, start, end, bm25.idf[term]))
+
+    def score(self, query, top_k, corrections=None, fielded=False):
+        """Return the top_k (idx, score) ranking of every partition"""
+        scores = [{} for _ in self.partitions]
+
+        for term, weight in BM25().query_terms(query, corrections):
+            for part, start, end, idf in self.terms.get(term, ()):
+                bm25 = self.partitions[part][3].bm25
+                k1, b, avgdl = bm25.k1, bm25.b, bm25.avgdl
+                doc_lengths, post_docs, post_tfs = bm25.doc_lengths, bm25.post_docs, bm25.post_tfs
+                part_scores = scores[part]
+                if fielded and bm25.post_ftfs is not None:
+                    post_ftfs = bm25.post_ftfs
+                    for i in range(start, end):
+                        idx = post_docs[i]
+                        ftf = post_ftfs[i]
+                        part_scores[idx] = part_scores.get(idx, 0) + idf * (ftf * (k1 + 1)) / (ftf + k1) * weight
+                    continue
+                for i in range(start, end):
+                    idx = post_docs[i]
+                    tf = post_tfs[i]
+                    denominator = tf + k1 * (1 - b + b * doc_lengths[idx] / avgdl)
+                    part_scores[idx] = part_scores.get(idx, 0) + idf * (tf * (k1 + 1)) / denominator * weight
+
+        return [heapq.nlargest(top_k, part_scores.items(), key=lambda x: (x[1], -x[0])) for part_scores in scores]
+
+
+def _partition_sources():
+    """(kind, name, config, filepath) of every existing domain and stack CSV"""
+    sources = []
+    for domain, config in CSV_CONFIG.items():
+        sources.append(("domain", domain, config, DATA_DIR / config["file"]))
+    for stack, config in STACK_CONFIG.items():
+        sources.append(("stack", stack, dict(_STACK_COLS, file=config["file"]), DATA_DIR / config["file"]))
+    return [source for source in sources if source[3].exists()]
+
+
+def _sources_fingerprint(sources):
+    """Cache fingerprint and cost of a value derived from every partition source"""
+    stats = [source_stat(filepath) for _, _, _, filepath in sources]
+    fingerprint = tuple((str(filepath), st) for (_, _, _, filepath), st in zip(sources, stats))
+    return fingerprint, sum(size for _, size in stats)
+
+
+def _get_unified_index():
+    """Return the unified index through the process cache, keyed by every file's fingerprint"""
+    sources = _partition_sources()
+    fingerprint, cost = _sources_fingerprint(sources)
+
+    def build():
+        with profiler.span("unified_build"):
+            return _UnifiedIndex([(kind, name, config, _config_index(filepath, config))
+                                  for kind, name, config, filepath in sources])
+
+    return _CACHE.get_or_build(("unified",), fingerprint, cost, build)
+
+
+# ============ MERGED STACK INDEX ============
+class _StackIndex:
+    """
+    One BM25 index over the guidelines of several STACK_CONFIG stacks.
+
+    Built by merging the persisted per-stack indexes (no CSV is re-read or
+    re-tokenized). Documents keep their stack as a tag through the offsets
+    table, while IDF, avgdl and the BM25F field averages span every merged
+    stack, so a single ranking orders all stacks' guidelines against each
+    other.
+    """
+
+    def __init__(self, stacks, indexes):
+        self.stacks = stacks
+        self.indexes = indexes
+        self.offsets = [0]
+        for index in indexes:
+            self.offsets.append(self.offsets[-1] + index.bm25.N)
+        self.bm25 = BM25.merge([index.bm25 for index in indexes])
+
+    def locate(self, idx):
+        """Map a merged document index to (stack position, row index in that stack)"""
+        part = bisect_right(self.offsets, idx) - 1
+        return part, idx - self.offsets[part]
+
+
+def _stack_names(stacks):
+    """Resolve "all", "a,b,c" or a list of stack names; raises ValueError on unknown names"""
+    if isinstance(stacks, str):
+        stacks = AVAILABLE_STACKS if stacks.strip() == "all" else stacks.split(",")
+    names = list(dict.fromkeys(name.strip() for name in stacks if name.strip()))
+    unknown = [name for name in names if name not in STACK_CONFIG]
+    if unknown or not names:
+        raise ValueError(f"Unknown stack: {', '.join(unknown) or '(none)'}. Available: {', '.join(AVAILABLE_STACKS)}")
+    return names
+
+
+def _get_stack_index(stacks):
+    """Return the merged index of the given stacks through the process cache"""
+    config = dict(_STACK_COLS, file=None)
+    sources = [("stack", stack, config, DATA_DIR / STACK_CONFIG[stack]["file"]) for stack in stacks]
+    fingerprint, cost = _sources_fingerprint(sources)
+
+    def build():
+        with profiler.span("stack_merge"):
+            return _StackIndex(stacks, [_config_index(filepath, _STACK_COLS) for _, _, _, filepath in sources])
+
+    return _CACHE.get_or_build(("stacks", tuple(stacks)), fingerprint, cost, build)
+
+
+# ============ FUZZY MATCHING ============
+def _trigrams(term):
+    """Distinct character trigrams of a term padded with boundary markers"""
+    padded = f"^{term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Optimal string alignment distance between a and b (insertions,
+    deletions, substitutions and adjacent transpositions each cost 1).
+
+    Returns max_distance + 1 as soon as the distance is known to exceed
+    max_distance; any result above max_distance only means it does.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, before[j - 2] + 1)
+            current.append(value)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def max_edits(token):
+    """Edit distance a token may be corrected across"""
+    if len(token) < FUZZY_MIN_LENGTH:
+        return 0
+    return 2 if len(token) >= FUZZY_LONG_LENGTH else 1
+
+
+class FuzzyIndex:
+    """
+    Trigram index over the indexed vocabulary for correcting misspelled
+    query tokens.
+
+    Candidates must share enough trigrams with the token to be within
+    max_edits() (each edit removes at most four of the token's padded
+    trigrams); only those are checked with edit_distance(). Tokens short
+    enough to lose every trigram also check the terms sharing none whose
+    length is within max_edits(). The trigram
+    table is stored as flat arrays (term ids of gram i are
+    gram_terms[gram_starts[i]:gram_starts[i + 1]]), so it can be saved to
+    and memory-mapped from the vocabulary file.
+    """
+
+    def __init__(self, terms, grams=None, gram_starts=None, gram_terms=None):
+        """Index sorted terms, or wrap a trigram table loaded with index_store.load_vocabulary"""
+        self.terms = sorted(terms) if grams is None else terms
+        self.vocabulary = frozenset(self.terms)
+        if grams is None:
+            table = defaultdict(list)
+            for term_id, term in enumerate(self.terms):
+                for gram in _trigrams(term):
+                    table[gram].append(term_id)
+            grams = sorted(table)
+            gram_starts, gram_terms = array('Q', [0]), array('I')
+            for gram in grams:
+                gram_terms.extend(table[gram])
+                gram_starts.append(len(gram_terms))
+        self.grams = grams
+        self.gram_ids = {gram: i for i, gram in enumerate(grams)}
+        self.gram_starts = gram_starts
+        self.gram_terms = gram_terms
+        self._by_length = None  # length -> term ids, built on first use by _terms_near_length
+
+    def _terms_near_length(self, length, distance):
+        """Ids of the terms whose length is within distance of length"""
+        if self._by_length is None:
+            by_length = defaultdict(list)
+            for term_id, term in enumerate(self.terms):
+                by_length[len(term)].append(term_id)
+            self._by_length = by_length
+        return [term_id for n in range(length - distance, length + distance + 1)
+                for term_id in self._by_length.get(n, ())]
+
+    def nearest(self, token):
+        """
+        Return up to FUZZY_MAX_EXPANSIONS (term, weight) pairs for the
+        indexed terms closest to token, weighted 1 / (1 + distance). Terms
+        tie-break alphabetically; an empty list means nothing is close enough.
+        """
+        limit = max_edits(token)
+        if limit == 0:
+            return []
+
+        grams = _trigrams(token)
+        shared = defaultdict(int)
+        for gram in grams:
+            gram_id = self.gram_ids.get(gram)
+            if gram_id is None:
+                continue
+            for term_id in self.gram_terms[self.gram_starts[gram_id]:self.gram_starts[gram_id + 1]]:
+                shared[term_id] += 1
+        if len(grams) <= 4 * limit:
+            # Edits can remove every trigram ("prue" -> "pure"), so sharing none is no proof of distance
+            for term_id in self._terms_near_length(len(token), limit):
+                shared.setdefault(term_id, 0)
+
+        best, matches = limit, []
+        for term_id, count in shared.items():
+            if count < len(grams) - 4 * best:
+                continue
+            term = self.terms[term_id]
+            distance = edit_distance(token, term, best)
+            if distance < best:
+                best, matches = distance, [term]
+            elif distance == best:
+                matches.append(term)
+
+        return [(term, 1 / (1 + best)) for term in sorted(matches)[:FUZZY_MAX_EXPANSIONS]]
+
+
+def _get_fuzzy_index():
+    """
+    Return the vocabulary trigram index through the process cache.
+
+    It is loaded from the vocabulary file in DATA_DIR while that was built
+    from the current CSVs, so a fresh process does not load every domain
+    and stack index to correct one token; otherwise it is built from the
+    unified index and saved.
+    """
+    sources = _partition_sources()
+    fingerprint, cost = _sources_fingerprint(sources)
+
+    def build():
+        stats = [[str(filepath), *st] for filepath, st in fingerprint]
+        path = DATA_DIR / VOCABULARY_FILE
+        with profiler.span("fuzzy_load"):
+            stored = load_vocabulary(path, stats)
+        if stored is not None:
+            return FuzzyIndex(*stored)
+        terms = _get_unified_index().terms
+        with profiler.span("fuzzy_build"):
+            fuzzy = FuzzyIndex(terms)
+        try:
+            save_vocabulary(path, stats, fuzzy.terms, fuzzy.grams, fuzzy.gram_starts, fuzzy.gram_terms)
+        except OSError:
+            pass  # Read-only data directory: rebuilt by every process
+        return fuzzy
+
+    return _CACHE.get_or_build(("fuzzy",), fingerprint, cost, build)
+
+
+def query_corrections(query, known=()):
+    """
+    Map query tokens that appear in no domain or stack index to their nearest
+    indexed terms, as (term, weight) pairs for BM25.query_terms().
+
+    Tokens in known (e.g. the vocabulary of the index being searched) are
+    skipped without loading the shared vocabulary.
+    """
+    tokens = [token for token in BM25().tokenize(query) if token not in known and max_edits(token)]
+    if not tokens:
+        return {}
+    fuzzy = _get_fuzzy_index()
+    corrections = {}
+    for token in tokens:
+        if token not in fuzzy.vocabulary:
+            nearest = fuzzy.nearest(token)
+            if nearest:
+                corrections[token] = nearest
+    return corrections
+
+
+def _correction_terms(corrections):
+    """Report form of corrections: token -> corrected terms"""
+    return {token: [term for term, _ in terms] for token, terms in corrections.items()}
+
+
+def _domain_keyword_scores(query):
+    """Count domain keyword hits in query"""
     query_lower = query.lower()
 
     domain_keywords = {
@@ -209,13 +1341,46 @@ def detect_domain(query):
         "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
     }
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
+    return {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
+
+
+def detect_domain(query):
+    """Auto-detect the most relevant domain from query"""
+    scores = _domain_keyword_scores(query)
     best = max(scores, key=scores.get)
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+def warm_indexes():
+    """Load or build every domain and stack index into the process cache"""
+    for config in CSV_CONFIG.values():
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            _config_index(filepath, config)
+    for config in STACK_CONFIG.values():
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            _config_index(filepath, _STACK_COLS)
+
+
+def search(query, domain=None, max_results=MAX_RESULTS, fuzzy=True, ranking=None):
+    """
+    Main search function with auto-domain detection ("all" searches every domain and stack).
+
+    With fuzzy, tokens found in no index are matched to their nearest indexed
+    terms and the result reports them under "corrections". ranking is "bm25"
+    or "bm25f" (field-weighted, see field_weights in CSV_CONFIG); default RANKING.
+    Repeat queries are answered from the query-result cache.
+    """
+    if domain == "all":
+        return search_all(query, max_results, fuzzy, ranking)
+    with profiler.span("search"):
+        return cached_result("search", [domain, max_results, fuzzy, ranking or RANKING], query,
+                             lambda: _search_domain(query, domain, max_results, fuzzy, ranking))
+
+
+def _search_domain(query, domain, max_results, fuzzy, ranking):
+    """Uncached search() of one domain"""
     if domain is None:
         domain = detect_domain(query)
 
@@ -225,19 +1390,36 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    results, corrections = _search_csv(filepath, config, query, max_results, fuzzy, ranking)
 
-    return {
+    result = {
         "domain": domain,
         "query": query,
         "file": config["file"],
         "count": len(results),
         "results": results
     }
+    if corrections:
+        result["corrections"] = _correction_terms(corrections)
+    return result
+
 
+def search_stack(query, stack, max_results=MAX_RESULTS, fuzzy=True, ranking=None, per_stack=None):
+    """
+    Search stack-specific guidelines (fuzzy, ranking and caching as in search()).
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
-    """Search stack-specific guidelines"""
+    stack "all" or a comma-separated list ("nextjs,shadcn,react") searches
+    those stacks together, see search_stacks(); per_stack only applies there.
+    """
+    if stack.strip() == "all" or "," in stack:
+        return search_stacks(query, stack, max_results, fuzzy, ranking, per_stack)
+    with profiler.span("search_stack"):
+        return cached_result("search_stack", [stack, max_results, fuzzy, ranking or RANKING], query,
+                             lambda: _search_stack(query, stack, max_results, fuzzy, ranking))
+
+
+def _search_stack(query, stack, max_results, fuzzy, ranking):
+    """Uncached search_stack()"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
 
@@ -246,9 +1428,9 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    results, corrections = _search_csv(filepath, _STACK_COLS, query, max_results, fuzzy, ranking)
 
-    return {
+    result = {
         "domain": "stack",
         "stack": stack,
         "query": query,
@@ -256,3 +1438,172 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
         "count": len(results),
         "results": results
     }
+    if corrections:
+        result["corrections"] = _correction_terms(corrections)
+    return result
+
+
+def search_stacks(query, stacks="all", max_results=MAX_RESULTS, fuzzy=True, ranking=None, per_stack=None):
+    """
+    Search several stacks' guidelines as one collection.
+
+    stacks is "all", a comma-separated string or a list of STACK_CONFIG
+    names. Results are ranked globally over the merged stack index, each
+    tagged with its "Stack"; per_stack caps how many results one stack may
+    contribute (the next best guidelines of other stacks fill the rest).
+    """
+    try:
+        names = _stack_names(stacks)
+    except ValueError as e:
+        return {"error": str(e)}
+    with profiler.span("search_stacks"):
+        return cached_result("search_stacks", [names, max_results, per_stack, fuzzy, ranking or RANKING], query,
+                             lambda: _search_stacks(query, names, stacks, max_results, fuzzy, ranking, per_stack))
+
+
+def _search_stacks(query, names, stacks, max_results, fuzzy, ranking, per_stack):
+    """Uncached search_stacks() of resolved stack names"""
+    for name in names:
+        filepath = DATA_DIR / STACK_CONFIG[name]["file"]
+        if not filepath.exists():
+            return {"error": f"Stack file not found: {filepath}", "stack": name}
+
+    index = _get_stack_index(names)
+    bm25 = index.bm25
+    with profiler.span("fuzzy"):
+        corrections = query_corrections(query, bm25.postings) if fuzzy else {}
+    limit = max(max_results, 0)
+    # With a quota, walk the full ranking until the limit is filled
+    with profiler.span("score"):
+        ranked = bm25.score(query, top_k=None if per_stack is not None else limit, corrections=corrections,
+                            fielded=_fielded(ranking))
+
+    picked, taken = [], defaultdict(int)
+    for idx, score in ranked:
+        if score <= 0 or len(picked) >= limit:
+            break
+        part, row = index.locate(idx)
+        if per_stack is not None and taken[part] >= per_stack:
+            continue
+        taken[part] += 1
+        picked.append((part, row))
+
+    output_cols = _STACK_COLS["output_cols"]
+    by_part = defaultdict(list)
+    for part, row in picked:
+        by_part[part].append(row)
+    rows = {}
+    for part, part_rows in by_part.items():
+        for row_idx, row in zip(part_rows, index.indexes[part].rows(part_rows, output_cols)):
+            rows[(part, row_idx)] = row
+    results = []
+    for part, row_idx in picked:
+        row = rows[(part, row_idx)]
+        results.append(dict({"Stack": names[part]}, **{col: row.get(col, "") for col in output_cols if col in row}))
+
+    result = {
+        "domain": "stack",
+        "stack": "all" if isinstance(stacks, str) and stacks.strip() == "all" else ",".join(names),
+        "stacks": names,
+        "query": query,
+        "file": ", ".join(STACK_CONFIG[name]["file"] for name in names),
+        "count": len(results),
+        "results": results
+    }
+    if per_stack is not None:
+        result["per_stack"] = per_stack
+    if corrections:
+        result["corrections"] = _correction_terms(corrections)
+    return result
+
+
+def search_many(queries, domain=None, max_results=MAX_RESULTS, fuzzy=True, ranking=None):
+    """
+    Search many queries against one domain index in a single pass.
+
+    Returns one result dict per query, in input order, shaped like search().
+    With domain=None each query is routed by detect_domain and queries that
+    share a domain are batched together.
+    """
+    queries = list(queries)
+    by_domain = defaultdict(list)
+    for i, query in enumerate(queries):
+        by_domain[domain if domain is not None else detect_domain(query)].append(i)
+
+    output = [None] * len(queries)
+    for query_domain, positions in by_domain.items():
+        config = CSV_CONFIG.get(query_domain, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
+        if not filepath.exists():
+            for i in positions:
+                output[i] = {"error": f"File not found: {filepath}", "domain": query_domain}
+            continue
+
+        batch = [queries[i] for i in positions]
+        with profiler.span("search_many"):
+            all_results, all_corrections = _search_csv_many(filepath, config, batch, max_results, fuzzy, ranking)
+        for i, results, corrections in zip(positions, all_results, all_corrections):
+            output[i] = {
+                "domain": query_domain,
+                "query": queries[i],
+                "file": config["file"],
+                "count": len(results),
+                "results": results
+            }
+            if corrections:
+                output[i]["corrections"] = _correction_terms(corrections)
+    return output
+
+
+def search_all(query, max_results=MAX_RESULTS, fuzzy=True, ranking=None):
+    """
+    Search every domain and stack in one pass over the unified index.
+
+    Returns:
+        dict with best_domain, best_stack, a ranking of every partition that
+        matched (by top BM25 score), and per-domain and per-stack results
+        shaped like search() and search_stack(). best_domain is the
+        detect_domain keyword winner when it has keyword hits and results,
+        otherwise the domain with the highest top score.
+    """
+    with profiler.span("search_all"):
+        return cached_result("search_all", [max_results, fuzzy, ranking or RANKING], query,
+                             lambda: _search_all(query, max_results, fuzzy, ranking))
+
+
+def _search_all(query, max_results, fuzzy, ranking):
+    """Uncached search_all()"""
+    index = _get_unified_index()
+    with profiler.span("fuzzy"):
+        corrections = query_corrections(query) if fuzzy else {}
+    with profiler.span("score"):
+        rankings = index.score(query, max(max_results, 0), corrections, _fielded(ranking))
+
+    output = {"domain": "all", "query": query, "best_domain": None, "best_stack": None,
+              "ranking": [], "domains": {}, "stacks": {}}
+    for (kind, name, config, csv_index), ranked in zip(index.partitions, rankings):
+        hits = [idx for idx, score in ranked if score > 0]
+        results = [{col: row.get(col, "") for col in config["output_cols"] if col in row}
+                   for row in csv_index.rows(hits, config["output_cols"])]
+        result = {"domain": name, "query": query, "file": config["file"], "count": len(results), "results": results}
+        if kind == "stack":
+            result = dict(result, domain="stack", stack=name)
+        output["domains" if kind == "domain" else "stacks"][name] = result
+        if hits:
+            output["ranking"].append({kind: name, "score": round(ranked[0][1], 4)})
+    if corrections:
+        output["corrections"] = _correction_terms(corrections)
+
+    output["ranking"].sort(key=lambda entry: -entry["score"])
+    for entry in output["ranking"]:
+        kind = "domain" if "domain" in entry else "stack"
+        if output["best_" + kind] is None:
+            output["best_" + kind] = entry[kind]
+
+    # Domain keywords are also matched against the fuzzy corrections of misspelled tokens
+    corrected = [term for terms in corrections.values() for term, _ in terms]
+    keyword_scores = _domain_keyword_scores(" ".join([query] + corrected))
+    keyword_domain = max(keyword_scores, key=keyword_scores.get)
+    if keyword_scores[keyword_domain] > 0 and output["domains"].get(keyword_domain, {}).get("count"):
+        output["best_domain"] = keyword_domain
+    return output
@@ -13,12 +13,18 @@ Usage:
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
 """
 
-import csv
+import atexit
 import json
 import os
+import tempfile
+import threading
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from core import cached_result, search, search_many, load_cached, load_table, DATA_DIR
+import profiler
 
 
 # ============ CONFIGURATION ============
@@ -32,58 +38,265 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Searches behind each page override: domain -> max_results
+PAGE_SEARCH_CONFIG = {
+    "style": 1,
+    "ux": 3,
+    "landing": 1
+}
+
+# Concurrent domain searches: thread pool (I/O, index loading) or process pool (scoring)
+SEARCH_WORKERS = len(SEARCH_CONFIG)
+SEARCH_EXECUTOR = "thread"
+
+_executors = {}  # kind -> (workers, pool): one pool per kind, replaced when another size is asked for
+_executors_lock = threading.Lock()
+
+
+def _submit(kind: str, workers: int, fn, calls) -> list:
+    """
+    Submit fn(*args) for every args in calls to the shared pool of a kind,
+    so repeated generate() calls don't pay pool startup. A request for a
+    different size replaces the pool; the old one finishes its queued work
+    and exits. Returns the futures in call order.
+    """
+    kind = "process" if kind == "process" else "thread"
+    with _executors_lock:
+        size, pool = _executors.get(kind, (None, None))
+        if size != workers:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            pool_class = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+            pool = pool_class(max_workers=workers)
+            _executors[kind] = (workers, pool)
+        # Submitted under the lock, so no other caller shuts the pool down in between
+        return [pool.submit(fn, *args) for args in calls]
+
+
+def _shutdown_executors():
+    """Shut down the shared pools (registered with atexit)."""
+    with _executors_lock:
+        pools = [pool for _, pool in _executors.values()]
+        _executors.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(_shutdown_executors)
+
+
+def run_searches(jobs: dict, workers: int = None, executor: str = None) -> dict:
+    """
+    Run several searches, concurrently when workers > 1.
+
+    Args:
+        jobs: Mapping of key -> (query, domain, max_results)
+        workers: Pool size (default SEARCH_WORKERS); 0 or 1 searches sequentially
+        executor: "thread" (default SEARCH_EXECUTOR) or "process"
+
+    Returns:
+        Mapping of key -> search result, in the same order as jobs
+    """
+    return _run_jobs(search, jobs, workers, executor)
+
+
+def run_page_searches(contexts: list, workers: int = None, executor: str = None) -> list:
+    """
+    Run the page-override searches (PAGE_SEARCH_CONFIG) for many pages at once.
+
+    Each domain scores every page context in one search_many() pass; the
+    domains run concurrently like run_searches().
+
+    Returns:
+        One {domain: search result} dict per context, in input order
+    """
+    jobs = {domain: (contexts, domain, max_results) for domain, max_results in PAGE_SEARCH_CONFIG.items()}
+    batches = _run_jobs(search_many, jobs, workers, executor)
+    return [{domain: batches[domain][i] for domain in jobs} for i in range(len(contexts))]
+
+
+def _run_jobs(fn, jobs: dict, workers: int = None, executor: str = None) -> dict:
+    """Call fn(*args) for every job, on the shared pool when workers > 1; results keep job order"""
+    workers = SEARCH_WORKERS if workers is None else workers
+    executor = executor or SEARCH_EXECUTOR
+    if workers <= 1 or len(jobs) <= 1:
+        return {key: fn(*args) for key, args in jobs.items()}
+
+    futures = _submit(executor, workers, fn, jobs.values())
+    return {key: future.result() for key, future in zip(jobs, futures)}
+
+
+# ============ REASONING RULE INDEX ============
+class ReasoningIndex:
+    """
+    Precomputed lookup of reasoning rules by UI category.
+
+    Resolves a category with the same precedence as a linear scan of the
+    rules (exact match, then partial match, then keyword match, first rule in
+    file order winning each stage), in time proportional to the query length:
+    - exact: dict of lowercased UI_Category -> first rule
+    - "UI_Category in query" and "keyword in query": one Aho-Corasick
+      automaton over every category and category keyword
+    - "query in UI_Category": str.find over all categories joined in order
+    """
+
+    _SEPARATOR = "\x00"
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.exact = {}
+        self.first_empty = None
+        categories = []
+        patterns = {}  # pattern -> [first rule as category, first rule as keyword]
+
+        for i, rule in enumerate(rules):
+            ui_cat = (rule.get("UI_Category") or "").lower()
+            categories.append(ui_cat)
+            self.exact.setdefault(ui_cat, i)
+            if not ui_cat:
+                if self.first_empty is None:
+                    self.first_empty = i
+                continue
+            patterns.setdefault(ui_cat, [None, None])
+            if patterns[ui_cat][0] is None:
+                patterns[ui_cat][0] = i
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                patterns.setdefault(kw, [None, None])
+                if patterns[kw][1] is None:
+                    patterns[kw][1] = i
+
+        # Categories joined in rule order: the first hit is the lowest rule index
+        self.joined = self._SEPARATOR.join(categories)
+        self.starts = []
+        position = 0
+        for ui_cat in categories:
+            self.starts.append(position)
+            position += len(ui_cat) + 1
+
+        self._build_automaton(patterns)
+
+    def _build_automaton(self, patterns: dict):
+        """Aho-Corasick trie with failure links; outputs hold per-node best rules."""
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[None, None]]
+        for pattern, (as_category, as_keyword) in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([None, None])
+                node = nxt
+            self.out[node] = [as_category, as_keyword]
+
+        # BFS: fold the outputs of each node's failure chain into the node
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                inherited = self.out[self.fail[child]]
+                self.out[child] = [_min_rule(a, b) for a, b in zip(self.out[child], inherited)]
+
+    def _scan(self, text: str) -> list:
+        """Return [first rule whose category occurs in text, first rule with a keyword in text]."""
+        best = [None, None]
+        node = 0
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            out = self.out[node]
+            if out[0] is not None or out[1] is not None:
+                best = [_min_rule(a, b) for a, b in zip(best, out)]
+        return best
+
+    def find(self, category: str) -> dict:
+        """Find the matching reasoning rule for a category, or {}."""
+        category_lower = category.lower()
+
+        # Exact match
+        i = self.exact.get(category_lower)
+        if i is not None:
+            return self.rules[i]
+
+        # Partial match: category contains the query, or the query contains the category
+        contained_in, keyword = self._scan(category_lower)
+        position = self.joined.find(category_lower)
+        contains = bisect_right(self.starts, position) - 1 if position >= 0 else None
+        partial = _min_rule(_min_rule(contained_in, contains), self.first_empty)
+        if partial is not None:
+            return self.rules[partial]
+
+        # Keyword match
+        if keyword is not None:
+            return self.rules[keyword]
+        return {}
+
+
+def _min_rule(a, b):
+    """Lower of two optional rule indices."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
-    def __init__(self):
+    def __init__(self, workers: int = None, executor: str = None):
+        self.workers = workers
+        self.executor = executor
         self.reasoning_data = self._load_reasoning()
+        self.reasoning_index = self._load_reasoning_index()
 
     def _load_reasoning(self) -> list:
         """Load reasoning rules from CSV."""
         filepath = DATA_DIR / REASONING_FILE
         if not filepath.exists():
             return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+        return load_table(filepath)
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
+    def _load_reasoning_index(self) -> ReasoningIndex:
+        """Build the rule lookup once per process (rebuilt if the CSV changes)."""
+        filepath = DATA_DIR / REASONING_FILE
+        if not filepath.exists():
+            return ReasoningIndex([])
+        return load_cached(filepath, "reasoning_index", lambda: ReasoningIndex(load_table(filepath)))
+
+    def _multi_domain_search(self, query: str, style_priority: list = None, product_result: dict = None) -> dict:
+        """Execute searches across multiple domains, reusing product_result if given."""
+        jobs = {}
         for domain, config in SEARCH_CONFIG.items():
+            if domain == "product" and product_result is not None:
+                continue
             if domain == "style" and style_priority:
                 # For style, also search with priority keywords
                 priority_query = " ".join(style_priority[:2]) if style_priority else query
                 combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
+                jobs[domain] = (combined_query, domain, config["max_results"])
             else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+                jobs[domain] = (query, domain, config["max_results"])
+
+        found = run_searches(jobs, self.workers, self.executor)
+        # Deterministic ordering: SEARCH_CONFIG order, whatever finished first
+        return {domain: product_result if domain == "product" and product_result is not None else found[domain]
+                for domain in SEARCH_CONFIG}
 
     def _find_reasoning_rule(self, category: str) -> dict:
         """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
+        return self.reasoning_index.find(category)
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
@@ -170,12 +383,13 @@ class DesignSystemGenerator:
             category = product_results[0].get("Product Type", "General")
 
         # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
+        with profiler.span("reasoning"):
+            reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Multi-domain search with style priority hints (reuses product search)
+        with profiler.span("domain_searches"):
+            search_results = self._multi_domain_search(query, style_priority, product_result)
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -460,7 +674,8 @@ def format_markdown(design_system: dict) -> str:
 
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page: str = None, output_dir: str = None,
+                           workers: int = None, executor: str = None, pages: list = None) -> str:
     """
     Main entry point for design system generation.
 
@@ -471,35 +686,57 @@ def generate_design_system(query: str, project_name: str = None, output_format:
         persist: If True, save design system to design-system/ folder
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
+        workers: Concurrent domain searches (default SEARCH_WORKERS; 1 = sequential)
+        executor: "thread" (default) or "process" pool for domain searches
+        pages: Optional list of page names or (page, page_query) pairs, persisted
+               together with page (see persist_design_system)
 
     Returns:
         Formatted design system string
+
+    The recommendation is served from the query-result cache when the same
+    query (ignoring case) was generated before against unchanged data.
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
-    
-    # Persist to files if requested
-    if persist:
-        persist_design_system(design_system, page, output_dir, query)
+    with profiler.span("design_system"):
+        design_system = cached_result("design_system", [], query,
+                                      lambda: DesignSystemGenerator(workers, executor).generate(query, project_name))
+        design_system["project_name"] = project_name or query.upper()
+
+        # Persist to files if requested
+        if persist:
+            with profiler.span("persist"):
+                persist_design_system(design_system, page, output_dir, query, workers=workers, executor=executor,
+                                      pages=pages)
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+        with profiler.span("render_" + output_format):
+            if output_format == "markdown":
+                return format_markdown(design_system)
+            return format_ascii_box(design_system)
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None,
+                          workers: int = None, executor: str = None, pages: list = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
+
+    MASTER.md is written once however many pages are given. The searches for
+    all page overrides run as one batch per domain, and each file is replaced
+    atomically only if more than its Generated timestamp changed.
     
     Args:
         design_system: The generated design system dictionary
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        workers: Concurrent searches for page overrides (default SEARCH_WORKERS)
+        executor: "thread" (default) or "process" pool for page override searches
+        pages: Optional list of further page names or (page, page_query) pairs;
+               page_query is the default query for each
     
     Returns:
-        dict with created file paths and status
+        dict with status, created_files (every file persisted), and the
+        written_files / unchanged_files split
     """
     base_dir = Path(output_dir) if output_dir else Path.cwd()
     
@@ -511,6 +748,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     pages_dir = design_system_dir / "pages"
     
     created_files = []
+    written_files = []
     
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
@@ -519,26 +757,104 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     master_file = design_system_dir / "MASTER.md"
     
     # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
+    with profiler.span("render_master_md"):
+        master_content = format_master_md(design_system)
+    if write_if_changed(master_file, master_content):
+        written_files.append(str(master_file))
     created_files.append(str(master_file))
     
-    # If page is specified, create page override file with intelligent content
-    if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+    # Page override files with intelligent content, searched as one batch
+    page_specs = _page_specs(([page] if page else []) + list(pages or []), page_query)
+    if page_specs:
+        contexts = [_page_context(name, query) for name, query in page_specs]
+        with profiler.span("page_searches"):
+            all_searches = run_page_searches(contexts, workers, executor)
+
+        def write_page(spec, context, searches):
+            name, query = spec
+            page_file = pages_dir / f"{_page_slug(name)}.md"
+            overrides = _build_page_overrides(context, searches)
+            with profiler.span("render_page_md"):
+                content = format_page_override_md(design_system, name, query, page_overrides=overrides)
+            return str(page_file), write_if_changed(page_file, content)
+
+        workers = SEARCH_WORKERS if workers is None else workers
+        if workers > 1 and len(page_specs) > 1:
+            futures = _submit("thread", workers, write_page, zip(page_specs, contexts, all_searches))
+            outcomes = [future.result() for future in futures]
+        else:
+            outcomes = [write_page(*args) for args in zip(page_specs, contexts, all_searches)]
+        for page_file, written in outcomes:
+            created_files.append(page_file)
+            if written:
+                written_files.append(page_file)
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": created_files,
+        "written_files": written_files,
+        "unchanged_files": [path for path in created_files if path not in written_files]
     }
 
 
+def _page_slug(page: str) -> str:
+    """File name stem of a page override."""
+    return page.lower().replace(' ', '-')
+
+
+def _page_specs(pages: list, default_query: str = None) -> list:
+    """Normalize page names / (page, query) pairs, dropping blanks and repeated slugs."""
+    specs, seen = [], set()
+    for entry in pages:
+        name, query = (entry, None) if isinstance(entry, str) else (entry[0], entry[1] if len(entry) > 1 else None)
+        name = name.strip()
+        if name and _page_slug(name) not in seen:
+            seen.add(_page_slug(name))
+            specs.append((name, query or default_query))
+    return specs
+
+
+_GENERATED_PREFIXES = ("**Generated:**", "> **Generated:**")
+
+
+def _without_timestamp(content: str) -> str:
+    """Content with its Generated timestamp lines removed, for change detection."""
+    return "\n".join(line for line in content.split("\n") if not line.startswith(_GENERATED_PREFIXES))
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """
+    Atomically replace path with content (temp file + rename), unless the
+    existing file differs only in its Generated timestamp.
+
+    Returns:
+        True if the file was written
+    """
+    path = Path(path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if _without_timestamp(f.read()) == _without_timestamp(content):
+                return False
+        mode = os.stat(path).st_mode & 0o777
+    except (OSError, UnicodeDecodeError):
+        mode = 0o644
+
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return True
+
+
 def format_master_md(design_system: dict) -> str:
     """Format design system as MASTER.md with hierarchical override logic."""
     project = design_system.get("project_name", "PROJECT")
@@ -802,14 +1118,21 @@ def format_master_md(design_system: dict) -> str:
     return "\n".join(lines)
 
 
-def format_page_override_md(design_system: dict, page_name: str, page_query: str = None) -> str:
-    """Format a page-specific override file with intelligent AI-generated content."""
+def format_page_override_md(design_system: dict, page_name: str, page_query: str = None,
+                            page_overrides: dict = None) -> str:
+    """
+    Format a page-specific override file with intelligent AI-generated content.
+
+    page_overrides, when already computed (see persist_design_system with
+    several pages), skips the page's own searches.
+    """
     project = design_system.get("project_name", "PROJECT")
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     page_title = page_name.replace("-", " ").replace("_", " ").title()
     
     # Detect page type and generate intelligent overrides
-    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
+    if page_overrides is None:
+        page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
     
     lines = []
     
@@ -918,16 +1241,23 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from core import search
-    
-    page_lower = page_name.lower()
-    query_lower = (page_query or "").lower()
-    combined_context = f"{page_lower} {query_lower}"
+    combined_context = _page_context(page_name, page_query)
     
     # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    searches = run_searches({
+        domain: (combined_context, domain, max_results) for domain, max_results in PAGE_SEARCH_CONFIG.items()
+    })
+    return _build_page_overrides(combined_context, searches)
+
+
+def _page_context(page_name: str, page_query: str = None) -> str:
+    """Search context for a page override: page name plus its query."""
+    return f"{page_name.lower()} {(page_query or '').lower()}"
+
+
+def _build_page_overrides(combined_context: str, searches: dict) -> dict:
+    """Build page overrides from the PAGE_SEARCH_CONFIG search results for a page context."""
+    style_search, ux_search, landing_search = searches["style"], searches["ux"], searches["landing"]
     
     # Extract results from search response
     style_results = style_search.get("results", [])
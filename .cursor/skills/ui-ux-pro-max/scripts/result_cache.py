@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Result Cache - Two-tier cache of search and design-system results
+
+Values are JSON text stored under a string key together with the fingerprint
+of the data files and settings they were computed from. A lookup only
+matches an entry with the current fingerprint, so editing any CSV (or the
+ranking configuration or code) invalidates every result computed before.
+
+    memory  LRU of the most recent results, bounded by entry count
+    disk    optional SQLite file shared by every process that points at it,
+            bounded by the summed size of the stored values; the least
+            recently used entries are evicted first
+
+Disk rows are keyed by (key, fingerprint), so processes running against
+different data or code share one file without evicting each other's
+results. Rows of other fingerprints are left to size eviction, except
+that a writer drops those unused for DISK_STALE_S.
+
+The disk tier is best effort: if the database cannot be opened or written
+(read-only location, locked, corrupt), the cache carries on memory-only.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import sqlite3
+    SQLITE_AVAILABLE = True
+except ImportError:
+    sqlite3 = None
+    SQLITE_AVAILABLE = False
+
+# ============ CONFIGURATION ============
+DISK_TIMEOUT_S = 5.0  # Wait this long for another process's write lock
+DISK_STALE_S = 7 * 24 * 3600  # Rows of other fingerprints unused this long are purged
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (key, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+
+# ============ RESULT CACHE ============
+class ResultCache:
+    """
+    Thread-safe cache of JSON results with a memory LRU and an optional
+    SQLite tier. max_entries=0 disables the memory tier, path=None the disk
+    tier; with both disabled every get() misses and put() is a no-op.
+    """
+
+    def __init__(self, max_entries, path=None, max_bytes=0):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.disk_errors = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> value, all computed under self._fingerprint
+        self._fingerprint = None
+        self._conn = None
+        self._conn_pid = None
+        self._purged = None  # Fingerprint whose writer last purged stale disk rows
+        self.configure(max_entries, path, max_bytes)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or self.path is not None
+
+    def configure(self, max_entries, path=None, max_bytes=0):
+        """Resize the memory tier and (re)point the disk tier; entries are kept"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.path = str(path) if path else None
+            self.max_bytes = max_bytes
+            while len(self._entries) > max(max_entries, 0):
+                self._entries.popitem(last=False)
+            self._close()
+
+    def get(self, key, fingerprint):
+        """Return the cached value for key computed under fingerprint, or None"""
+        with self._lock:
+            self._sync(fingerprint)
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            value = self._disk_get(key, fingerprint)
+            if value is not None:
+                self.disk_hits += 1
+                self._remember(key, value)
+                return value
+            self.misses += 1
+            return None
+
+    def put(self, key, fingerprint, value):
+        """Store value for key in both tiers"""
+        with self._lock:
+            self._sync(fingerprint)
+            self._remember(key, value)
+            self._disk_put(key, fingerprint, value)
+
+    def clear(self):
+        """Drop every entry of both tiers"""
+        with self._lock:
+            self._entries.clear()
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    conn.execute("DELETE FROM results")
+                except sqlite3.Error:
+                    self._disk_failed()
+
+    def info(self):
+        with self._lock:
+            info = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk": self.path,
+            }
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+                    info.update(disk_entries=count, disk_bytes=size, disk_max_bytes=self.max_bytes,
+                                disk_evictions=self.disk_evictions)
+                except sqlite3.Error:
+                    self._disk_failed()
+            info["disk_errors"] = self.disk_errors
+            return info
+
+    # Memory tier (callers hold self._lock)
+    def _sync(self, fingerprint):
+        """Forget memory entries computed under another fingerprint"""
+        if fingerprint != self._fingerprint:
+            self._entries.clear()
+            self._fingerprint = fingerprint
+
+    def _remember(self, key, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # Disk tier (callers hold self._lock)
+    def _connect(self):
+        """Open the SQLite tier once per process; None when disabled or broken"""
+        if self.path is None or not SQLITE_AVAILABLE:
+            return None
+        if self._conn is not None and self._conn_pid == os.getpid():
+            return self._conn
+        # A connection inherited through fork must not be used by the child
+        self._conn = None
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=DISK_TIMEOUT_S, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                # Version 1 keyed rows by key alone
+                conn.executescript(f"DROP TABLE IF EXISTS results; PRAGMA user_version = {_SCHEMA_VERSION};")
+            conn.executescript(_SCHEMA)
+        except (sqlite3.Error, OSError):
+            self._disk_failed()
+            return None
+        self._conn, self._conn_pid = conn, os.getpid()
+        return conn
+
+    def _close(self):
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def _disk_failed(self):
+        """Carry on memory-only after a disk error"""
+        self.disk_errors += 1
+        self._close()
+        self.path = None
+
+    def _disk_get(self, key, fingerprint):
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute("SELECT value FROM results WHERE key = ? AND fingerprint = ?",
+                               (key, fingerprint)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE results SET used = ? WHERE key = ? AND fingerprint = ?",
+                             (time.time(), key, fingerprint))
+        except sqlite3.Error:
+            self._disk_failed()
+            return None
+        return row[0] if row is not None else None
+
+    def _disk_put(self, key, fingerprint, value):
+        conn = self._connect()
+        if conn is None:
+            return
+        size = len(key) + len(value)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._purged != fingerprint:
+                    # Another process may still use the other fingerprints; only long-unused rows go
+                    conn.execute("DELETE FROM results WHERE fingerprint != ? AND used < ?",
+                                 (fingerprint, time.time() - DISK_STALE_S))
+                    self._purged = fingerprint
+                conn.execute("INSERT OR REPLACE INTO results (key, fingerprint, value, size, used) VALUES (?, ?, ?, ?, ?)",
+                             (key, fingerprint, value, size, time.time()))
+                self._disk_evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            self._disk_failed()
+
+    def _disk_evict(self, conn):
+        """Delete least recently used rows until the stored size fits max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, fingerprint, size in conn.execute("SELECT key, fingerprint, size FROM results ORDER BY used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key, fingerprint))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ? AND fingerprint = ?", evicted)
+        self.disk_evictions += len(evicted)